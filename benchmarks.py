@@ -0,0 +1,849 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Comet 3I/ATLAS animation pipeline
+Usage: python benchmarks.py kepler [--sizes 1e3 1e5 1e7]
+       python benchmarks.py kepler-range [--max-m 1e6] [--samples 1e5] [--eccentricities 1.2011 3.3565 6.1386]
+       python benchmarks.py frame [--frames 50]
+       python benchmarks.py montecarlo [--samples 1e6] [--epochs 1000]
+       python benchmarks.py objects [--sizes 10 100 1000 10000] [--epochs 365]
+       python benchmarks.py planets [--frames 1000]
+       python benchmarks.py nbody [--years-before 2] [--years-after 3] [--planets kepler-secular]
+       python benchmarks.py trajectory [--tol 1e-12] [--sizes 1e3 1e5 1e7]
+       python benchmarks.py renderers [--frames 50]
+       python benchmarks.py tracing [--spans 1e6]
+       python benchmarks.py spk [--kernel de440s.bsp] [--sizes 1e3 1e4]
+       python benchmarks.py encode [--frames 120] [--gop 30] [--workers 4]
+       python benchmarks.py soak [--frames 3000] [--recycle-every 500] [--sample 250] [--max-growth 1.0]
+                                 [--tracemalloc]
+       python benchmarks.py suite [--sizes 1e3 1e5] [--orbit-points 300] [--encode-frames 30]
+                                  [--output results.json] [--baseline old.json] [--threshold 0.2]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from frame_stream import find_ffmpeg
+from orbit_mechanics import GM_SUN, propagate_orbits, solve_kepler_hyperbolic, solve_kepler_hyperbolic_batch
+from uncertainty import principal_axes, propagate_covariance
+
+# Same orbit as comet_3i_animation.py
+E_COMET = 6.1386
+Q_COMET = 1.3563
+A_COMET = Q_COMET / (1 - E_COMET)
+N_COMET = np.sqrt(GM_SUN / abs(A_COMET)**3)  # rad/day
+
+# Interstellar objects (q AU, e, i, Omega, omega degrees, perihelion JD), rounded from JPL SBDB
+INTERSTELLAR_OBJECTS = {
+    '1I/Oumuamua': (0.25591, 1.20113, 122.742, 24.597, 241.811, 2458006.007),
+    '2I/Borisov': (2.00655, 3.35648, 44.053, 308.149, 209.124, 2458826.054),
+    '3I/ATLAS': (Q_COMET, E_COMET, 175.1130, 322.1559, 128.0111, 2460977.983),
+}
+
+# The scalar loop is only timed up to this many epochs, larger sizes are extrapolated
+MAX_LOOP_EPOCHS = 100_000
+
+
+def _best_of(func, repeat):
+    """Return the best wall time (seconds) of `repeat` calls to func"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_kepler(sizes, repeat=3):
+    """Compare the per-frame scalar Kepler loop against the batch solver"""
+    print("[BENCH] Hyperbolic Kepler solver: scalar loop vs batch")
+    print(f"  {'epochs':>12} {'loop (s)':>12} {'batch (s)':>12} {'speedup':>10} {'max |dH|':>10}")
+
+    for size in sizes:
+        size = int(size)
+        M = N_COMET * np.linspace(-60, 60, size)
+
+        batch_time = _best_of(lambda: solve_kepler_hyperbolic_batch(M, E_COMET), repeat)
+        H_batch, _ = solve_kepler_hyperbolic_batch(M, E_COMET)
+
+        loop_size = min(size, MAX_LOOP_EPOCHS)
+        M_loop = M[np.linspace(0, size - 1, loop_size).astype(int)]
+        loop_time = _best_of(lambda: [solve_kepler_hyperbolic(m, E_COMET) for m in M_loop], 1)
+        H_loop = np.array([solve_kepler_hyperbolic(m, E_COMET) for m in M_loop])
+        H_check, _ = solve_kepler_hyperbolic_batch(M_loop, E_COMET)
+        max_diff = np.max(np.abs(H_loop - H_check))
+
+        note = ''
+        if loop_size < size:
+            loop_time *= size / loop_size
+            note = ' (loop extrapolated)'
+
+        print(f"  {size:>12,d} {loop_time:>12.4f} {batch_time:>12.4f} "
+              f"{loop_time / batch_time:>9.1f}x {max_diff:>10.1e}{note}")
+
+
+def bench_kepler_range(max_M, samples, eccentricities, repeat=3):
+    """
+    Iteration counts, residuals and worst-case solve times of the hyperbolic Kepler solvers
+    for |M| from 1e-6 up to max_M, one decade at a time
+    """
+    print(f"[BENCH] Hyperbolic Kepler solver over |M| = 1e-6 .. {max_M:.0e}")
+    decades = np.arange(-6, int(np.ceil(np.log10(max_M))))
+    worst_batch = worst_scalar = 0.0
+    for e in eccentricities:
+        print(f"  e = {e}")
+        print(f"  {'|M|':>14} {'mean iter':>10} {'max iter':>9} {'batch (ns)':>11} "
+              f"{'scalar worst (µs)':>18} {'max residual':>13}")
+        steps = []
+        for decade in decades:
+            M = np.logspace(decade, min(decade + 1, np.log10(max_M)), int(samples))
+            batch_time = _best_of(lambda: solve_kepler_hyperbolic_batch(M, e), repeat) / M.size
+            H, _, iterations = solve_kepler_hyperbolic_batch(M, e, return_iterations=True)
+            residual = np.max(np.abs(e * np.sinh(H) - H - M) / np.maximum(M, 1))
+            # The scalar solver at the mean anomaly that needed the most steps
+            M_worst = M[np.argmax(iterations)]
+            scalar_time = _best_of(lambda: [solve_kepler_hyperbolic(M_worst, e) for _ in range(1000)],
+                                   repeat) / 1000
+            worst_batch, worst_scalar = max(worst_batch, batch_time), max(worst_scalar, scalar_time)
+            steps.append(iterations)
+            print(f"  {f'1e{decade}..1e{decade + 1}':>14} {iterations.mean():>10.2f} {iterations.max():>9d} "
+                  f"{batch_time * 1e9:>11.1f} {scalar_time * 1e6:>18.2f} {residual:>13.1e}")
+        counts = np.bincount(np.concatenate(steps))
+        print(f"  steps taken: {', '.join(f'{n}: {count:,d}' for n, count in enumerate(counts) if count)}")
+    print(f"  worst case: {worst_batch * 1e9:.1f} ns per element (batch), "
+          f"{worst_scalar * 1e6:.2f} µs per call (scalar)")
+
+
+def bench_frame(num_frames):
+    """Per-frame cost of animate() alone, with a full canvas draw, and in the interactive viewer"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from comet_3i_animation import CometAnimation
+
+    scene = CometAnimation()
+    scene.load_ephemeris()
+    scene.build_scene()
+    scene.init()
+    scene.fig.canvas.draw()
+
+    frames = np.linspace(0, scene.total_frames - 1, num_frames).astype(int)
+    animate_times = []
+    draw_times = []
+    for frame in frames:
+        start = time.perf_counter()
+        scene.animate(frame)
+        animate_times.append(time.perf_counter() - start)
+        scene.fig.canvas.draw()
+        draw_times.append(time.perf_counter() - start)
+
+    print(f"[BENCH] Frame update over {num_frames} frames (median / max, ms)")
+    print(f"  animate():        {np.median(animate_times) * 1e3:8.2f} / {np.max(animate_times) * 1e3:8.2f}")
+    print(f"  animate() + draw: {np.median(draw_times) * 1e3:8.2f} / {np.max(draw_times) * 1e3:8.2f}")
+
+    # Interactive viewer: consecutive frames, as during playback
+    from viewer import InteractiveViewer
+
+    viewer = InteractiveViewer(scene)
+    scene.fig.canvas.draw()
+    for follow_camera in (False, True):
+        viewer.follow_camera = follow_camera
+        viewer.seek(0)
+        update_times = []
+        for _ in range(num_frames):
+            start = time.perf_counter()
+            viewer._tick()
+            update_times.append(time.perf_counter() - start)
+        label = 'viewer, cinematic:' if follow_camera else 'viewer, blitted:'
+        print(f"  {label:<17} {np.median(update_times) * 1e3:8.2f} / {np.max(update_times) * 1e3:8.2f} "
+              f"({1 / np.mean(update_times):.1f} fps)")
+
+
+def bench_montecarlo(num_samples, num_epochs, block_elements):
+    """Throughput and peak memory of the chunked Monte Carlo uncertainty propagation"""
+    import tracemalloc
+
+    nominal = {'e': E_COMET, 'q': Q_COMET, 'i': 175.1130, 'Omega': 322.1559, 'omega': 128.0111}
+    days = np.linspace(-60, 60, num_epochs)
+
+    print(f"[BENCH] Monte Carlo uncertainty: {num_samples:,} samples x {num_epochs:,} epochs "
+          f"(blocks of {block_elements:,} sample-epochs)")
+    start = time.perf_counter()
+    _, covariance = propagate_covariance(nominal, days, num_samples, block_elements=block_elements, seed=0)
+    semi_axes, _ = principal_axes(covariance)
+    elapsed = time.perf_counter() - start
+
+    # Peak memory does not depend on the sample count (blocks are reused), so trace a
+    # short run: tracemalloc's allocation hooks would distort the timing above
+    tracemalloc.start()
+    propagate_covariance(nominal, days, min(num_samples, 10 * max(1, block_elements // num_epochs)),
+                         block_elements=block_elements, seed=0)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sample_epochs = num_samples * num_epochs
+    print(f"  wall time:   {elapsed:8.2f} s ({elapsed / sample_epochs * 1e9:.1f} ns per sample-epoch)")
+    print(f"  peak memory: {peak / 1024**2:8.2f} MB (the samples x epochs cloud would be "
+          f"{sample_epochs * 3 * 8 / 1024**3:.1f} GB)")
+    print(f"  3σ semi-axes at perihelion: "
+          f"{', '.join(f'{length * 149597870.7:,.0f}' for length in semi_axes[num_epochs // 2])} km")
+
+
+def _synthetic_catalog(num_objects, rng):
+    """
+    Struct-of-arrays catalog: the interstellar objects followed by random long-period
+    comets (elliptic, parabolic and hyperbolic) perihelion within a few years of 3I/ATLAS
+    """
+    known = np.array(list(INTERSTELLAR_OBJECTS.values()))[:num_objects]
+    count = num_objects - len(known)
+    e = rng.uniform(0.95, 1.05, count)
+    e[::10] = 1.0  # catalogs list many comets as exactly parabolic
+    random = np.column_stack([rng.uniform(0.1, 5.0, count), e, rng.uniform(0, 180, count),
+                              rng.uniform(0, 360, count), rng.uniform(0, 360, count),
+                              INTERSTELLAR_OBJECTS['3I/ATLAS'][5] + rng.uniform(-1500, 1500, count)])
+    catalog = np.concatenate([known, random])
+    return {name: catalog[:, k] for k, name in enumerate(('q', 'e', 'i', 'Omega', 'omega', 't_perihelion'))}
+
+
+def bench_objects(sizes, num_epochs, repeat=3):
+    """Scaling of propagate_orbits with catalog size: one call per object vs one call for all"""
+    rng = np.random.default_rng(0)
+    epochs = INTERSTELLAR_OBJECTS['3I/ATLAS'][5] + np.linspace(-180, 180, num_epochs)
+
+    print(f"[BENCH] Multi-object propagation over {num_epochs:,} epochs")
+    print(f"  {'objects':>10} {'per-object (s)':>15} {'batch (s)':>12} {'speedup':>10} "
+          f"{'Mpos/s':>8} {'max |dr| (AU)':>14}")
+
+    for size in sizes:
+        size = int(size)
+        catalog = _synthetic_catalog(size, rng)
+
+        batch_time = _best_of(lambda: propagate_orbits(epochs=epochs, **catalog), repeat)
+        batch = propagate_orbits(epochs=epochs, **catalog)
+
+        rows = [{name: values[k] for name, values in catalog.items()} for k in range(size)]
+        loop_time = _best_of(lambda: [propagate_orbits(epochs=epochs, **row) for row in rows], 1)
+        loop = np.concatenate([propagate_orbits(epochs=epochs, **row) for row in rows])
+
+        print(f"  {size:>10,d} {loop_time:>15.4f} {batch_time:>12.4f} {loop_time / batch_time:>9.1f}x "
+              f"{size * num_epochs / batch_time / 1e6:>8.1f} {np.max(np.abs(batch - loop)):>14.1e}")
+
+
+def bench_planets(num_frames):
+    """Speed and position error of the analytic Keplerian planet models vs astropy's builtin ephemeris"""
+    from comet_3i_animation import (AU_TO_KM, perihelion_date, planet_names_list, planet_orbital_params,
+                                    planet_secular_rates, planet_time_offsets)
+    from ephemeris import get_heliocentric_positions, get_keplerian_positions
+
+    days = np.linspace(-60, 60, num_frames)
+    print(f"[BENCH] Planet positions over the animation window ({num_frames:,} epochs, "
+          f"{perihelion_date:%Y-%m-%d} ± 60 days)")
+
+    start = time.perf_counter()
+    reference = get_heliocentric_positions(planet_names_list, perihelion_date, days, planet_time_offsets)
+    print(f"  astropy builtin (uncached, incl. import): {time.perf_counter() - start:8.3f} s")
+
+    for model, rates in (('kepler', None), ('kepler-secular', planet_secular_rates)):
+        elapsed = _best_of(lambda: get_keplerian_positions(planet_orbital_params, planet_names_list,
+                                                           perihelion_date, days, planet_time_offsets,
+                                                           rates=rates), 3)
+        positions = get_keplerian_positions(planet_orbital_params, planet_names_list, perihelion_date,
+                                            days, planet_time_offsets, rates=rates)
+        error = np.linalg.norm(positions - reference, axis=2)
+        distance = np.linalg.norm(reference, axis=2)
+
+        print(f"\n  {model}: {elapsed * 1e3:.2f} ms")
+        print(f"  {'planet':>10} {'max (M km)':>11} {'rms (M km)':>11} {'max angle':>10}")
+        for name, err, dist in zip(planet_names_list, error, distance):
+            # Angle subtended at the Sun, comparable to the error of a heliocentric longitude
+            angle = np.degrees(np.max(err / dist))
+            print(f"  {name:>10} {err.max() * AU_TO_KM / 1e6:>11.3f} "
+                  f"{np.sqrt(np.mean(err**2)) * AU_TO_KM / 1e6:>11.3f} {angle:>9.3f}°")
+
+
+def bench_nbody(years_before, years_after, model, eval_sizes):
+    """Perturbed integration cost, dense-output throughput and deviation from the two-body path"""
+    from comet_3i_animation import AU_TO_KM, COMET_ORBIT, elements_epoch_days, perturbed_comet_trajectory
+    from ephemeris import EphemerisCache
+    from perturbations import PerturbedTrajectory
+
+    t_start, t_end = -365.25 * years_before, 365.25 * years_after
+    print(f"[BENCH] Perturbed trajectory, {t_start:.0f} to {t_end:.0f} days from perihelion (planets: {model})")
+
+    cache = EphemerisCache() if model == 'astropy' else None
+    start = time.perf_counter()
+    perturbed = perturbed_comet_trajectory(t_start, t_end, model, cache)
+    elapsed = time.perf_counter() - start
+    print(f"  integration (incl. planet sampling): {elapsed:8.3f} s, {perturbed.steps} steps, "
+          f"{perturbed.evaluations:,} force evaluations")
+
+    for size in eval_sizes:
+        days = np.linspace(t_start, t_end, int(size))
+        eval_time = _best_of(lambda: perturbed(days), 3)
+        print(f"  dense output: {int(size):>10,d} epochs in {eval_time * 1e3:9.2f} ms "
+              f"({size / eval_time / 1e6:.2f} M epochs/s)")
+
+    # Two-body reference integrated from the same initial state, so the difference is
+    # the effect of the planets alone
+    position, velocity = COMET_ORBIT.state(elements_epoch_days)
+    two_body = PerturbedTrajectory(position, velocity, elements_epoch_days, perturbed.t_start, perturbed.t_end)
+
+    print(f"  {'days':>8} {'deviation from Kepler (km)':>28}")
+    checkpoints = np.unique(np.clip(np.array([t_start, -365.25, -60, elements_epoch_days, 0, 60,
+                                              365.25, 730.5, t_end]), t_start, t_end))
+    deviation = np.linalg.norm(perturbed.state(checkpoints)[:, :3] - two_body.state(checkpoints)[:, :3], axis=1)
+    for day, dev in zip(checkpoints, deviation):
+        print(f"  {day:>8.1f} {dev * AU_TO_KM:>28,.0f}")
+
+
+def bench_renderers(num_frames):
+    """Frames per second of the mplot3d scene and the NumPy projection renderer, side by side"""
+    import io
+
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from comet_3i_animation import CometAnimation
+    from projection_renderer import ProjectedCometAnimation
+
+    print(f"[BENCH] Renderers over {num_frames} frames (median ms per frame)")
+    print(f"  {'renderer':>10} {'animate()':>10} {'draw':>10} {'savefig PNG':>12} {'fps (draw)':>11}")
+
+    planet_positions = planet_orbits = None
+    results = {}
+    for scene_class in (CometAnimation, ProjectedCometAnimation):
+        scene = scene_class(planet_positions=planet_positions, planet_orbits=planet_orbits)
+        if planet_positions is None:
+            scene.load_ephemeris()
+            planet_positions, planet_orbits = scene.planet_positions, scene.planet_orbits
+        scene.build_scene()
+        scene.init()
+        scene.fig.canvas.draw()
+
+        frames = np.linspace(0, scene.total_frames - 1, num_frames).astype(int)
+        animate_times, draw_times, png_times = [], [], []
+        for frame in frames:
+            start = time.perf_counter()
+            scene.animate(frame)
+            animate_times.append(time.perf_counter() - start)
+            scene.fig.canvas.draw()
+            draw_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            scene.fig.savefig(io.BytesIO(), dpi=100, facecolor='#000000', edgecolor='none')
+            png_times.append(time.perf_counter() - start)
+        plt.close(scene.fig)
+
+        name = getattr(scene_class, 'renderer', 'mplot3d')
+        results[name] = np.median(draw_times)
+        print(f"  {name:>10} {np.median(animate_times) * 1e3:>10.2f} {np.median(draw_times) * 1e3:>10.2f} "
+              f"{np.median(png_times) * 1e3:>12.2f} {1 / np.median(draw_times):>11.1f}")
+    print(f"  speedup (animate + draw): {results['mplot3d'] / results['numpy']:.2f}x")
+
+
+def bench_tracing(num_spans):
+    """Cost of one instrumented span with tracing off and on, against an empty loop"""
+    from tracing import Tracer
+
+    def run(tracer):
+        start = time.perf_counter()
+        for _ in range(num_spans):
+            with tracer.span('stage'):
+                pass
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(num_spans):
+        pass
+    baseline = time.perf_counter() - start
+
+    print(f"[BENCH] Tracing overhead over {num_spans:,} spans (ns per span, empty loop subtracted)")
+    off = run(Tracer(enabled=False)) - baseline
+    on = run(Tracer(enabled=True)) - baseline
+    print(f"  tracing off: {off / num_spans * 1e9:8.0f} ns")
+    print(f"  tracing on:  {on / num_spans * 1e9:8.0f} ns")
+    # The pipeline opens about 6 spans per frame; a frame takes ~100 ms
+    print(f"  off, per frame of 6 spans: {6 * off / num_spans * 1e6:.2f} µs")
+
+
+def bench_trajectory(tol, sizes, repeat=3):
+    """Hermite trajectory interpolant: build cost, accuracy and throughput vs solving Kepler directly"""
+    from comet_3i_animation import AU_TO_KM, comet_trajectory, comet_trajectory_interpolant, time_window_days
+
+    t_start, t_end = time_window_days
+    print(f"[BENCH] Hermite trajectory interpolant, {t_start} to {t_end} days from perihelion, tol={tol:g} AU")
+
+    start = time.perf_counter()
+    trajectory = comet_trajectory_interpolant.__wrapped__(t_start, t_end, tol)
+    build_time = time.perf_counter() - start
+    spacing = np.diff(trajectory.nodes)
+    print(f"  build: {build_time * 1e3:8.2f} ms, {trajectory.nodes.size} nodes "
+          f"(spacing {spacing.min() * 24:.2f} h near perihelion to {spacing.max() * 24:.1f} h)")
+
+    # Accuracy at random epochs, not the check points used while refining
+    days = np.random.default_rng(0).uniform(t_start, t_end, 1_000_000)
+    error = np.linalg.norm(np.stack(trajectory(days)) - np.stack(comet_trajectory(days)), axis=0)
+    print(f"  max error at 1,000,000 random epochs: {error.max():.1e} AU ({error.max() * AU_TO_KM * 1e6:.3f} mm)")
+
+    print(f"  {'epochs':>12} {'kepler (s)':>12} {'hermite (s)':>12} {'speedup':>10} {'copy (s)':>10}")
+    for size in sizes:
+        days = np.linspace(t_start, t_end, int(size))
+        kepler_time = _best_of(lambda: comet_trajectory(days), repeat)
+        hermite_time = _best_of(lambda: trajectory(days), repeat)
+        # Memory-bandwidth floor: writing the three output arrays
+        output = np.empty((3, days.size))
+        copy_time = _best_of(lambda: np.copyto(output, days), repeat)
+        print(f"  {int(size):>12,d} {kepler_time:>12.4f} {hermite_time:>12.4f} "
+              f"{kepler_time / hermite_time:>9.1f}x {copy_time:>10.4f}")
+
+
+# Test kernel written by bench_spk when no --kernel is given: Chebyshev records fitted to
+# astropy's builtin model, laid out like a JPL DE kernel (planet barycenters, the Sun and the
+# Earth-Moon barycenter relative to the solar system barycenter, the Earth relative to that)
+TEST_KERNEL_BODIES = {1: 'mercury', 2: 'venus', 3: 'emb', 4: 'mars', 5: 'jupiter', 6: 'saturn', 10: 'sun',
+                      399: 'earth'}
+TEST_KERNEL_RECORD_DAYS = 16
+TEST_KERNEL_COEFFICIENTS = 14
+EARTH_MOON_MASS_RATIO = 81.30056
+
+
+def _write_spk(path, segments):
+    """
+    Write a little-endian DAF/SPK kernel of type 2 (Chebyshev position) segments
+    segments: list of (target, center, init_et, interval_s, coefficients) with the
+    coefficients of every record as a (records x 3 x coefficients) array in km
+    """
+    import struct
+
+    doubles_per_record = 128
+    data = []
+    summaries = []
+    address = 3 * doubles_per_record + 1  # after the file, summary and name records
+    for target, center, init, interval, coefficients in segments:
+        num_records, _, num_coefficients = coefficients.shape
+        mid = init + (np.arange(num_records) + 0.5) * interval
+        records = np.column_stack([mid, np.full(num_records, interval / 2), coefficients.reshape(num_records, -1)])
+        segment = np.concatenate([records.ravel(), [init, interval, records.shape[1], num_records]])
+        summaries.append(struct.pack('<2d6i', init, init + num_records * interval, target, center, 1, 2,
+                                     address, address + segment.size - 1))
+        data.append(segment)
+        address += segment.size
+
+    file_record = struct.pack('<8sii60siii8s', b'DAF/SPK ', 2, 6, b'benchmarks.py test kernel'.ljust(60), 2, 2,
+                              address, b'LTL-IEEE')
+    # FTP validation string at its standard offset, as written by SPICE
+    ftp = b'FTPSTR:\r:\n:\r\n:\r\x00:\x81:\x10\xce:ENDFTP'
+    file_record = file_record.ljust(699, b'\0') + ftp
+    summary_record = struct.pack('<3d', 0, 0, len(summaries)) + b''.join(summaries)
+    with open(path, 'wb') as f:
+        f.write(file_record.ljust(1024, b'\0'))
+        f.write(summary_record.ljust(1024, b'\0'))
+        f.write(b' ' * 1024)
+        f.write(np.concatenate(data).astype('<f8').tobytes())
+
+
+def _fit_test_kernel(path, et_start, et_end):
+    """Fit TEST_KERNEL_BODIES over [et_start, et_end] (TDB s past J2000) to astropy's builtin model"""
+    from astropy.coordinates import get_body_barycentric, solar_system_ephemeris
+    from astropy.time import Time
+    import astropy.units as u
+
+    from spk import J2000_JD, SECONDS_PER_DAY
+
+    interval = TEST_KERNEL_RECORD_DAYS * SECONDS_PER_DAY
+    num_records = int(np.ceil((et_end - et_start) / interval))
+    # Chebyshev nodes: interpolating there gives near-minimax coefficients
+    K = TEST_KERNEL_COEFFICIENTS
+    node_angles = np.pi * (np.arange(K) + 0.5) / K
+    mid = et_start + (np.arange(num_records) + 0.5) * interval
+    et = (mid[:, None] + np.cos(node_angles) * interval / 2).ravel()
+
+    solar_system_ephemeris.set('builtin')
+    epochs = Time(J2000_JD + et / SECONDS_PER_DAY, format='jd', scale='tdb')
+    km = {name: get_body_barycentric(name, epochs).xyz.to_value(u.km).T
+          for name in ('sun', 'mercury', 'venus', 'earth', 'moon', 'mars', 'jupiter', 'saturn')}
+    km['emb'] = km['earth'] + (km['moon'] - km['earth']) / (1 + EARTH_MOON_MASS_RATIO)
+    km['earth'] = km['earth'] - km['emb']
+
+    # c_k = 2/K sum_j f(s_j) T_k(s_j), with c_0 halved
+    T = np.cos(np.outer(np.arange(K), node_angles))
+    segments = []
+    for target, name in TEST_KERNEL_BODIES.items():
+        values = km[name].reshape(num_records, K, 3)
+        coefficients = np.einsum('rjc,kj->rck', values, T) * 2 / K
+        coefficients[..., 0] /= 2
+        segments.append((target, 3 if target == 399 else 0, et_start, interval, coefficients))
+    _write_spk(path, segments)
+
+
+def bench_spk(kernel_path, sizes, repeat=3):
+    """Memory-mapped SPK kernel reader vs astropy's builtin ephemeris for the planet-position path"""
+    from comet_3i_animation import AU_TO_KM, perihelion_date, planet_names_list
+    from ephemeris import get_heliocentric_positions, julian_date
+    from spk import SPKKernel, utc_jd_to_et
+
+    days_span = 365
+    temporary = None
+    if kernel_path is None:
+        temporary = tempfile.TemporaryDirectory()
+        kernel_path = os.path.join(temporary.name, 'builtin-fit.bsp')
+        et_center = utc_jd_to_et(julian_date(perihelion_date))
+        start = time.perf_counter()
+        _fit_test_kernel(kernel_path, et_center - (days_span + 30) * 86400, et_center + (days_span + 30) * 86400)
+        print(f"[BENCH] No --kernel given: wrote a test kernel fitted to the builtin model "
+              f"({TEST_KERNEL_COEFFICIENTS} coefficients per {TEST_KERNEL_RECORD_DAYS}-day record) "
+              f"in {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    kernel = SPKKernel(kernel_path)
+    open_time = time.perf_counter() - start
+    print(f"[BENCH] SPK kernel {os.path.basename(kernel_path)}: {os.path.getsize(kernel_path) / 1024**2:.1f} MB, "
+          f"{len(kernel.segments)} segments, opened in {open_time * 1e3:.2f} ms")
+    print(f"  {'epochs':>10} {'builtin (s)':>12} {'spk (s)':>10} {'speedup':>9} {'max |dr| (km)':>14}")
+
+    # Import astropy and load its tables outside the timings
+    get_heliocentric_positions(planet_names_list, perihelion_date, np.zeros(1))
+    for size in sizes:
+        days = np.linspace(-days_span, days_span, int(size))
+        builtin_time = _best_of(lambda: get_heliocentric_positions(planet_names_list, perihelion_date, days), 1)
+        builtin = get_heliocentric_positions(planet_names_list, perihelion_date, days)
+        spk_time = _best_of(lambda: get_heliocentric_positions(planet_names_list, perihelion_date, days,
+                                                               ephemeris=kernel_path), repeat)
+        from_kernel = get_heliocentric_positions(planet_names_list, perihelion_date, days, ephemeris=kernel_path)
+        difference = np.linalg.norm(from_kernel - builtin, axis=-1).max() * AU_TO_KM
+        print(f"  {int(size):>10,d} {builtin_time:>12.4f} {spk_time:>10.4f} {builtin_time / spk_time:>8.1f}x "
+              f"{difference:>14,.3f}")
+
+    if temporary is not None:
+        print("  (|dr| is the fit error of the test kernel; with a DE kernel it is the error of the builtin model)")
+        del kernel
+        temporary.cleanup()
+
+
+def bench_encode(num_frames, gop_frames, workers):
+    """Single-process MP4 encode of create_video.py vs the parallel segmented encode of the same frames"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from comet_3i_animation import CometAnimation
+    import create_video
+
+    ffmpeg_path = find_ffmpeg()
+    if ffmpeg_path is None:
+        print("[WARNING] ffmpeg not found, nothing to benchmark")
+        return
+
+    scene = CometAnimation(num_frames)
+    scene.load_ephemeris()
+    scene.build_scene()
+    scene.init()
+    scene.fig.canvas.draw()
+
+    with tempfile.TemporaryDirectory() as frames_dir:
+        for frame in range(num_frames):
+            scene.render_frame(frame, frames_dir)
+        single = os.path.join(frames_dir, 'single.mp4')
+        segmented = os.path.join(frames_dir, 'segmented.mp4')
+
+        start = time.perf_counter()
+        create_video.create_mp4_from_frames(frames_dir, single, ffmpeg_path, gop_frames=gop_frames)
+        single_time = time.perf_counter() - start
+        start = time.perf_counter()
+        create_video.create_mp4_segmented(frames_dir, segmented, ffmpeg_path, workers, gop_frames=gop_frames)
+        segmented_time = time.perf_counter() - start
+
+        print(f"[BENCH] MP4 encode of {num_frames} frames, GOP {gop_frames}, {os.cpu_count()} CPUs")
+        label = f'segmented, {workers or os.cpu_count()} encoders:'
+        print(f"  {'single process:':<24} {single_time:8.2f} s {os.path.getsize(single) / 1e6:8.2f} MB")
+        print(f"  {label:<24} {segmented_time:8.2f} s {os.path.getsize(segmented) / 1e6:8.2f} MB "
+              f"({single_time / segmented_time:.2f}x)")
+
+
+def bench_soak(num_frames, recycle_every, sample_frames, max_growth_mb, trace_python=False):
+    """
+    Render many frames in one process as the --long-run mode does, sampling the RSS (and the
+    Python heap with trace_python), and fail (return 1) if either grows by more than
+    max_growth_mb per 1000 frames once the figure rebuilds have warmed up
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    from comet_3i_animation import RECYCLE_WARMUP, CometAnimation
+    from memory_monitor import MB, MemoryMonitor
+
+    scene = CometAnimation()
+    scene.load_ephemeris()
+    scene.build_scene()
+    scene.init()
+    scene.fig.canvas.draw()
+
+    print(f"[BENCH] Memory soak: {num_frames} frames, figure recycled every {recycle_every or 'never'} frames")
+    monitor = MemoryMonitor(sample_frames, trace_python, warmup_frames=RECYCLE_WARMUP * recycle_every)
+    start = time.perf_counter()
+    for k in range(num_frames):
+        if recycle_every and k and k % recycle_every == 0:
+            scene.recycle()
+        # Rasterize into the canvas buffer, as when streaming to ffmpeg
+        scene.render_frame(k % scene.total_frames, save_png=False)
+        monitor.update(k + 1)
+    elapsed = time.perf_counter() - start
+    monitor.stop()
+
+    heap_growth, rss_growth = monitor.growth()
+    print(f"  {num_frames / elapsed:.1f} frames/sec (tracemalloc {'on' if trace_python else 'off'})")
+    failed = False
+    if heap_growth is None and rss_growth is None:
+        # Nothing to compare against the limit: a soak that measured nothing must not pass
+        print("  [ERROR] Neither the heap nor the RSS could be measured")
+        return 1
+    for name, growth in (('heap', heap_growth), ('RSS', rss_growth)):
+        if growth is None:
+            print(f"  {name}: not measured")
+            continue
+        drift = growth / MB > max_growth_mb
+        failed |= drift
+        print(f"  {name} growth: {growth / MB:+.3f} MB/1000 frames "
+              f"{'[DRIFT]' if drift else '(ok)'} (limit {max_growth_mb} MB)")
+    return 1 if failed else 0
+
+
+# Stages timed by the suite subcommand
+SUITE_STAGES = ('kepler', 'orbit', 'ephemeris', 'frame', 'encode')
+
+
+def _suite_cases(sizes, orbit_points, encode_frames, stages):
+    """
+    Yield (case name, size, function to time) for every stage of the pipeline
+    The scene is built lazily, so the math stages run without matplotlib
+    """
+    from comet_3i_animation import a, e, hyperbolic_orbit_3d, i, omega, Omega, perihelion_date
+    from ephemeris import get_planetary_orbit_from_ephemeris
+
+    for size in map(int, sizes):
+        M = N_COMET * np.linspace(-60, 60, size)
+        if 'kepler' in stages:
+            loop_size = min(size, MAX_LOOP_EPOCHS)
+            yield f'kepler scalar [{loop_size}]', loop_size, \
+                lambda M=M[:loop_size]: [solve_kepler_hyperbolic(m, E_COMET) for m in M]
+            yield f'kepler batch [{size}]', size, lambda M=M: solve_kepler_hyperbolic_batch(M, E_COMET)
+        if 'orbit' in stages:
+            # True anomalies within the asymptotes, as drawn for the trajectory
+            theta = np.linspace(-0.95, 0.95, size) * np.arccos(-1 / e)
+            yield f'hyperbolic_orbit_3d [{size}]', size, \
+                lambda theta=theta: hyperbolic_orbit_3d(a, e, i, Omega, omega, theta)
+
+    if 'ephemeris' in stages:
+        for points in map(int, orbit_points):
+            yield f'planet orbit [{points}]', points, \
+                lambda points=points: get_planetary_orbit_from_ephemeris('earth', perihelion_date, points)
+
+    if 'frame' not in stages and 'encode' not in stages:
+        return
+
+    import matplotlib
+    matplotlib.use('Agg')
+    from comet_3i_animation import CometAnimation
+    import create_video
+
+    scene = CometAnimation()
+    scene.load_ephemeris()
+    scene.build_scene()
+    scene.init()
+    scene.fig.canvas.draw()
+
+    with tempfile.TemporaryDirectory() as frames_dir:
+        if 'frame' in stages:
+            yield 'frame animate + savefig [1]', 1, lambda: scene.render_frame(scene.total_frames // 2, frames_dir)
+
+        ffmpeg_path = find_ffmpeg()
+        if 'encode' in stages and ffmpeg_path is None:
+            print("  [WARNING] ffmpeg not found, skipping the encode stage")
+        elif 'encode' in stages:
+            # Consecutive frames, as in the real video
+            video_dir = os.path.join(frames_dir, 'video')
+            os.makedirs(video_dir)
+            for frame in range(encode_frames):
+                scene.render_frame(frame, video_dir)
+            video = os.path.join(video_dir, 'video.mp4')
+            yield f'encode mp4 [{encode_frames}]', encode_frames, \
+                lambda: create_video.create_mp4_from_frames(video_dir, video, ffmpeg_path)
+
+
+def bench_suite(sizes, orbit_points, encode_frames, stages, repeat=3, output=None, baseline=None, threshold=0.2):
+    """
+    Time every pipeline stage at the given sizes, optionally saving the results as JSON
+    and comparing them with a previous run: cases slower than the baseline by more than
+    threshold (a fraction) are flagged and make the exit status 1
+    """
+    print(f"[BENCH] Pipeline suite, best of {repeat} (stages: {', '.join(stages)})")
+    print(f"  {'case':<32} {'size':>8} {'best (s)':>11} {'per item (µs)':>14}")
+    results = {}
+    for name, size, func in _suite_cases(sizes, orbit_points, encode_frames, stages):
+        # Encoding takes seconds and prints its own progress: once is enough
+        best = _best_of(func, 1 if name.startswith('encode') else repeat)
+        results[name] = {'size': size, 'seconds': best}
+        print(f"  {name:<32} {size:>8,d} {best:>11.5f} {best / size * 1e6:>14.3f}")
+
+    if output:
+        run = {'date': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+               'numpy': np.__version__, 'machine': platform.machine(), 'node': platform.node(),
+               'repeat': repeat, 'results': results}
+        with open(output, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"[SAVED] {output}")
+
+    if not baseline:
+        return 0
+    with open(baseline) as f:
+        previous = json.load(f)
+    print(f"[BENCH] Compared with {baseline} ({previous.get('date', 'unknown date')}), "
+          f"regression threshold {threshold:.0%}")
+    print(f"  {'case':<32} {'baseline (s)':>13} {'now (s)':>11} {'change':>9}")
+    regressions = 0
+    for name, result in results.items():
+        if name not in previous['results']:
+            continue
+        before = previous['results'][name]['seconds']
+        change = result['seconds'] / before - 1
+        flag = ''
+        if change > threshold:
+            flag = '  [REGRESSION]'
+            regressions += 1
+        print(f"  {name:<32} {before:>13.5f} {result['seconds']:>11.5f} {change:>+9.1%}{flag}")
+    if regressions:
+        print(f"[REGRESSION] {regressions} case(s) slower than the baseline by more than {threshold:.0%}")
+        return 1
+    print("[OK] No regressions")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    kepler = subparsers.add_parser('kepler', help='hyperbolic Kepler solver')
+    kepler.add_argument('--sizes', nargs='+', type=float, default=[1e3, 1e5, 1e7],
+                        help='number of epochs per run')
+    kepler.add_argument('--repeat', type=int, default=3)
+
+    kepler_range = subparsers.add_parser('kepler-range',
+                                         help='hyperbolic Kepler solver iterations and worst-case times over |M|')
+    kepler_range.add_argument('--max-m', type=float, default=1e6, help='largest mean anomaly |M| (radians)')
+    kepler_range.add_argument('--samples', type=float, default=1e5, help='mean anomalies per decade of |M|')
+    kepler_range.add_argument('--eccentricities', nargs='+', type=float,
+                              default=[INTERSTELLAR_OBJECTS[name][1] for name in INTERSTELLAR_OBJECTS])
+    kepler_range.add_argument('--repeat', type=int, default=3)
+
+    frame = subparsers.add_parser('frame', help='animate() and canvas draw for single frames')
+    frame.add_argument('--frames', type=int, default=50, help='number of frames to time')
+
+    montecarlo = subparsers.add_parser('montecarlo', help='Monte Carlo uncertainty propagation')
+    montecarlo.add_argument('--samples', type=float, default=1e6, help='number of Monte Carlo orbits')
+    montecarlo.add_argument('--epochs', type=int, default=1000, help='number of frame epochs')
+    montecarlo.add_argument('--block', type=int, default=20_000,
+                            help='sample-epochs propagated per vectorized block')
+
+    objects = subparsers.add_parser('objects', help='multi-object orbit propagation')
+    objects.add_argument('--sizes', nargs='+', type=float, default=[10, 100, 1000, 10000],
+                         help='number of objects per run')
+    objects.add_argument('--epochs', type=int, default=365)
+    objects.add_argument('--repeat', type=int, default=3)
+
+    planets = subparsers.add_parser('planets', help='analytic planet models vs the builtin ephemeris')
+    planets.add_argument('--frames', type=int, default=1000, help='number of frame epochs')
+
+    nbody = subparsers.add_parser('nbody', help='perturbed comet trajectory integration')
+    nbody.add_argument('--years-before', type=float, default=2, help='arc start, years before perihelion')
+    nbody.add_argument('--years-after', type=float, default=3, help='arc end, years after perihelion')
+    nbody.add_argument('--planets', choices=('astropy', 'kepler', 'kepler-secular'), default='kepler-secular')
+    nbody.add_argument('--eval-sizes', nargs='+', type=float, default=[1e3, 1e5, 1e6],
+                       help='numbers of epochs evaluated from the dense output')
+
+    trajectory = subparsers.add_parser('trajectory', help='Hermite trajectory interpolant vs direct Kepler solve')
+    trajectory.add_argument('--tol', type=float, default=1e-12, help='interpolant position error bound (AU)')
+    trajectory.add_argument('--sizes', nargs='+', type=float, default=[1e3, 1e5, 1e7],
+                            help='number of epochs per run')
+    trajectory.add_argument('--repeat', type=int, default=3)
+
+    renderers = subparsers.add_parser('renderers', help='mplot3d vs NumPy projection renderer frame rate')
+    renderers.add_argument('--frames', type=int, default=50, help='number of frames to time')
+
+    tracing = subparsers.add_parser('tracing', help='overhead of pipeline timing spans')
+    tracing.add_argument('--spans', type=float, default=1e6, help='number of spans to time')
+
+    spk = subparsers.add_parser('spk', help='memory-mapped SPK kernel reader vs the builtin ephemeris')
+    spk.add_argument('--kernel', help='local SPK kernel (.bsp), e.g. de440s.bsp (default: a test kernel '
+                                      'fitted to the builtin model)')
+    spk.add_argument('--sizes', nargs='+', type=float, default=[1e3, 1e4], help='number of epochs per run')
+    spk.add_argument('--repeat', type=int, default=3)
+
+    encode = subparsers.add_parser('encode', help='single-process vs segmented parallel MP4 encode')
+    encode.add_argument('--frames', type=int, default=120, help='number of frames rendered and encoded')
+    encode.add_argument('--gop', type=int, default=30,
+                        help='keyframe interval, and so segment granularity (create_video.py uses 250)')
+    encode.add_argument('--workers', type=int, help='parallel encoders (default: one per CPU)')
+
+    soak = subparsers.add_parser('soak', help='memory growth over a long render, fails on drift')
+    soak.add_argument('--frames', type=int, default=3000, help='number of frames to render')
+    soak.add_argument('--recycle-every', type=int, default=500,
+                      help='frames between figure rebuilds (0: never)')
+    soak.add_argument('--sample', type=int, default=250, help='frames between memory samples')
+    soak.add_argument('--max-growth', type=float, default=1.0,
+                      help='allowed heap and RSS growth in MB per 1000 frames')
+    soak.add_argument('--tracemalloc', action='store_true',
+                      help='also sample the Python heap (renders several times slower)')
+
+    suite = subparsers.add_parser('suite', help='timings of every pipeline stage, saved as JSON and compared')
+    suite.add_argument('--sizes', nargs='+', type=float, default=[1e3, 1e5],
+                       help='number of epochs for the Kepler solver and hyperbolic_orbit_3d')
+    suite.add_argument('--orbit-points', nargs='+', type=int, default=[300],
+                       help='points per ephemeris planet orbit')
+    suite.add_argument('--encode-frames', type=int, default=30, help='frames rendered and encoded to MP4')
+    suite.add_argument('--stages', nargs='+', choices=SUITE_STAGES, default=list(SUITE_STAGES))
+    suite.add_argument('--repeat', type=int, default=3)
+    suite.add_argument('--output', help='save the results to this JSON file')
+    suite.add_argument('--baseline', help='JSON results of an earlier run to compare with')
+    suite.add_argument('--threshold', type=float, default=0.2,
+                       help='slowdown (fraction) flagged as a regression')
+
+    args = parser.parse_args(argv)
+
+    if args.benchmark == 'kepler':
+        bench_kepler(args.sizes, args.repeat)
+    elif args.benchmark == 'kepler-range':
+        bench_kepler_range(args.max_m, args.samples, args.eccentricities, args.repeat)
+    elif args.benchmark == 'frame':
+        bench_frame(args.frames)
+    elif args.benchmark == 'montecarlo':
+        bench_montecarlo(int(args.samples), args.epochs, args.block)
+    elif args.benchmark == 'objects':
+        bench_objects(args.sizes, args.epochs, args.repeat)
+    elif args.benchmark == 'planets':
+        bench_planets(args.frames)
+    elif args.benchmark == 'nbody':
+        bench_nbody(args.years_before, args.years_after, args.planets, args.eval_sizes)
+    elif args.benchmark == 'trajectory':
+        bench_trajectory(args.tol, args.sizes, args.repeat)
+    elif args.benchmark == 'renderers':
+        bench_renderers(args.frames)
+    elif args.benchmark == 'tracing':
+        bench_tracing(int(args.spans))
+    elif args.benchmark == 'spk':
+        bench_spk(args.kernel, args.sizes, args.repeat)
+    elif args.benchmark == 'encode':
+        bench_encode(args.frames, args.gop, args.workers)
+    elif args.benchmark == 'soak':
+        return bench_soak(args.frames, args.recycle_every, args.sample, args.max_growth, args.tracemalloc)
+    elif args.benchmark == 'suite':
+        return bench_suite(args.sizes, args.orbit_points, args.encode_frames, args.stages, args.repeat,
+                           args.output, args.baseline, args.threshold)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
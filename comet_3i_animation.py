@@ -1,13 +1,35 @@
-import numpy as np
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-from matplotlib.animation import FuncAnimation
-import matplotlib.animation as animation
+#!/usr/bin/env python3
+"""
+Cinematic 3D animation of interstellar Comet 3I/ATLAS
+Importing this module has no side effects: matplotlib and astropy are only
+imported when a scene is built or ephemerides are evaluated. Run main() (or
+this file) to render the animation.
+"""
+
+import argparse
+import collections
+import functools
+import gc
+import glob
+import itertools
 import os
+import sys
+import time
 from datetime import datetime, timedelta
-from astropy.time import Time
-from astropy.coordinates import get_body_barycentric_posvel, solar_system_ephemeris
-import astropy.units as u
+
+import numpy as np
+
+from ephemeris import (EphemerisCache, get_heliocentric_positions, get_keplerian_orbit,
+                       get_keplerian_positions, get_planetary_orbits, orbit_sample_count)
+from frame_manifest import FrameManifest, hash_inputs
+from frame_queue import LEASE_SECONDS, POLL_SECONDS, UNIT_SIZE, FrameQueue
+from frame_stream import DEFAULT_RENDITIONS, RENDITIONS, FFmpegRenditionWriter, encode_png_sequence, find_ffmpeg
+from memory_monitor import SAMPLE_FRAMES, MemoryMonitor
+from orbit_mechanics import OrbitalElements, solve_kepler_hyperbolic, solve_kepler_hyperbolic_batch
+from perturbations import PerturbedTrajectory, PlanetTrack
+from tracing import FRAME_SPAN, TRACER
+from trajectory import HermiteTrajectory
+from uncertainty import principal_axes, propagate_covariance
 
 # Constants
 AU_TO_KM = 149597870.7  # 1 AU in kilometers
@@ -47,6 +69,9 @@ omega = 128.0111  # Argument of perihelion ± 0.0008°
 # Perihelion date
 perihelion_date = datetime(2025, 10, 29)
 
+# Osculation epoch of the elements (MJD 60885.672886722), in days from perihelion (T_p = MJD 60977.483)
+elements_epoch_days = 60885.672886722 - 60977.483
+
 # Semi-major axis (negative for hyperbolic orbit)
 a = q / (1 - e)
 
@@ -74,8 +99,31 @@ a = q / (1 - e)
 uncertainty_axes = [0.02, 0.01, 0.007]  # AU - along radial, tangential, normal directions
 # Equivalent to approximately [3, 1.5, 1] million km
 
+# Unit circle used to draw the uncertainty ellipses, computed once
+ELLIPSE_THETA = np.linspace(0, 2*np.pi, 100)
+ELLIPSE_COS = np.cos(ELLIPSE_THETA)
+ELLIPSE_SIN = np.sin(ELLIPSE_THETA)
+
+# Ellipsoid axes spanned by the red, green and blue ellipses (XY, XZ, YZ for the static ellipsoid)
+ELLIPSE_PLANES = ((0, 1), (0, 2), (1, 2))
+# Each ellipse label sits at the tip of axis j, nudged along axis k
+ELLIPSE_LABEL_ANCHORS = ((0, 2), (1, 0), (0, 1))
+
+# Monte Carlo uncertainty propagation (--uncertainty-samples), seeded so reruns match
+UNCERTAINTY_SEED = 0
+
+# Days from perihelion covered by the animation
+time_window_days = (-60, 60)
+# Position error bound (AU) of the interpolated comet path, ~15 cm
+TRAJECTORY_TOL = 1e-12
+
 # Animation parameters
 total_frames = 1000  # More frames for smoother animation
+# Frames between figure rebuilds in --long-run mode
+RECYCLE_FRAMES = 2000
+# Rebuilds after which memory is flat: matplotlib's caches keep entries of earlier figures until
+# they are evicted, so the first rebuilds still add to them
+RECYCLE_WARMUP = 2
 # Set to True for quick testing
 TEST_MODE = False
 if TEST_MODE:
@@ -86,127 +134,21 @@ if TEST_MODE:
 GM_sun = 4 * np.pi**2 / 365.25**2  # AU^3/day^2
 n = np.sqrt(GM_sun / abs(a)**3)  # rad/day
 
-def solve_kepler_hyperbolic(M, e, tol=1e-10, max_iter=100):
-    """
-    Solve Kepler's equation for hyperbolic orbits: M = e*sinh(H) - H
-    Returns hyperbolic eccentric anomaly H
-    """
-    # Initial guess
-    H = M / e if M > 0 else M * e
+@functools.lru_cache(maxsize=64)
+def orbital_elements(q, e, i, Omega, omega):
+    """OrbitalElements of (q, e, i, Omega, omega), built (and its rotation matrix computed) once per orbit"""
+    return OrbitalElements(q, e, i, Omega, omega)
 
-    for _ in range(max_iter):
-        f = e * np.sinh(H) - H - M
-        df = e * np.cosh(H) - 1
-
-        if abs(df) < tol:
-            break
-
-        H_new = H - f / df
-        if abs(H_new - H) < tol:
-            return H_new
-        H = H_new
-
-    return H
-
-# Time mapping (days from perihelion) - solve Kepler's equation for each time
-time_from_perihelion = np.linspace(-60, 60, total_frames)
-theta_range = []
-
-for t in time_from_perihelion:
-    # Mean anomaly M = n * (t - T_perihelion)
-    M = n * t
-
-    # Solve for hyperbolic eccentric anomaly H
-    H = solve_kepler_hyperbolic(M, e)
-
-    # True anomaly θ = 2 * arctan[sqrt((e-1)/(e+1)) * tanh(H/2)]
-    theta = 2 * np.arctan(np.sqrt((e - 1) / (e + 1)) * np.tanh(H / 2))
-    theta_range.append(theta)
-
-theta_range = np.array(theta_range)
+# The comet's orbit, with its rotation to ecliptic coordinates computed once
+COMET_ORBIT = orbital_elements(q, e, i, Omega, omega)
 
 def hyperbolic_orbit_3d(a, e, i, Omega, omega, theta):
     """
     Calculate 3D position in hyperbolic orbit using orbital elements
     Returns position in AU
     """
-    # Convert angles to radians
-    i_rad = np.radians(i)
-    Omega_rad = np.radians(Omega)
-    omega_rad = np.radians(omega)
-
-    # Distance from focus (for hyperbolic orbit where a < 0)
-    # Using the correct formula: r = a(1 - e²)/(1 + e*cos(θ))
-    r = a * (1 - e**2) / (1 + e * np.cos(theta))
-
-    # Position in orbital plane
-    x_orb = r * np.cos(theta)
-    y_orb = r * np.sin(theta)
-    z_orb = 0
-
-    # Rotation matrices for orbital orientation
-    # Rotate by argument of perihelion
-    x1 = x_orb * np.cos(omega_rad) - y_orb * np.sin(omega_rad)
-    y1 = x_orb * np.sin(omega_rad) + y_orb * np.cos(omega_rad)
-    z1 = z_orb
-
-    # Rotate by inclination
-    x2 = x1
-    y2 = y1 * np.cos(i_rad) - z1 * np.sin(i_rad)
-    z2 = y1 * np.sin(i_rad) + z1 * np.cos(i_rad)
-
-    # Rotate by longitude of ascending node
-    x = x2 * np.cos(Omega_rad) - y2 * np.sin(Omega_rad)
-    y = x2 * np.sin(Omega_rad) + y2 * np.cos(Omega_rad)
-    z = z2
-
-    return x, y, z
-
-def get_planetary_orbit_from_ephemeris(planet_name, center_date, num_points=300):
-    """
-    Calculate planetary orbit by sampling ephemeris data over one orbital period
-    Returns x, y, z arrays for the complete orbit in heliocentric coordinates
-    The orbit is centered around center_date to capture the planet's position accurately
-    """
-    solar_system_ephemeris.set('builtin')
-    
-    # Exact orbital periods in days (tropical year)
-    orbital_periods = {
-        'mercury': 87.969, 'venus': 224.701, 'earth': 365.256, 
-        'mars': 686.980, 'jupiter': 4332.59, 'saturn': 10759.22
-    }
-    
-    period_days = orbital_periods.get(planet_name, 365)
-    
-    # Sample positions throughout the orbit
-    # Center the orbit around the reference date (±0.5 period)
-    x_orbit = []
-    y_orbit = []
-    z_orbit = []
-    
-    for i in range(num_points):
-        # Calculate date for this point in the orbit
-        # Sample from -period/2 to +period/2 around center_date
-        fraction = i / (num_points - 1)  # 0 to 1
-        days_offset = (fraction - 0.5) * period_days
-        sample_date = center_date + timedelta(days=days_offset)
-        
-        try:
-            # Get planet position (barycentric)
-            planet_pos = get_body_barycentric_posvel(planet_name, Time(sample_date.strftime("%Y-%m-%d")))[0]
-            # Get Sun position (barycentric)
-            sun_pos = get_body_barycentric_posvel('sun', Time(sample_date.strftime("%Y-%m-%d")))[0]
-            
-            # Convert to heliocentric (planet position relative to Sun)
-            x_orbit.append(planet_pos.x.value - sun_pos.x.value)
-            y_orbit.append(planet_pos.y.value - sun_pos.y.value)
-            z_orbit.append(planet_pos.z.value - sun_pos.z.value)
-        except Exception as e:
-            # If ephemeris fails, skip this point
-            print(f"    Warning: Failed to get position for {planet_name} at {sample_date}: {e}")
-            continue
-    
-    return np.array(x_orbit), np.array(y_orbit), np.array(z_orbit)
+    position = orbital_elements(a * (1 - e), e, i, Omega, omega).position_at_true_anomaly(theta)
+    return position[..., 0], position[..., 1], position[..., 2]
 
 def create_uncertainty_ellipsoid(center, axes_lengths, num_points=50):
     """
@@ -222,11 +164,58 @@ def create_uncertainty_ellipsoid(center, axes_lengths, num_points=50):
 
     return x, y, z
 
+def comet_trajectory(days_from_perihelion):
+    """
+    Heliocentric comet positions (AU) for an array of days from perihelion
+    Solves Kepler's equation for all epochs at once
+    """
+    # Mean anomaly M = n * (t - T_perihelion)
+    _, theta = solve_kepler_hyperbolic_batch(n * np.asarray(days_from_perihelion, dtype=float), e)
+    position = COMET_ORBIT.position_at_true_anomaly(theta)
+    return position[..., 0], position[..., 1], position[..., 2]
+
+@functools.lru_cache(maxsize=None)
+def comet_trajectory_interpolant(t_start=time_window_days[0], t_end=time_window_days[1], tol=TRAJECTORY_TOL):
+    """
+    Two-body comet path over [t_start, t_end] days from perihelion as a HermiteTrajectory
+    Kepler's equation is solved once on adaptive nodes; call the result with any array of
+    days to get x, y, z (AU) within tol, whatever the frame count
+    """
+    return HermiteTrajectory(COMET_ORBIT.state, t_start, t_end, tol=tol)
+
+def perturbed_comet_trajectory(t_start, t_end, model='astropy', cache=None, ephemeris='builtin'):
+    """
+    Comet trajectory including planetary perturbations over [t_start, t_end] days from perihelion
+    Starts from the two-body state at the osculation epoch of the elements; planet positions come
+    from the same model as load_ephemeris ('astropy', 'kepler' or 'kepler-secular', and the
+    astropy ephemeris name or SPK kernel path)
+    Returns a PerturbedTrajectory: call it with days from perihelion to get x, y, z (AU)
+    """
+    if model == 'astropy':
+        def planet_positions(days):
+            return get_heliocentric_positions(planet_names_list, perihelion_date, days, ephemeris=ephemeris,
+                                              cache=cache)
+    else:
+        rates = planet_secular_rates if model == 'kepler-secular' else None
+
+        def planet_positions(days):
+            return get_keplerian_positions(planet_orbital_params, planet_names_list, perihelion_date, days,
+                                           rates=rates)
+
+    t0 = elements_epoch_days
+    t_start, t_end = min(t_start, t0), max(t_end, t0)
+    planet_track = PlanetTrack(planet_positions, t_start, t_end)
+    position, velocity = COMET_ORBIT.state(t0)
+    return PerturbedTrajectory(position, velocity, t0, t_start, t_end, planet_track, planet_names_list)
+
 def get_planetary_positions(date='2025-10-29'):
     """
     Get positions of planets at a given date
     Returns positions in AU relative to Sun
     """
+    from astropy.time import Time
+    from astropy.coordinates import get_body_barycentric_posvel, solar_system_ephemeris
+
     solar_system_ephemeris.set('builtin')
 
     planets_data = {}
@@ -253,34 +242,7 @@ def get_planetary_positions(date='2025-10-29'):
 
     return planets_data
 
-# Create figure and 3D axes with dark space background
-# Use dimensions divisible by 2 for video encoding
-fig = plt.figure(figsize=(14, 10), facecolor='#000000')
-ax = fig.add_subplot(111, projection='3d', facecolor='#000011')
-
-# Calculate comet trajectory
-x_traj, y_traj, z_traj = hyperbolic_orbit_3d(a, e, i, Omega, omega, theta_range)
-
-# Plot comet trajectory - make it very visible
-comet_traj, = ax.plot(x_traj, y_traj, z_traj, '-', color='cyan', linewidth=3.0, alpha=0.95,
-                     label='Comet Trajectory')
-
-# Uncertainty ellipsoid will be dynamically updated to follow the comet
-# Initial placeholder
-uncertainty_surf = []
-dimension_lines = []  # Initialize dimension lines list
-ellipse_labels = []  # Labels for each ellipse (XY, XZ, YZ)
-
-# Plot Sun (larger and more prominent) with label
-sun_glow = ax.scatter([0], [0], [0], color='yellow', s=500, alpha=0.4, edgecolors='orange', linewidths=2)
-ax.scatter([0], [0], [0], color='#FFDD00', s=200, alpha=1.0, edgecolors='orange', linewidths=3)
-sun_label = ax.text(0, 0, 0.15, 'Sun', color='white', fontsize=11, 
-                   ha='center', va='bottom', weight='bold',
-                   bbox=dict(boxstyle='round,pad=0.4', facecolor='#FFDD00', 
-                            alpha=0.8, edgecolor='orange', linewidth=1))
-
-# Plot planets with orbits and labels
-# Store planet data for animation
+# Planet data for the scene and animation
 planet_names_list = ['mercury', 'venus', 'earth', 'mars', 'jupiter', 'saturn']
 planet_colors = {'mercury': 'gray', 'venus': 'orange', 'earth': 'blue',
                 'mars': 'red', 'jupiter': 'brown', 'saturn': 'goldenrod'}
@@ -300,9 +262,27 @@ planet_orbital_params = {
     'saturn': {'a': 9.537, 'e': 0.054, 'i': 2.49, 'Omega': 113.66, 'omega': 339.39, 'L0': 50.08}
 }
 
-planet_plots = {}
-orbit_lines = {}
-planet_labels = {}
+# Points per orbit polyline, more for larger and more eccentric orbits (ephemeris.ORBIT_TOL)
+planet_orbit_points = {name: orbit_sample_count(params['a'], params['e'])
+                       for name, params in planet_orbital_params.items()}
+
+# Secular rates of the elements above, per Julian century (AU or degrees)
+# Source: Standish, "Keplerian Elements for Approximate Positions of the Major Planets" (JPL), 1800-2050 AD
+# The L0 rate is the mean motion; the omega rate is the longitude-of-perihelion rate minus the Omega rate
+planet_secular_rates = {
+    'mercury': {'a': 0.00000037, 'e': 0.00001906, 'i': -0.00594749, 'Omega': -0.12534081, 'omega': 0.28581770, 'L0': 149472.67411175},
+    'venus': {'a': 0.00000390, 'e': -0.00004107, 'i': -0.00078890, 'Omega': -0.27769418, 'omega': 0.28037747, 'L0': 58517.81538729},
+    'earth': {'a': 0.00000562, 'e': -0.00004392, 'i': -0.01294668, 'Omega': 0.0, 'omega': 0.32327364, 'L0': 35999.37244981},
+    'mars': {'a': 0.00001847, 'e': 0.00007882, 'i': -0.00813131, 'Omega': -0.29257343, 'omega': 0.73698431, 'L0': 19140.30268499},
+    'jupiter': {'a': -0.00011607, 'e': -0.00013253, 'i': -0.00183714, 'Omega': 0.20469106, 'omega': 0.00783562, 'L0': 3034.74612775},
+    'saturn': {'a': -0.00125060, 'e': -0.00050991, 'i': 0.00193609, 'Omega': -0.28867794, 'omega': -0.13029422, 'L0': 1222.49362201}
+}
+
+# Planet position models selectable per run (--planets)
+PLANET_MODELS = ('astropy', 'kepler', 'kepler-secular')
+
+# Scene renderers (--renderer): mplot3d, or projection_renderer.ProjectedCometAnimation
+RENDERERS = ('mplot3d', 'numpy')
 
 # Offsets temporales para cada planeta (en DÍAS)
 # Avanza (+) o retrocede (-) cada planeta en su órbita
@@ -325,105 +305,10 @@ planet_time_offsets = {
     'saturn': 0
 }
 
-# Draw REAL orbits for each planet using ephemeris data
-print("\n[ORBITS] Calculating planetary orbits from ephemeris...")
-for planet_name in planet_names_list:
-    color = planet_colors[planet_name]
-    
-    # Calculate orbit from real ephemeris data (heliocentric)
-    print(f"  Computing orbit for {planet_name.capitalize()}...")
-    x_orbit, y_orbit, z_orbit = get_planetary_orbit_from_ephemeris(planet_name, perihelion_date, num_points=300)
-    
-    # NO rotar órbitas - solo rotar los planetas individuales en animate()
-    
-    # Different line styles based on distance
-    if planet_name in ['mercury', 'venus', 'earth', 'mars']:
-        orbit_line, = ax.plot(x_orbit, y_orbit, z_orbit, '--', color=color, 
-                             alpha=0.4, linewidth=1.2, label=f'{planet_name.capitalize()} orbit')
-    else:
-        orbit_line, = ax.plot(x_orbit, y_orbit, z_orbit, ':', color=color, 
-                             alpha=0.3, linewidth=1.0, label=f'{planet_name.capitalize()} orbit')
-    orbit_lines[planet_name] = orbit_line
-    
-    # Create planet marker (will be updated in animate())
-    size = planet_sizes[planet_name]
-    plot = ax.scatter([], [], [],
-                     color=color, s=size, alpha=1.0, edgecolors='white', linewidths=2)
-    planet_plots[planet_name] = plot
-    
-    # Add planet label (will be updated in animate())
-    label = ax.text(0, 0, 0, planet_name.capitalize(), color='white', fontsize=9, 
-                   ha='center', va='bottom', weight='bold',
-                   bbox=dict(boxstyle='round,pad=0.3', facecolor=color, 
-                            alpha=0.7, edgecolor='white', linewidth=0.5))
-    planet_labels[planet_name] = label
-
-print("[SUCCESS] All planetary orbits calculated!")
-
-# Comet position marker - small point
-comet_point, = ax.plot([], [], [], 'o', markersize=4, markeredgecolor='white',
-                      markeredgewidth=1, markerfacecolor='#FF6600', alpha=1.0)
-
-# Comet label (will be dynamically updated to follow comet)
-comet_label = ax.text(0, 0, 0, '', color='white', fontsize=10, 
-                     ha='center', va='bottom', weight='bold',
-                     bbox=dict(boxstyle='round,pad=0.4', facecolor='#FF6600', 
-                              alpha=0.85, edgecolor='white', linewidth=1.5))
-
-# Comet tail (will be dynamically updated)
-comet_tail, = ax.plot([], [], [], '-', color='#00FFFF', linewidth=2.5, alpha=0.7)
-
-# Title text (date and phase)
-title_text = ax.text2D(0.5, 0.98, '', transform=ax.transAxes, fontsize=16,
-                      weight='bold', ha='center', va='top',
-                      color='white',
-                      bbox=dict(boxstyle='round,pad=0.8', facecolor='#000000', 
-                               alpha=0.85, edgecolor='#00FFFF', linewidth=2))
-
-# Information panel (bottom left) - horizontal layout
-info_text = ax.text2D(0.02, 0.02, '', transform=ax.transAxes, fontsize=9,
-                    verticalalignment='bottom', ha='left',
-                    color='white', family='monospace',
-                    bbox=dict(boxstyle='round,pad=0.5', facecolor='#000000', 
-                             alpha=0.92, edgecolor='#00FF00', linewidth=2))
-
-# Legend panel (top right) - horizontal layout
-legend_text = ax.text2D(0.98, 0.85, '', transform=ax.transAxes, fontsize=8,
-                       verticalalignment='top', ha='right',
-                       color='white',
-                       bbox=dict(boxstyle='round,pad=0.5', facecolor='#000000',
-                                alpha=0.92, edgecolor='#FFAA00', linewidth=2))
-
-# Set initial view limits (will be dynamically adjusted)
-ax.set_xlim(-3, 3)
-ax.set_ylim(-3, 3)
-ax.set_zlim(-3, 3)
-
-# Style axes - labels in millions of km
-ax.set_xlabel('X (million km)', fontsize=12, color='white', weight='bold')
-ax.set_ylabel('Y (million km)', fontsize=12, color='white', weight='bold')
-ax.set_zlabel('Z (million km)', fontsize=12, color='white', weight='bold')
-ax.tick_params(colors='white', labelsize=9)
-
 # Custom tick formatter to show million km
 def format_ticks_million_km(val, pos):
     return f'{val * AU_TO_KM / 1e6:.0f}'
 
-from matplotlib.ticker import FuncFormatter
-ax.xaxis.set_major_formatter(FuncFormatter(format_ticks_million_km))
-ax.yaxis.set_major_formatter(FuncFormatter(format_ticks_million_km))
-ax.zaxis.set_major_formatter(FuncFormatter(format_ticks_million_km))
-
-# Make axes invisible for cinematic look
-ax.xaxis.pane.fill = False
-ax.yaxis.pane.fill = False
-ax.zaxis.pane.fill = False
-ax.xaxis.pane.set_edgecolor('none')
-ax.yaxis.pane.set_edgecolor('none')
-ax.zaxis.pane.set_edgecolor('none')
-ax.grid(False)  # No grid for cinematic view
-ax.set_axis_off()  # Hide axes completely
-
 def get_camera_path(frame, total_frames, comet_pos):
     """
     Ultra-close camera starting at 0.1 AU, smooth gradual zoom to 1.2 AU
@@ -453,322 +338,1029 @@ def get_camera_path(frame, total_frames, comet_pos):
 
     return elev, azim, zoom, comet_pos
 
-def init():
-    global uncertainty_surf, dimension_lines, ellipse_labels
-    uncertainty_surf = []
-    dimension_lines = []
-    ellipse_labels = []
-
-    comet_point.set_data([], [])
-    comet_point.set_3d_properties([])
-    comet_tail.set_data([], [])
-    comet_tail.set_3d_properties([])
-    info_text.set_text('')
-    title_text.set_text('')
-    legend_text.set_text('')
-    return comet_point, comet_tail, info_text, title_text, legend_text, uncertainty_surf, dimension_lines, ellipse_labels
-
-def animate(frame):
-    global uncertainty_surf, dimension_lines, ellipse_labels
-
-    # Comet position along trajectory
-    idx = frame % total_frames
-    x_pos = x_traj[idx]
-    y_pos = y_traj[idx]
-    z_pos = z_traj[idx]
-
-    comet_point.set_data([x_pos], [y_pos])
-    comet_point.set_3d_properties([z_pos])
-    
-    # Update comet label to follow comet position
-    comet_label.set_position((x_pos, y_pos))
-    comet_label.set_3d_properties(z_pos + 0.15, 'z')  # Slightly above comet
-    comet_label.set_text('3I/ATLAS')
-    
-    # Calculate current date for planet positions
-    days_offset = time_from_perihelion[idx]
-    current_date = perihelion_date + timedelta(days=days_offset)
-    date_str_for_ephemeris = current_date.strftime("%Y-%m-%d")
-    
-    # Update planet positions for current date using real ephemeris (heliocentric)
-    solar_system_ephemeris.set('builtin')
-    try:
-        # Get Sun position (barycentric) to convert to heliocentric coordinates
-        sun_pos = get_body_barycentric_posvel('sun', Time(date_str_for_ephemeris))[0]
-        sun_x = sun_pos.x.value
-        sun_y = sun_pos.y.value
-        sun_z = sun_pos.z.value
-    except:
-        # If Sun position fails, assume it's at origin
-        sun_x, sun_y, sun_z = 0, 0, 0
-    
-    # Usar offsets temporales definidos globalmente (arriba, cerca de línea 285)
-    # No redefinir aquí - usar el diccionario global planet_time_offsets
-    
-    for planet_name in planet_names_list:
-        try:
-            # Calcular fecha ajustada para este planeta
-            adjusted_date = current_date + timedelta(days=planet_time_offsets[planet_name])
-            adjusted_date_str = adjusted_date.strftime("%Y-%m-%d")
-            
-            # Get Sun position for adjusted date
-            try:
-                sun_pos_adj = get_body_barycentric_posvel('sun', Time(adjusted_date_str))[0]
-                sun_x_adj = sun_pos_adj.x.value
-                sun_y_adj = sun_pos_adj.y.value
-                sun_z_adj = sun_pos_adj.z.value
-            except:
-                sun_x_adj, sun_y_adj, sun_z_adj = sun_x, sun_y, sun_z
-            
-            # Get planet position from ephemeris at adjusted date
-            pos = get_body_barycentric_posvel(planet_name, Time(adjusted_date_str))[0]
-            # Convert to heliocentric (relative to Sun)
-            planet_x = pos.x.value - sun_x_adj
-            planet_y = pos.y.value - sun_y_adj
-            planet_z = pos.z.value - sun_z_adj
-            
-            # Update planet scatter plot
-            planet_plots[planet_name]._offsets3d = ([planet_x], [planet_y], [planet_z])
-            
-            # Update planet label
-            planet_labels[planet_name].set_position((planet_x, planet_y))
-            planet_labels[planet_name].set_3d_properties(planet_z + 0.15, 'z')
-        except Exception as e:
-            # If ephemeris fails for this planet, skip it
-            print(f"Warning: Could not update position for {planet_name}: {e}")
-            pass
-
-    # Update uncertainty ellipsoid to follow comet
-    if uncertainty_surf:
-        for ellipse in uncertainty_surf:
-            ellipse.remove()
-
-    # Remove previous dimension lines to avoid trail
-    if dimension_lines:
-        for line in dimension_lines:
-            line.remove()
-    dimension_lines = []
-    
-    # Remove previous ellipse labels
-    if ellipse_labels:
-        for label in ellipse_labels:
-            label.remove()
-    ellipse_labels = []
-
-    comet_pos_center = (x_pos, y_pos, z_pos)
-
-    # Draw 3 principal ellipses instead of full ellipsoid surface
-    uncertainty_surf = []  # Will hold the ellipse lines
-
-    # Number of points for ellipse drawing
-    num_points = 100
-    theta = np.linspace(0, 2*np.pi, num_points)
-
-    # Ellipse in XY plane (z = constant) - RED
-    x_xy = x_pos + uncertainty_axes[0] * np.cos(theta)
-    y_xy = y_pos + uncertainty_axes[1] * np.sin(theta)
-    z_xy = np.full_like(theta, z_pos)
-    xy_ellipse, = ax.plot(x_xy, y_xy, z_xy, '-', color='#FF3333', linewidth=2.5, alpha=0.7)
-    uncertainty_surf.append(xy_ellipse)
-    
-    # Label for XY ellipse - small and fixed size, closer to ellipsoid
-    xy_label = ax.text(x_pos + uncertainty_axes[0], y_pos, z_pos + 0.05, 'XY',
-                      color='#FF3333', fontsize=6, weight='bold', ha='center', va='bottom')
-    ellipse_labels.append(xy_label)
-
-    # Ellipse in XZ plane (y = constant) - GREEN (offset slightly to avoid overlap)
-    x_xz = x_pos + uncertainty_axes[0] * np.cos(theta)
-    y_xz = np.full_like(theta, y_pos)
-    z_xz = z_pos + uncertainty_axes[2] * np.sin(theta)
-    xz_ellipse, = ax.plot(x_xz, y_xz, z_xz, '-', color='#33FF33', linewidth=2.5, alpha=0.7)
-    uncertainty_surf.append(xz_ellipse)
-    
-    # Label for XZ ellipse - moved to YZ position for better visibility
-    xz_label = ax.text(x_pos + 0.05, y_pos + uncertainty_axes[1], z_pos, 'XZ',
-                      color='#33FF33', fontsize=6, weight='bold', ha='center', va='bottom')
-    ellipse_labels.append(xz_label)
-
-    # Ellipse in YZ plane (x = constant) - BLUE
-    x_yz = np.full_like(theta, x_pos)
-    y_yz = y_pos + uncertainty_axes[1] * np.cos(theta)
-    z_yz = z_pos + uncertainty_axes[2] * np.sin(theta)
-    yz_ellipse, = ax.plot(x_yz, y_yz, z_yz, '-', color='#3333FF', linewidth=2.5, alpha=0.7)
-    uncertainty_surf.append(yz_ellipse)
-    
-    # Label for YZ ellipse - moved to original XZ position
-    yz_label = ax.text(x_pos + uncertainty_axes[0], y_pos + 0.05, z_pos, 'YZ',
-                      color='#3333FF', fontsize=6, weight='bold', ha='center', va='bottom')
-    ellipse_labels.append(yz_label)
-
-    # Draw ellipsoid dimension lines (axis lines) - more visible
-    dimension_lines = []
-    line1 = ax.plot([x_pos - uncertainty_axes[0], x_pos + uncertainty_axes[0]],
-                   [y_pos, y_pos], [z_pos, z_pos], '-', color='#FF3333', linewidth=1.5, alpha=0.5)
-    dimension_lines.extend(line1)
-
-    line2 = ax.plot([x_pos, x_pos],
-                   [y_pos - uncertainty_axes[1], y_pos + uncertainty_axes[1]],
-                   [z_pos, z_pos], '-', color='#33FF33', linewidth=1.5, alpha=0.5)
-    dimension_lines.extend(line2)
-
-    line3 = ax.plot([x_pos, x_pos], [y_pos, y_pos],
-                   [z_pos - uncertainty_axes[2], z_pos + uncertainty_axes[2]],
-                   '-', color='#3333FF', linewidth=1.5, alpha=0.5)
-    dimension_lines.extend(line3)
-    
-    # Add comet tail effect (last 20 positions)
-    tail_length = min(20, idx)
-    if tail_length > 0:
+class CometAnimation:
+    """
+    One renderable animation: comet trajectory, planet ephemeris, and the
+    figure with its artists. Each process (main or render worker) owns its own.
+    """
+
+    def __init__(self, num_frames=total_frames, planet_positions=None, planet_orbits=None,
+                 uncertainty=None, trajectory=None, velocities=None):
+        self.total_frames = num_frames
+        # Time mapping (days from perihelion) for every frame
+        self.time_from_perihelion = np.linspace(*time_window_days, num_frames)
+        # Two-body Kepler path unless a (x, y, z) trajectory is given, e.g. from integrate_trajectory(),
+        # and heliocentric comet velocity (AU/day) at every frame, both from one interpolant evaluation
+        if trajectory is None or velocities is None:
+            positions, two_body_velocities = comet_trajectory_interpolant().state(self.time_from_perihelion)
+            if trajectory is None:
+                trajectory = tuple(positions.T)
+            if velocities is None:
+                velocities = two_body_velocities
+        self.x_traj, self.y_traj, self.z_traj = trajectory
+        self.velocities = velocities
+
+        # Heliocentric planet positions for every frame, filled by load_ephemeris()
+        # planet_positions[k, frame] is the (x, y, z) of planet_names_list[k] in AU
+        self.planet_positions = planet_positions
+        # Heliocentric orbit polylines {planet: (x, y, z)}, filled by load_ephemeris()
+        self.planet_orbits = planet_orbits or {}
+        # Per-frame 3σ ellipsoid {'samples', 'semi_axes', 'axes'} from compute_uncertainty();
+        # None draws the static uncertainty_axes estimate
+        self.uncertainty = uncertainty
+
+        # Figure and artists, created by build_scene()
+        self.fig = None
+        self.ax = None
+        self.uncertainty_surf = []
+        self.dimension_lines = []
+        self.ellipse_labels = []
+        # Rasterization end time inside savefig, from draw_event while tracing
+        self._draw_timed = False
+        self._drawn_ns = 0
+
+    def load_ephemeris(self, cache_dir='.cache/ephemeris', model='astropy', ephemeris='builtin'):
+        """
+        Evaluate the planet positions for every frame epoch and the orbit polylines
+        model: 'astropy' (builtin ephemeris, cached on disk when parameters are unchanged),
+        or 'kepler' / 'kepler-secular' for the analytic planet_orbital_params model
+        (without / with planet_secular_rates), which needs no astropy and takes milliseconds
+        ephemeris: for the 'astropy' model, 'builtin' or the path of a local JPL SPK kernel
+        (e.g. de440s.bsp), read memory-mapped without astropy
+        """
+        if model != 'astropy':
+            rates = planet_secular_rates if model == 'kepler-secular' else None
+            print(f"\n[EPHEMERIS] Computing planet positions from Keplerian elements ({model})...")
+            self.planet_positions = get_keplerian_positions(planet_orbital_params, planet_names_list,
+                                                            perihelion_date, self.time_from_perihelion,
+                                                            planet_time_offsets, rates=rates)
+            self.planet_orbits = {name: get_keplerian_orbit(planet_orbital_params, name, perihelion_date,
+                                                            num_points=planet_orbit_points[name],
+                                                            rates=rates)
+                                  for name in planet_names_list}
+            print("[SUCCESS] All planetary orbits calculated!")
+            return
+
+        # On-disk cache of ephemeris results, reused across runs with unchanged parameters
+        ephemeris_cache = EphemerisCache(cache_dir)
+
+        print("\n[EPHEMERIS] Computing planet positions for all frames...")
+        self.planet_positions = get_heliocentric_positions(planet_names_list, perihelion_date,
+                                                           self.time_from_perihelion, planet_time_offsets,
+                                                           ephemeris=ephemeris, cache=ephemeris_cache)
+
+        # REAL orbits for each planet using ephemeris data
+        print("\n[ORBITS] Calculating planetary orbits from ephemeris...")
+        print(f"  {', '.join(f'{name.capitalize()} ({planet_orbit_points[name]})' for name in planet_names_list)} "
+              f"points")
+        self.planet_orbits = get_planetary_orbits(planet_names_list, perihelion_date, planet_orbit_points,
+                                                  cache=ephemeris_cache, ephemeris=ephemeris)
+
+        print("[SUCCESS] All planetary orbits calculated!")
+        cache_stats = ephemeris_cache.stats()
+        print(f"[CACHE] Ephemeris cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+
+    def integrate_trajectory(self, model='astropy', cache_dir='.cache/ephemeris', ephemeris='builtin'):
+        """Replace the Kepler path with one integrated under planetary perturbations"""
+        print(f"\n[N-BODY] Integrating perturbed comet trajectory (planets: {model})...")
+        cache = EphemerisCache(cache_dir) if model == 'astropy' else None
+        trajectory = perturbed_comet_trajectory(self.time_from_perihelion[0], self.time_from_perihelion[-1],
+                                                model, cache, ephemeris)
+        kepler = np.column_stack([self.x_traj, self.y_traj, self.z_traj])
+        states = trajectory.state(self.time_from_perihelion)
+        self.x_traj, self.y_traj, self.z_traj = states[:, :3].T
+        self.velocities = states[:, 3:]
+        deviation = np.linalg.norm(np.column_stack([self.x_traj, self.y_traj, self.z_traj]) - kepler, axis=1)
+        print(f"[SUCCESS] {trajectory.steps} steps; max deviation from the Kepler path: "
+              f"{deviation.max() * AU_TO_KM:,.0f} km")
+
+    def compute_uncertainty(self, num_samples=100_000, seed=UNCERTAINTY_SEED):
+        """
+        Propagate num_samples Monte Carlo orbits drawn from the 1-sigma orbital elements
+        and use their per-frame 3σ principal-axis ellipsoid instead of uncertainty_axes
+        """
+        print(f"\n[UNCERTAINTY] Propagating {num_samples:,} Monte Carlo orbits over {self.total_frames} frames...")
+        nominal = {'e': e, 'q': q, 'i': i, 'Omega': Omega, 'omega': omega}
+        _, covariance = propagate_covariance(nominal, self.time_from_perihelion, num_samples, seed=seed)
+        semi_axes, axes = principal_axes(covariance, n_sigma=3)
+        self.uncertainty = {'samples': num_samples, 'semi_axes': semi_axes, 'axes': axes}
+        print(f"[SUCCESS] 3σ semi-axes at perihelion: "
+              f"{', '.join(f'{length * AU_TO_KM:,.0f}' for length in semi_axes[self.total_frames // 2])} km")
+
+    def build_scene(self):
+        """
+        Create the figure, axes and every artist used by init()/animate()
+        Called once per process (the main process and each parallel render worker), and again by recycle()
+        """
+        import matplotlib.pyplot as plt
+        from matplotlib.ticker import FuncFormatter
+
+        # Create figure and 3D axes with dark space background
+        # Use dimensions divisible by 2 for video encoding
+        self.fig = plt.figure(figsize=(14, 10), dpi=100, facecolor='#000000')
+        self.ax = self.fig.add_subplot(111, projection='3d', facecolor='#000011')
+
+        # Plot comet trajectory - make it very visible
+        self.comet_traj, = self.ax.plot(self.x_traj, self.y_traj, self.z_traj, '-', color='cyan', linewidth=3.0, alpha=0.95,
+                             label='Comet Trajectory')
+
+        # Uncertainty ellipsoid will be dynamically updated to follow the comet
+        # Initial placeholder
+        self.uncertainty_surf = []
+        self.dimension_lines = []  # Initialize dimension lines list
+        self.ellipse_labels = []  # Labels for each ellipse (XY, XZ, YZ)
+
+        # Plot Sun (larger and more prominent) with label
+        self.sun_glow = self.ax.scatter([0], [0], [0], color='yellow', s=500, alpha=0.4, edgecolors='orange', linewidths=2)
+        self.ax.scatter([0], [0], [0], color='#FFDD00', s=200, alpha=1.0, edgecolors='orange', linewidths=3)
+        self.sun_label = self.ax.text(0, 0, 0.15, 'Sun', color='white', fontsize=11, 
+                           ha='center', va='bottom', weight='bold',
+                           bbox=dict(boxstyle='round,pad=0.4', facecolor='#FFDD00', 
+                                    alpha=0.8, edgecolor='orange', linewidth=1))
+
+        # Plot planets with orbits and labels
+        self.planet_plots = {}
+        self.orbit_lines = {}
+        self.planet_labels = {}
+
+        for planet_name in planet_names_list:
+            color = planet_colors[planet_name]
+            x_orbit, y_orbit, z_orbit = self.planet_orbits[planet_name]
+
+            # NO rotar órbitas - solo rotar los planetas individuales en animate()
+
+            # Different line styles based on distance
+            if planet_name in ['mercury', 'venus', 'earth', 'mars']:
+                orbit_line, = self.ax.plot(x_orbit, y_orbit, z_orbit, '--', color=color, 
+                                     alpha=0.4, linewidth=1.2, label=f'{planet_name.capitalize()} orbit')
+            else:
+                orbit_line, = self.ax.plot(x_orbit, y_orbit, z_orbit, ':', color=color, 
+                                     alpha=0.3, linewidth=1.0, label=f'{planet_name.capitalize()} orbit')
+            self.orbit_lines[planet_name] = orbit_line
+
+            # Create planet marker (will be updated in animate())
+            size = planet_sizes[planet_name]
+            plot = self.ax.scatter([], [], [],
+                             color=color, s=size, alpha=1.0, edgecolors='white', linewidths=2)
+            self.planet_plots[planet_name] = plot
+
+            # Add planet label (will be updated in animate())
+            label = self.ax.text(0, 0, 0, planet_name.capitalize(), color='white', fontsize=9, 
+                           ha='center', va='bottom', weight='bold',
+                           bbox=dict(boxstyle='round,pad=0.3', facecolor=color, 
+                                    alpha=0.7, edgecolor='white', linewidth=0.5))
+            self.planet_labels[planet_name] = label
+
+        # Comet position marker - small point
+        self.comet_point, = self.ax.plot([], [], [], 'o', markersize=4, markeredgecolor='white',
+                              markeredgewidth=1, markerfacecolor='#FF6600', alpha=1.0)
+
+        # Comet label (will be dynamically updated to follow comet)
+        self.comet_label = self.ax.text(0, 0, 0, '', color='white', fontsize=10, 
+                             ha='center', va='bottom', weight='bold',
+                             bbox=dict(boxstyle='round,pad=0.4', facecolor='#FF6600', 
+                                      alpha=0.85, edgecolor='white', linewidth=1.5))
+
+        # Comet tail (will be dynamically updated)
+        self.comet_tail, = self.ax.plot([], [], [], '-', color='#00FFFF', linewidth=2.5, alpha=0.7)
+
+        # Title text (date and phase)
+        self.title_text = self.ax.text2D(0.5, 0.98, '', transform=self.ax.transAxes, fontsize=16,
+                              weight='bold', ha='center', va='top',
+                              color='white',
+                              bbox=dict(boxstyle='round,pad=0.8', facecolor='#000000', 
+                                       alpha=0.85, edgecolor='#00FFFF', linewidth=2))
+
+        # Information panel (bottom left) - horizontal layout
+        self.info_text = self.ax.text2D(0.02, 0.02, '', transform=self.ax.transAxes, fontsize=9,
+                            verticalalignment='bottom', ha='left',
+                            color='white', family='monospace',
+                            bbox=dict(boxstyle='round,pad=0.5', facecolor='#000000', 
+                                     alpha=0.92, edgecolor='#00FF00', linewidth=2))
+
+        # Legend panel (top right) - horizontal layout
+        self.legend_text = self.ax.text2D(0.98, 0.85, '', transform=self.ax.transAxes, fontsize=8,
+                               verticalalignment='top', ha='right',
+                               color='white',
+                               bbox=dict(boxstyle='round,pad=0.5', facecolor='#000000',
+                                        alpha=0.92, edgecolor='#FFAA00', linewidth=2))
+
+        # Set initial view limits (will be dynamically adjusted)
+        self.ax.set_xlim(-3, 3)
+        self.ax.set_ylim(-3, 3)
+        self.ax.set_zlim(-3, 3)
+
+        # Style axes - labels in millions of km
+        self.ax.set_xlabel('X (million km)', fontsize=12, color='white', weight='bold')
+        self.ax.set_ylabel('Y (million km)', fontsize=12, color='white', weight='bold')
+        self.ax.set_zlabel('Z (million km)', fontsize=12, color='white', weight='bold')
+        self.ax.tick_params(colors='white', labelsize=9)
+
+        self.ax.xaxis.set_major_formatter(FuncFormatter(format_ticks_million_km))
+        self.ax.yaxis.set_major_formatter(FuncFormatter(format_ticks_million_km))
+        self.ax.zaxis.set_major_formatter(FuncFormatter(format_ticks_million_km))
+
+        # Make axes invisible for cinematic look
+        self.ax.xaxis.pane.fill = False
+        self.ax.yaxis.pane.fill = False
+        self.ax.zaxis.pane.fill = False
+        self.ax.xaxis.pane.set_edgecolor('none')
+        self.ax.yaxis.pane.set_edgecolor('none')
+        self.ax.zaxis.pane.set_edgecolor('none')
+        self.ax.grid(False)  # No grid for cinematic view
+        self.ax.set_axis_off()  # Hide axes completely
+
+    def init(self):
+        """Reset the dynamic artists; the uncertainty artists are created on first call"""
+        # Uncertainty ellipses, dimension lines and their labels are created once
+        # and then updated in place by animate()
+        if not self.uncertainty_surf:
+            # Ellipses in the XY (red), XZ (green) and YZ (blue) planes
+            for color in ('#FF3333', '#33FF33', '#3333FF'):
+                ellipse, = self.ax.plot([], [], [], '-', color=color, linewidth=2.5, alpha=0.7)
+                self.uncertainty_surf.append(ellipse)
+
+            # Labels for each ellipse - small and fixed size
+            names = ('XY', 'XZ', 'YZ') if self.uncertainty is None else ('A12', 'A13', 'A23')
+            for name, color in zip(names, ('#FF3333', '#33FF33', '#3333FF')):
+                label = self.ax.text(0, 0, 0, name, color=color, fontsize=6, weight='bold',
+                                ha='center', va='bottom')
+                self.ellipse_labels.append(label)
+
+            # Ellipsoid dimension lines (axis lines)
+            for color in ('#FF3333', '#33FF33', '#3333FF'):
+                line, = self.ax.plot([], [], [], '-', color=color, linewidth=1.5, alpha=0.5)
+                self.dimension_lines.append(line)
+
+        for artist in self.uncertainty_surf + self.ellipse_labels + self.dimension_lines:
+            artist.set_visible(False)
+
+        self.comet_point.set_data([], [])
+        self.comet_point.set_3d_properties([])
+        self.comet_tail.set_data([], [])
+        self.comet_tail.set_3d_properties([])
+        self.info_text.set_text('')
+        self.title_text.set_text('')
+        self.legend_text.set_text('')
+        return self.comet_point, self.comet_tail, self.info_text, self.title_text, self.legend_text, self.uncertainty_surf, self.dimension_lines, self.ellipse_labels
+
+    def get_frame_state(self, frame):
+        """
+        Everything that changes from frame to frame: comet and planet positions,
+        tail, camera and overlay text. animate() draws it and the frame manifest
+        hashes it to find frames that need re-rendering
+        """
+        # Comet position along trajectory
+        idx = frame % self.total_frames
+        x_pos = self.x_traj[idx]
+        y_pos = self.y_traj[idx]
+        z_pos = self.z_traj[idx]
+
+        # Comet tail effect (last 20 positions)
+        tail_length = min(20, idx)
         tail_start = max(0, idx - tail_length)
-        comet_tail.set_data(x_traj[tail_start:idx], y_traj[tail_start:idx])
-        comet_tail.set_3d_properties(z_traj[tail_start:idx])
-
-    # Calculate distance from Sun in both AU and million km
-    distance_au = np.sqrt(x_pos**2 + y_pos**2 + z_pos**2)
-    distance_mkm = distance_au * AU_TO_KM / 1e6  # Million km
-    
-    # Calculate current date
-    days_offset = time_from_perihelion[idx]
-    current_date = perihelion_date + timedelta(days=days_offset)
-    date_str = current_date.strftime("%B %d, %Y")
-    
-    # Days to/from perihelion
-    if days_offset < 0:
-        perihelion_str = f"{abs(int(days_offset))} days before perihelion"
-        phase_emoji = "[APPROACHING]"
-        status = "APPROACHING"
-    elif days_offset == 0:
-        perihelion_str = "AT PERIHELION!"
-        phase_emoji = "[PERIHELION]"
-        status = "CLOSEST APPROACH"
-    else:
-        perihelion_str = f"{int(days_offset)} days after perihelion"
-        phase_emoji = "[DEPARTING]"
-        status = "DEPARTING"
-
-    # Calculate velocity using vis-viva equation for hyperbolic orbits
-    # v = sqrt(μ(2/r + 1/a)) where μ = GM_sun = 1.327×10^20 m³/s² 
-    # For hyperbolic orbits, a < 0, so v = sqrt(μ(2/r - 1/|a|))
-    GM_sun = 1.32712440018e20  # m³/s² (gravitational parameter of Sun)
-    r_meters = distance_au * AU_TO_KM * 1000  # Convert AU to meters
-    a_meters = abs(a) * AU_TO_KM * 1000  # Convert |a| to meters
-    
-    # Vis-viva equation: v² = μ(2/r - 1/a) for elliptic, v² = μ(2/r + 1/|a|) for hyperbolic
-    velocity_ms = np.sqrt(GM_sun * (2.0/r_meters + 1.0/a_meters))  # m/s
-    velocity_kms = velocity_ms / 1000  # Convert to km/s
-
-    # Dynamic camera movement centered on comet
-    comet_pos_array = np.array([x_pos, y_pos, z_pos])
-    elev, azim, zoom, _ = get_camera_path(frame, total_frames, comet_pos_array)
-    ax.view_init(elev=elev, azim=azim)
-    
-    # Dynamic zoom centered on comet position
-    ax.set_xlim(x_pos - zoom, x_pos + zoom)
-    ax.set_ylim(y_pos - zoom, y_pos + zoom)
-    ax.set_zlim(z_pos - zoom, z_pos + zoom)
-
-    # Update title with date and status (without phase_emoji duplicates)
-    title_text.set_text(f'{date_str}\n{status}')
-    
-    # Convert orbital elements to million km for better understanding
-    perihelion_mkm = q * AU_TO_KM / 1e6
-    
-    # Calculate ellipsoid axes lengths in million km
-    ax_len_x = uncertainty_axes[0] * AU_TO_KM / 1e6
-    ax_len_y = uncertainty_axes[1] * AU_TO_KM / 1e6
-    ax_len_z = uncertainty_axes[2] * AU_TO_KM / 1e6
-    
-    # Update info panel - compact horizontal format
-    info_text.set_text(f'''3I/ATLAS | Dist. to Sun: {distance_mkm:.0f}M km | {perihelion_str} | Vel. w.r.t. Sun: {abs(velocity_kms):.0f} km/s''')
-
-    # Update legend - with ellipse measurements
-    legend_text.set_text(f'''UNCERTAINTY ELLIPSES (3σ = 99.7%):
+
+        # Calculate distance from Sun in both AU and million km
+        distance_au = np.sqrt(x_pos**2 + y_pos**2 + z_pos**2)
+        distance_mkm = distance_au * AU_TO_KM / 1e6  # Million km
+
+        # Calculate current date
+        days_offset = self.time_from_perihelion[idx]
+        current_date = perihelion_date + timedelta(days=days_offset)
+        date_str = current_date.strftime("%B %d, %Y")
+
+        # Days to/from perihelion
+        if days_offset < 0:
+            perihelion_str = f"{abs(int(days_offset))} days before perihelion"
+            phase_emoji = "[APPROACHING]"
+            status = "APPROACHING"
+        elif days_offset == 0:
+            perihelion_str = "AT PERIHELION!"
+            phase_emoji = "[PERIHELION]"
+            status = "CLOSEST APPROACH"
+        else:
+            perihelion_str = f"{int(days_offset)} days after perihelion"
+            phase_emoji = "[DEPARTING]"
+            status = "DEPARTING"
+
+        # Speed w.r.t. the Sun from the frame's velocity vector (AU/day to km/s)
+        velocity_kms = np.linalg.norm(self.velocities[idx]) * AU_TO_KM / 86400
+
+        # Dynamic camera movement centered on comet
+        comet_pos_array = np.array([x_pos, y_pos, z_pos])
+        elev, azim, zoom, _ = get_camera_path(frame, self.total_frames, comet_pos_array)
+
+        # 3σ ellipsoid: semi-axis lengths (AU), their unit directions (rows) and label offset
+        if self.uncertainty is None:
+            semi_axes = np.asarray(uncertainty_axes)
+            axes = np.eye(3)
+            label_offset = 0.05
+
+            # Calculate ellipsoid axes lengths in million km
+            ax_len_x = semi_axes[0] * AU_TO_KM / 1e6
+            ax_len_y = semi_axes[1] * AU_TO_KM / 1e6
+            ax_len_z = semi_axes[2] * AU_TO_KM / 1e6
+            legend = f'''UNCERTAINTY ELLIPSES (3σ = 99.7%):
 XY plane (red): {ax_len_x:.1f} × {ax_len_y:.1f} M km
 XZ plane (green): {ax_len_x:.1f} × {ax_len_z:.1f} M km
 YZ plane (blue): {ax_len_y:.1f} × {ax_len_z:.1f} M km
-Causes: Obs. Errors, Gravity Uncertainty, Outgassing''')
-
-    return comet_point, comet_tail, info_text, title_text, legend_text, uncertainty_surf, dimension_lines, ellipse_labels
-
-# Create animation
-print("="*60)
-print("*** Generating Cinematic 3D Animation of Comet 3I/ATLAS ***")
-print("="*60)
-print(f"Total frames: {total_frames}")
-print(f"Animation duration: ~{total_frames/30:.1f} seconds at 30 fps")
-print("This may take several minutes...")
-print("")
-
-anim = FuncAnimation(fig, animate, init_func=init, frames=total_frames,
-                    interval=33, blit=False, repeat=True)  # 33ms = 30fps
-
-# Save animation
-if not os.path.exists('output'):
-    os.makedirs('output')
-
-# Save frames for high-quality video
-print("[RENDERING] Rendering frames...")
-def save_frames():
-    # Initialize before starting to clear any previous state
-    init()
-    plt.draw()
-    
-    for i in range(total_frames):
-        animate(i)
-        # Save with specific size to ensure dimensions divisible by 2
-        plt.savefig(f'output/frame_{i:04d}.png', dpi=100, bbox_inches=None,
-                   facecolor='#000000', edgecolor='none')
-        if i % 25 == 0:
-            progress = (i / total_frames) * 100
-            print(f'  Progress: {progress:.1f}% ({i}/{total_frames} frames)')
-    print(f'  [SUCCESS] All {total_frames} frames saved!')
-
-save_frames()
-
-# Create high-quality MP4 with ffmpeg (if available)
-print("")
-print("[VIDEO] Creating MP4 video...")
-try:
-    import ffmpeg
-    (
-        ffmpeg
-        .input('output/frame_%04d.png', framerate=15)
-        .output('output/comet_3i_atlas_cinematic.mp4',
-                vcodec='libx264',
-                pix_fmt='yuv420p',
-                **{'crf': '18', 'preset': 'slow'})  # High quality settings
-        .overwrite_output()
-        .run(capture_stdout=True, capture_stderr=True)
-    )
-    print("[SUCCESS] MP4 video created: output/comet_3i_atlas_cinematic.mp4")
-except Exception as ex:
-    print(f"[WARNING] ffmpeg not available: {ex}")
-    print("   To create MP4 manually:")
-    print("   1. Install ffmpeg: https://ffmpeg.org/download.html")
-    print("   2. Run: python create_video.py")
-    print("   3. Or run manually:")
-    print("      ffmpeg -framerate 15 -i output/frame_%04d.png -c:v libx264 -crf 18 -preset slow -pix_fmt yuv420p output/comet_3i_atlas_cinematic.mp4")
-
-# Also save as GIF for quick preview
-print("")
-print("[GIF] Creating GIF preview...")
-try:
-    anim.save('output/comet_3i_preview.gif', writer='pillow', fps=10, dpi=100)
-    print("[SUCCESS] GIF preview created: output/comet_3i_preview.gif")
-except Exception as ex:
-    print(f"[WARNING] GIF creation failed: {ex}")
-    print("   GIF will be created with create_video.py if needed")
-
-plt.close()
-
-print("")
-print("="*60)
-print("✨ ANIMATION COMPLETE! ✨")
-print("="*60)
-print("📁 Files saved in 'output/' folder:")
-print("   • comet_3i_atlas_cinematic.mp4 (high-quality video)")
-print("   • comet_3i_preview.gif (quick preview)")
-print("   • frame_*.png (individual frames)")
-print("")
-print("📱 Ready to share on LinkedIn!")
-print("="*60)
+Causes: Obs. Errors, Gravity Uncertainty, Outgassing'''
+        else:
+            semi_axes = self.uncertainty['semi_axes'][idx]
+            axes = self.uncertainty['axes'][idx]
+            label_offset = semi_axes[0]
+
+            len_1, len_2, len_3 = semi_axes * AU_TO_KM
+            legend = f'''UNCERTAINTY ELLIPSOID (3σ, {self.uncertainty['samples']:,} Monte Carlo orbits):
+Axes 1-2 (red): {len_1:,.0f} × {len_2:,.0f} km
+Axes 1-3 (green): {len_1:,.0f} × {len_3:,.0f} km
+Axes 2-3 (blue): {len_2:,.0f} × {len_3:,.0f} km
+Causes: Orbital-element uncertainty (MPC 1σ)'''
+
+        return {
+            'idx': idx,
+            'comet': (x_pos, y_pos, z_pos),
+            # Heliocentric planet positions from the precomputed ephemeris table
+            'planets': self.planet_positions[:, idx],
+            'tail': (tail_start, idx),
+            'camera': (elev, azim, zoom),
+            'uncertainty': (semi_axes, axes, label_offset),
+            # Title with date and status (without phase_emoji duplicates)
+            'title': f'{date_str}\n{status}',
+            # Info panel - compact horizontal format
+            'info': f'''3I/ATLAS | Dist. to Sun: {distance_mkm:.0f}M km | {perihelion_str} | Vel. w.r.t. Sun: {abs(velocity_kms):.0f} km/s''',
+            # Legend - with ellipse measurements
+            'legend': legend,
+        }
+
+    def animate(self, frame, move_camera=True):
+        """
+        Update every dynamic artist for a frame (FuncAnimation callback)
+        move_camera=False keeps the current view and limits (interactive viewer)
+        """
+        with TRACER.span('frame state'):
+            state = self.get_frame_state(frame)
+
+        with TRACER.span('artists'):
+            x_pos, y_pos, z_pos = state['comet']
+
+            self.comet_point.set_data([x_pos], [y_pos])
+            self.comet_point.set_3d_properties([z_pos])
+
+            # Update comet label to follow comet position
+            self.comet_label.set_position((x_pos, y_pos))
+            self.comet_label.set_3d_properties(z_pos + 0.15, 'z')  # Slightly above comet
+            self.comet_label.set_text('3I/ATLAS')
+
+            # Update planet positions (heliocentric)
+            for planet_name, (planet_x, planet_y, planet_z) in zip(planet_names_list, state['planets']):
+                if np.isnan(planet_x):
+                    # Ephemeris failed for this planet, leave it where it was
+                    continue
+
+                # Update planet scatter plot
+                self.planet_plots[planet_name]._offsets3d = ([planet_x], [planet_y], [planet_z])
+
+                # Update planet label
+                self.planet_labels[planet_name].set_position((planet_x, planet_y))
+                self.planet_labels[planet_name].set_3d_properties(planet_z + 0.15, 'z')
+
+            # Update uncertainty ellipses to follow comet (artists were created in init())
+            # Each ellipse spans two axes of the ellipsoid, each dimension line is one axis
+            semi_axes, axes, label_offset = state['uncertainty']
+            center = np.array([x_pos, y_pos, z_pos])
+            scaled_axes = semi_axes[:, None] * axes
+
+            for ellipse, label, (j, k), (tip, nudge) in zip(self.uncertainty_surf, self.ellipse_labels,
+                                                            ELLIPSE_PLANES, ELLIPSE_LABEL_ANCHORS):
+                ellipse.set_data_3d(*(center[:, None] + scaled_axes[j][:, None] * ELLIPSE_COS
+                                      + scaled_axes[k][:, None] * ELLIPSE_SIN))
+                label.set_position_3d(center + scaled_axes[tip] + label_offset * axes[nudge])
+
+            # Ellipsoid dimension lines (axis lines) - more visible
+            for line, axis in zip(self.dimension_lines, scaled_axes):
+                line.set_data_3d(*np.column_stack([center - axis, center + axis]))
+
+            for artist in self.uncertainty_surf + self.ellipse_labels + self.dimension_lines:
+                artist.set_visible(True)
+
+            # Add comet tail effect
+            tail_start, tail_end = state['tail']
+            if tail_end > tail_start:
+                self.comet_tail.set_data(self.x_traj[tail_start:tail_end], self.y_traj[tail_start:tail_end])
+                self.comet_tail.set_3d_properties(self.z_traj[tail_start:tail_end])
+            else:
+                self.comet_tail.set_data([], [])
+                self.comet_tail.set_3d_properties([])
+
+            self.title_text.set_text(state['title'])
+            self.info_text.set_text(state['info'])
+            self.legend_text.set_text(state['legend'])
+
+        if move_camera:
+            with TRACER.span('camera'):
+                self.set_camera(state)
+
+        return self.comet_point, self.comet_tail, self.info_text, self.title_text, self.legend_text, self.uncertainty_surf, self.dimension_lines, self.ellipse_labels
+
+    def set_camera(self, state):
+        """Point the camera as in the cinematic render, centered on the comet"""
+        x_pos, y_pos, z_pos = state['comet']
+        # Dynamic camera movement centered on comet
+        elev, azim, zoom = state['camera']
+        self.ax.view_init(elev=elev, azim=azim)
+
+        # Dynamic zoom centered on comet position
+        self.ax.set_xlim(x_pos - zoom, x_pos + zoom)
+        self.ax.set_ylim(y_pos - zoom, y_pos + zoom)
+        self.ax.set_zlim(z_pos - zoom, z_pos + zoom)
+
+    def dynamic_artists(self):
+        """Every artist animate() changes; the rest of the scene is static for a fixed camera"""
+        return ([self.comet_point, self.comet_tail, self.comet_label]
+                + list(self.planet_plots.values()) + list(self.planet_labels.values())
+                + self.uncertainty_surf + self.dimension_lines + self.ellipse_labels
+                + [self.title_text, self.info_text, self.legend_text])
+
+    def scene_fingerprint(self):
+        """
+        Hash of the static scene drawn in every frame (trajectory, planet orbits,
+        uncertainty axes, figure size); part of every frame's manifest inputs
+        """
+        import matplotlib
+
+        return hash_inputs(self.x_traj, self.y_traj, self.z_traj,
+                           {name: np.asarray(orbit) for name, orbit in self.planet_orbits.items()},
+                           uncertainty_axes, [14, 10, 100], matplotlib.__version__)
+
+    def render_frame(self, frame, output_dir='output', save_png=True):
+        """
+        Update the scene for one frame and draw it, optionally saving it as a PNG
+        Returns the canvas RGBA buffer (a memoryview, only valid until the next draw)
+        """
+        with TRACER.span(FRAME_SPAN):
+            self.animate(frame)
+            if save_png:
+                if TRACER.enabled and not self._draw_timed:
+                    # savefig rasterizes, fires draw_event, then encodes the PNG: split it there
+                    self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+                    self._draw_timed = True
+                start = time.perf_counter_ns()
+                # Save with specific size to ensure dimensions divisible by 2
+                self.fig.savefig(frame_path(frame, output_dir), dpi=100, bbox_inches=None,
+                            facecolor='#000000', edgecolor='none')
+                TRACER.record('rasterize', start, self._drawn_ns)
+                TRACER.record('png encode', self._drawn_ns, time.perf_counter_ns())
+            else:
+                with TRACER.span('rasterize'):
+                    self.fig.canvas.draw()
+        return self.fig.canvas.buffer_rgba()
+
+    def recycle(self):
+        """
+        Replace the figure with a freshly built one, releasing whatever matplotlib accumulated
+        in the old one; frames render exactly as they would have from the old figure
+        """
+        import matplotlib.pyplot as plt
+
+        plt.close(self.fig)
+        # The figure and its artists reference each other: free them now, before the new figure
+        # is allocated, rather than at the next full garbage collection
+        gc.collect()
+        self._draw_timed = False
+        self.build_scene()
+        self.init()
+        self.fig.canvas.draw()
+
+    def _on_draw(self, event):
+        """Remember when the canvas finished rasterizing, to split savefig into its stages"""
+        self._drawn_ns = time.perf_counter_ns()
+
+def frame_path(frame, output_dir='output'):
+    """Path of the PNG file for a frame"""
+    return os.path.join(output_dir, f'frame_{frame:04d}.png')
+
+# Scene owned by a render worker process, set by _init_render_worker()
+_worker_scene = None
+# Long-run state of a render worker: frames it rendered, figure recycling period, memory monitor
+_worker_frames = 0
+_worker_recycle_every = 0
+_worker_memory = None
+
+def _init_render_worker(scene_class, num_frames, positions, orbits, uncertainty, trajectory, velocities,
+                        trace=False, recycle_every=0, memory_interval=0, trace_python=False):
+    """Pool initializer: build this worker's own figure and artists once"""
+    global _worker_scene, _worker_recycle_every, _worker_memory
+    # Forked workers inherit the spans the main process recorded so far
+    TRACER.drain()
+    if trace:
+        TRACER.enable()
+    _worker_scene = scene_class(num_frames, positions, orbits, uncertainty, trajectory, velocities)
+    _worker_scene.build_scene()
+    _worker_scene.init()
+    _worker_scene.fig.canvas.draw()
+    _worker_recycle_every = recycle_every
+    if memory_interval:
+        _worker_memory = MemoryMonitor(memory_interval, trace_python, f'MEMORY worker {os.getpid()}',
+                                       RECYCLE_WARMUP * recycle_every)
+
+def _render_frame_range(frames, output_dir, save_png, return_pixels):
+    """
+    Render a contiguous slice of frames in a worker process
+    Returns the raw RGBA bytes of each frame if return_pixels, and the spans traced meanwhile
+    """
+    global _worker_frames
+    pixels = []
+    for frame in frames:
+        if _worker_recycle_every and _worker_frames and _worker_frames % _worker_recycle_every == 0:
+            _worker_scene.recycle()
+        buffer = _worker_scene.render_frame(frame, output_dir, save_png)
+        if return_pixels:
+            pixels.append(bytes(buffer))
+        _worker_frames += 1
+        if _worker_memory is not None:
+            _worker_memory.update(_worker_frames)
+    return pixels, TRACER.drain()
+
+def save_frames(scene, workers=1, output_dir='output', chunk_size=25, writer=None, save_png=True,
+                frames=None, on_saved=None, recycle_every=0, memory_interval=0, trace_python=False):
+    """
+    Render frames of a built CometAnimation, saving output_dir/frame_XXXX.png and/or streaming the raw
+    pixels into writer (an FFmpegFrameWriter) in frame order
+    frames: frame numbers to render (default: all of them)
+    on_saved: optional callback receiving lists of finished frame numbers, in order
+    workers > 1 splits the frames into chunks rendered by a process pool;
+    every worker builds its own figure, so frames are identical to the serial path
+    recycle_every: rebuild the figure after this many frames in each rendering process (0: never),
+    so memory stays flat over very long renders
+    memory_interval: sample the RSS of each rendering process every this many frames and print
+    its growth (0: off); trace_python also samples the Python heap with tracemalloc
+    """
+    frames = list(range(scene.total_frames)) if frames is None else list(frames)
+    num_frames = len(frames)
+    if num_frames == 0:
+        print('  [SUCCESS] Nothing to render, all frames are up to date!')
+        return
+
+    if workers <= 1:
+        # Initialize before starting to clear any previous state
+        scene.init()
+        scene.fig.canvas.draw()
+        memory = None
+        if memory_interval:
+            memory = MemoryMonitor(memory_interval, trace_python, warmup_frames=RECYCLE_WARMUP * recycle_every)
+
+        finished = []
+        for i, frame in enumerate(frames):
+            if recycle_every and i and i % recycle_every == 0:
+                scene.recycle()
+            buffer = scene.render_frame(frame, output_dir, save_png)
+            if writer is not None:
+                writer.write(buffer)
+            if memory is not None:
+                memory.update(i + 1)
+            finished.append(frame)
+            if i % 25 == 0 or i == num_frames - 1:
+                if on_saved is not None:
+                    on_saved(finished)
+                finished = []
+            if i % 25 == 0:
+                progress = (i / num_frames) * 100
+                print(f'  Progress: {progress:.1f}% ({i}/{num_frames} frames)')
+        print(f'  [SUCCESS] All {num_frames} frames rendered!')
+        if memory is not None:
+            if memory.samples[-1][0] != num_frames:
+                memory.sample(num_frames)
+            print(f"[MEMORY] {memory.describe()}")
+            memory.stop()
+        return
+
+    import multiprocessing
+
+    if writer is not None:
+        # Streamed chunks travel back to this process as pixels, keep them small
+        chunk_size = min(chunk_size, 5)
+    # Small enough chunks that every worker gets work and progress stays granular
+    chunk_size = max(1, min(chunk_size, -(-num_frames // workers)))
+    chunks = [frames[start:start + chunk_size] for start in range(0, num_frames, chunk_size)]
+    print(f'  Rendering with {workers} worker processes ({len(chunks)} chunks of {chunk_size} frames)')
+
+    render_chunk = functools.partial(_render_frame_range, output_dir=output_dir, save_png=save_png,
+                                     return_pixels=writer is not None)
+
+    with multiprocessing.Pool(workers, initializer=_init_render_worker,
+                              initargs=(type(scene), scene.total_frames, scene.planet_positions,
+                                        scene.planet_orbits, scene.uncertainty,
+                                        (scene.x_traj, scene.y_traj, scene.z_traj), scene.velocities,
+                                        TRACER.enabled, recycle_every, memory_interval, trace_python)) as pool:
+        # Keep a bounded number of chunks in flight so streamed pixels can't pile up
+        # in memory, and collect them in submission order so frames stay in order
+        chunk_iter = iter(chunks)
+        pending = collections.deque(pool.apply_async(render_chunk, (chunk,))
+                                    for chunk in itertools.islice(chunk_iter, 2 * workers))
+        done = 0
+        for chunk in chunks:
+            result, events = pending.popleft().get()
+            TRACER.extend(events)
+            for next_chunk in itertools.islice(chunk_iter, 1):
+                pending.append(pool.apply_async(render_chunk, (next_chunk,)))
+
+            if writer is not None:
+                for pixels in result:
+                    writer.write(pixels)
+            if on_saved is not None:
+                on_saved(chunk)
+            done += len(chunk)
+            progress = (done / num_frames) * 100
+            print(f'  Progress: {progress:.1f}% ({done}/{num_frames} frames)')
+    print(f'  [SUCCESS] All {num_frames} frames rendered!')
+
+def render_incremental(scene, workers=1, output_dir='output', recycle_every=0, memory_interval=0,
+                       trace_python=False):
+    """
+    Render only the frames whose PNG is missing or whose inputs changed since the
+    last run, tracked in output_dir/frames_manifest.json; safe to resume after a crash
+    """
+    manifest = FrameManifest(os.path.join(output_dir, 'frames_manifest.json'))
+    fingerprint = scene.scene_fingerprint()
+    input_hashes = {frame: hash_inputs(fingerprint, scene.get_frame_state(frame))
+                    for frame in range(scene.total_frames)}
+
+    # Frames beyond the current frame count would be picked up by the encoder, including
+    # PNGs left by an earlier non-incremental run that the manifest never recorded
+    manifest.prune(input_hashes)
+    for path in glob.glob(os.path.join(output_dir, 'frame_*.png')):
+        number = os.path.basename(path)[len('frame_'):-len('.png')]
+        if number.isdigit() and int(number) >= scene.total_frames:
+            os.remove(path)
+
+    stale = [frame for frame, inputs_hash in input_hashes.items()
+             if not manifest.is_current(frame, inputs_hash, frame_path(frame, output_dir))]
+    print(f"[MANIFEST] {scene.total_frames - len(stale)} frames up to date, {len(stale)} to render")
+
+    def record(frames):
+        for frame in frames:
+            manifest.record(frame, input_hashes[frame], frame_path(frame, output_dir))
+        manifest.save()
+
+    save_frames(scene, workers=workers, output_dir=output_dir, save_png=True, frames=stale, on_saved=record,
+                recycle_every=recycle_every, memory_interval=memory_interval, trace_python=trace_python)
+    manifest.save()
+
+def parse_frame_range(shard=None, frame_range=None, total_frames=total_frames):
+    """
+    Frames [start, end) of a shard index 'K/N' (the K-th of N equal slices, from 0)
+    or of an explicit frame range 'A:B'; all frames if neither is given
+    """
+    if shard:
+        index, count = (int(value) for value in shard.split('/'))
+        if not 0 <= index < count:
+            raise ValueError(f'shard index {index} is outside 0..{count - 1}')
+        return index * total_frames // count, (index + 1) * total_frames // count
+    if frame_range:
+        start, end = (int(value) if value else default
+                      for value, default in zip(frame_range.split(':'), (0, total_frames)))
+        if not 0 <= start < end <= total_frames:
+            raise ValueError(f'frame range {start}:{end} is outside 0:{total_frames}')
+        return start, end
+    return 0, total_frames
+
+def _render_queue_units(scene, queue, preferred=()):
+    """
+    Claim and render units of a FrameQueue until every unit is done, then return the
+    number of frames this node rendered. Waits while the last units are held by other
+    nodes, so units of nodes that die are picked up here once their lease expires
+    """
+    rendered = 0
+    while True:
+        unit = queue.claim(preferred)
+        if unit is None:
+            if queue.remaining() == 0:
+                return rendered
+            time.sleep(POLL_SECONDS)
+            continue
+
+        frames = queue.unit_frames(unit)
+        print(f"[QUEUE] {queue.node_id}: unit {unit} (frames {frames.start}-{frames.stop - 1})")
+        for frame in frames:
+            scene.render_frame(frame, queue.frames_dir)
+            if not queue.heartbeat(unit):
+                print(f"[QUEUE] {queue.node_id}: unit {unit} was reassigned, dropping it")
+                break
+        else:
+            if queue.complete(unit, functools.partial(frame_path, output_dir=queue.frames_dir)):
+                rendered += len(frames)
+
+def _queue_node_process(worker_args, queue_dir, preferred, lease_seconds):
+    """Local node process of render_queue(): its own scene and queue identity"""
+    _init_render_worker(*worker_args)
+    queue = FrameQueue(queue_dir, lease_seconds=lease_seconds)
+    _render_queue_units(_worker_scene, queue, preferred)
+
+def render_queue(scene, queue, frame_range=None, workers=1):
+    """
+    Render a built CometAnimation as one node of a multi-node job sharing queue (a FrameQueue)
+    frame_range: (start, end) frames this node claims first, e.g. its shard; it then helps
+    with any other unit left
+    workers > 1 runs that many local node processes, each claiming units on its own
+    """
+    preferred = queue.units_in_range(*frame_range) if frame_range else []
+    print(f"[QUEUE] {queue.num_units} units of {queue.unit_size} frames in {queue.queue_dir}, "
+          f"{queue.remaining()} left")
+
+    if workers <= 1:
+        scene.init()
+        scene.fig.canvas.draw()
+        rendered = _render_queue_units(scene, queue, preferred)
+        print(f"[QUEUE] {queue.node_id} rendered {rendered} frames")
+    else:
+        import multiprocessing
+
+        worker_args = (type(scene), scene.total_frames, scene.planet_positions, scene.planet_orbits,
+                       scene.uncertainty, (scene.x_traj, scene.y_traj, scene.z_traj), scene.velocities)
+        processes = [multiprocessing.Process(target=_queue_node_process,
+                                             args=(worker_args, queue.queue_dir, preferred, queue.lease_seconds))
+                     for _ in range(workers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+    remaining = queue.remaining()
+    if remaining:
+        print(f"[WARNING] {remaining} units are not done yet")
+    else:
+        print(f"[SUCCESS] All units done, run --stitch {queue.queue_dir} to encode the video")
+
+def stitch_queue(queue_dir, outputs, ffmpeg_path='ffmpeg'):
+    """
+    Verify that every frame of a queue render is present and unchanged, then encode them
+    into outputs, (rendition name, output file) pairs, with the ffmpeg at ffmpeg_path. Units with missing or changed frames
+    are reopened so that nodes started again on queue_dir render them. Returns True if
+    the renditions were encoded
+    """
+    queue = FrameQueue(queue_dir)
+    unit_frame_path = functools.partial(frame_path, output_dir=queue.frames_dir)
+    with TRACER.span('verify frames'):
+        unfinished, bad_frames = queue.verify(unit_frame_path)
+    if unfinished or bad_frames:
+        if unfinished:
+            print(f"[ERROR] {len(unfinished)} of {queue.num_units} units are not done: {unfinished}")
+        if bad_frames:
+            print(f"[ERROR] {len(bad_frames)} frames are missing or changed since rendering: {bad_frames}")
+            queue.reopen(sorted({frame // queue.unit_size for frame in bad_frames}))
+        print(f"   Run more nodes with --queue {queue_dir}, then stitch again")
+        return False
+
+    print(f"[STITCH] All {queue.total_frames} frames verified, encoding "
+          f"{', '.join(output_file for _, output_file in outputs)}...")
+    encode_png_sequence(os.path.join(queue.frames_dir, 'frame_%04d.png'), outputs, fps=15, ffmpeg_path=ffmpeg_path)
+    for _, output_file in outputs:
+        print(f"[SUCCESS] Created: {output_file}")
+    return True
+
+def rendition_outputs(names, output_dir='output'):
+    """(rendition name, output file) pairs of the named renditions"""
+    return [(name, os.path.join(output_dir, RENDITIONS[name]['file'])) for name in names]
+
+def save_gif_preview(frame_files, output_file, fps=10, width=800):
+    """GIF preview from saved PNG frames with Pillow, for when ffmpeg is not available"""
+    from PIL import Image
+
+    def frames():
+        for path in frame_files:
+            with Image.open(path) as image:
+                height = round(image.height * width / image.width)
+                yield image.convert('RGB').resize((width, height), Image.LANCZOS)
+
+    images = frames()
+    next(images).save(output_file, save_all=True, append_images=images, duration=1000 // fps, loop=0)
+
+def main(argv=None):
+    """Command-line entry point: render the animation, then encode the MP4 and GIF"""
+    import matplotlib.pyplot as plt
+
+    parser = argparse.ArgumentParser(description='Render the Comet 3I/ATLAS cinematic animation')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of processes rendering frames in parallel (default: 1, serial)')
+    parser.add_argument('--png', action='store_true',
+                        help='also save every frame as output/frame_XXXX.png (for debugging); '
+                             'PNGs are always written when ffmpeg is not available')
+    parser.add_argument('--incremental', action='store_true',
+                        help='save PNG frames and only re-render frames that are missing or whose '
+                             'inputs changed since the last run (resumes interrupted renders)')
+    parser.add_argument('--frames', type=int, default=total_frames,
+                        help=f'number of frames to render (default: {total_frames})')
+    parser.add_argument('--planets', choices=PLANET_MODELS, default='astropy',
+                        help="planet positions from astropy's builtin ephemeris (default), or from the "
+                             "analytic Keplerian elements without/with secular rates (no astropy, for previews)")
+    parser.add_argument('--spk', metavar='PATH',
+                        help='read planet positions from a local JPL SPK kernel (e.g. de440s.bsp) instead of '
+                             "astropy's builtin model; memory-mapped, nothing is downloaded")
+    parser.add_argument('--perturbed', action='store_true',
+                        help='integrate the comet trajectory including planetary perturbations '
+                             '(planet positions from the --planets model) instead of the two-body Kepler path')
+    parser.add_argument('--uncertainty-samples', type=int, default=0,
+                        help='draw the 3σ ellipsoid from this many Monte Carlo orbits sampled from the '
+                             '1-sigma orbital elements (default: 0, the static conservative estimate)')
+    parser.add_argument('--interactive', action='store_true',
+                        help='play the animation in a window at up to 30 fps instead of rendering files '
+                             '(space pause, left/right step, up/down seek, home/end, c cinematic camera)')
+    parser.add_argument('--renderer', choices=RENDERERS, default='mplot3d',
+                        help="draw with matplotlib's mplot3d (default), or project the scene with NumPy and "
+                             "draw it with 2D artists (faster, same look)")
+    parser.add_argument('--trace', metavar='PATH',
+                        help='time every pipeline stage, write a Chrome trace JSON to PATH '
+                             '(open in chrome://tracing or Perfetto) and print a per-stage summary')
+    parser.add_argument('--queue', metavar='DIR',
+                        help='render as one node of a multi-node job: claim units of frames from the lock-file '
+                             'queue in DIR (a shared directory), writing DIR/frames/frame_XXXX.png; units of '
+                             'nodes that stop are reassigned after --lease seconds. Combine with --workers to '
+                             'run several local node processes')
+    shard = parser.add_mutually_exclusive_group()
+    shard.add_argument('--shard', metavar='K/N',
+                       help='with --queue, claim the units of the K-th of N equal frame slices first (K from 0)')
+    shard.add_argument('--frame-range', metavar='A:B',
+                       help='with --queue, claim the units of frames A to B-1 first')
+    parser.add_argument('--unit-size', type=int, default=UNIT_SIZE,
+                        help=f'frames per queue work unit (default: {UNIT_SIZE}); the same on every node')
+    parser.add_argument('--lease', type=float, default=LEASE_SECONDS,
+                        help=f'seconds without progress after which a claimed unit is reassigned '
+                             f'(default: {LEASE_SECONDS})')
+    parser.add_argument('--stitch', metavar='DIR',
+                        help='verify that every frame of the --queue DIR render is present and unchanged, then '
+                             'encode them into the --renditions (exit status 1 if incomplete)')
+    parser.add_argument('--renditions', nargs='+', choices=RENDITIONS, default=list(DEFAULT_RENDITIONS),
+                        help='outputs encoded in one pass from the rendered frames (default: mp4 gif): mp4 '
+                             '(native size, CRF 18), 1080p (H.264, CRF 15), 4k (H.264 master, CRF 12, scaled '
+                             'up from the rendered frames) and gif (800 px preview)')
+    parser.add_argument('--long-run', action='store_true',
+                        help='constant-memory mode for very long renders: rebuild the figure every '
+                             '--recycle-every frames and print the RSS of each rendering process every '
+                             f'{SAMPLE_FRAMES} frames with its growth per 1000 frames')
+    parser.add_argument('--recycle-every', type=int, default=RECYCLE_FRAMES,
+                        help=f'frames between figure rebuilds with --long-run (default: {RECYCLE_FRAMES})')
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='with --long-run, also sample the Python heap with tracemalloc '
+                             '(renders several times slower)')
+    args = parser.parse_args(argv)
+    if args.spk and args.planets != 'astropy':
+        parser.error('--spk replaces the astropy ephemeris and cannot be combined with --planets kepler*')
+    if (args.shard or args.frame_range) and not args.queue:
+        parser.error('--shard and --frame-range select the frames a --queue node claims first')
+    try:
+        frame_range = parse_frame_range(args.shard, args.frame_range, args.frames)
+    except ValueError as ex:
+        parser.error(str(ex))
+    ephemeris = args.spk or 'builtin'
+    recycle_every = args.recycle_every if args.long_run else 0
+    memory_interval = SAMPLE_FRAMES if args.long_run else 0
+    # create_video.py's bundled ffmpeg, or else the one on the PATH
+    ffmpeg_path = find_ffmpeg()
+
+    if args.stitch:
+        if ffmpeg_path is None:
+            print("[ERROR] ffmpeg not found, cannot encode the stitched frames")
+            return 1
+        os.makedirs('output', exist_ok=True)
+        return 0 if stitch_queue(args.stitch, rendition_outputs(args.renditions), ffmpeg_path) else 1
+    if args.trace:
+        TRACER.enable()
+
+    if args.renderer == 'numpy':
+        from projection_renderer import ProjectedCometAnimation as scene_class
+    else:
+        scene_class = CometAnimation
+    with TRACER.span('trajectory'):
+        scene = scene_class(args.frames)
+    with TRACER.span('ephemeris'):
+        scene.load_ephemeris(model=args.planets, ephemeris=ephemeris)
+    if args.perturbed:
+        with TRACER.span('n-body'):
+            scene.integrate_trajectory(model=args.planets, ephemeris=ephemeris)
+    if args.uncertainty_samples > 0:
+        with TRACER.span('uncertainty'):
+            scene.compute_uncertainty(args.uncertainty_samples)
+    with TRACER.span('build scene'):
+        scene.build_scene()
+
+    if args.interactive:
+        from viewer import InteractiveViewer
+
+        print("[VIEWER] Interactive playback: space pause, left/right step, up/down seek, "
+              "home/end, c cinematic camera")
+        InteractiveViewer(scene).show()
+        plt.close(scene.fig)
+        return
+
+    if args.queue:
+        # Every node must render the same animation, frame for frame
+        fingerprint = hash_inputs(scene.scene_fingerprint(),
+                                  [scene.get_frame_state(frame) for frame in range(scene.total_frames)])
+        try:
+            queue = FrameQueue(args.queue, scene.total_frames, args.unit_size, fingerprint, args.lease)
+        except ValueError as ex:
+            parser.error(str(ex))
+        render_queue(scene, queue, frame_range, workers=args.workers)
+        plt.close(scene.fig)
+        return
+
+    # Create animation
+    print("="*60)
+    print("*** Generating Cinematic 3D Animation of Comet 3I/ATLAS ***")
+    print("="*60)
+    print(f"Total frames: {scene.total_frames}")
+    print(f"Animation duration: ~{scene.total_frames/30:.1f} seconds at 30 fps")
+    print("This may take several minutes...")
+    print("")
+
+    # Save animation
+    if not os.path.exists('output'):
+        os.makedirs('output')
+
+    outputs = rendition_outputs(args.renditions)
+    stream = ffmpeg_path is not None and not args.incremental
+    save_png = args.png or not stream
+    encode_failed = False
+
+    # Render frames once, streaming them straight into ffmpeg when it is available; it encodes
+    # every rendition from the same stream
+    print("[RENDERING] Rendering frames...")
+    if args.incremental:
+        render_incremental(scene, workers=args.workers, recycle_every=recycle_every,
+                           memory_interval=memory_interval, trace_python=args.tracemalloc)
+    elif stream:
+        width, height = scene.fig.canvas.get_width_height()
+        print(f"   Streaming {width}x{height} frames into ffmpeg: "
+              f"{', '.join(output_file for _, output_file in outputs)}")
+        try:
+            with FFmpegRenditionWriter(outputs, width, height, fps=15, ffmpeg_path=ffmpeg_path) as writer:
+                save_frames(scene, workers=args.workers, writer=writer, save_png=save_png,
+                            recycle_every=recycle_every, memory_interval=memory_interval,
+                            trace_python=args.tracemalloc)
+            for _, output_file in outputs:
+                print(f"[SUCCESS] Created: {output_file}")
+        except (BrokenPipeError, RuntimeError) as ex:
+            print(f"[ERROR] Streaming to ffmpeg failed: {ex}")
+            encode_failed = True
+    else:
+        print("[WARNING] ffmpeg not found, saving PNG frames instead of streaming")
+        save_frames(scene, workers=args.workers, save_png=True, recycle_every=recycle_every,
+                    memory_interval=memory_interval, trace_python=args.tracemalloc)
+
+    if not stream:
+        print("")
+        print("[VIDEO] Encoding the PNG frames...")
+        if ffmpeg_path is not None:
+            try:
+                encode_png_sequence('output/frame_%04d.png', outputs, fps=15, ffmpeg_path=ffmpeg_path)
+                for _, output_file in outputs:
+                    print(f"[SUCCESS] Created: {output_file}")
+            except RuntimeError as ex:
+                print(f"[ERROR] {ex}")
+                encode_failed = True
+        else:
+            print("[WARNING] ffmpeg not available")
+            print("   To create MP4 manually:")
+            print("   1. Install ffmpeg: https://ffmpeg.org/download.html")
+            print("   2. Run: python create_video.py")
+            print("   3. Or run manually:")
+            print("      ffmpeg -framerate 15 -i output/frame_%04d.png -c:v libx264 -crf 18 -preset slow -pix_fmt yuv420p output/comet_3i_atlas_cinematic.mp4")
+            gif_file = dict(outputs).get('gif')
+            if gif_file:
+                # From the saved PNG frames, without rendering them again
+                print("")
+                print("[GIF] Creating GIF preview...")
+                with TRACER.span('gif'):
+                    save_gif_preview([frame_path(frame) for frame in range(scene.total_frames)], gif_file)
+                print(f"[SUCCESS] GIF preview created: {gif_file}")
+
+    plt.close(scene.fig)
+
+    if args.trace:
+        print("")
+        TRACER.export_chrome_trace(args.trace)
+        print(f"[TRACE] Chrome trace written to {args.trace}")
+        TRACER.print_summary()
+
+    if encode_failed:
+        # The frames rendered, but there is no video: don't report success to the caller
+        return 1
+
+    print("")
+    print("="*60)
+    print("✨ ANIMATION COMPLETE! ✨")
+    print("="*60)
+    print("📁 Files saved in 'output/' folder:")
+    for name, output_file in outputs:
+        if os.path.exists(output_file):
+            print(f"   • {os.path.basename(output_file)} ({RENDITIONS[name]['description']})")
+    if save_png or args.incremental:
+        print("   • frame_*.png (individual frames)")
+    print("")
+    print("📱 Ready to share on LinkedIn!")
+    print("="*60)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,16 +4,43 @@ Script to create MP4 video from animation frames
 Run this after the animation script has generated the frames
 """
 
+import argparse
+import concurrent.futures
 import os
+import shutil
 import subprocess
 import sys
-
-def create_mp4_from_frames():
+import tempfile
+
+# Local ffmpeg executable
+FFMPEG_PATH = os.path.join('ffmpeg-master-latest-win64-gpl-shared', 'ffmpeg-master-latest-win64-gpl-shared', 'bin', 'ffmpeg.exe')
+
+# Frames between keyframes (libx264's default keyint). Segments of the segmented encode are
+# whole GOPs, so the joined video has the keyframes of a single encode
+GOP_FRAMES = 250
+
+def mp4_encode_args(gop_frames=GOP_FRAMES):
+    """ffmpeg output options of the MP4, shared by the single and the segmented encode"""
+    return [
+        '-vf', 'scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2',  # Full HD resolution
+        '-c:v', 'libx264',
+        '-crf', '15',  # Higher quality (lower CRF = better quality)
+        '-preset', 'veryslow',  # Maximum quality preset (slower encoding)
+        '-profile:v', 'high',  # H.264 high profile for better quality
+        '-level', '4.0',  # H.264 level 4.0
+        '-tune', 'film',  # Optimize for film content
+        '-g', str(gop_frames),  # Keyframe interval
+        '-pix_fmt', 'yuv420p',
+        '-b:v', '0',  # Let CRF control bitrate
+        '-minrate', '1M',  # Minimum bitrate
+        '-maxrate', '20M',  # Maximum bitrate
+        '-bufsize', '25M',  # Buffer size for bitrate control
+    ]
+
+def create_mp4_from_frames(frames_dir='output', output_file='output/comet_3i_atlas_cinematic.mp4',
+                           ffmpeg_path=FFMPEG_PATH, gop_frames=GOP_FRAMES):
     """Create MP4 video from PNG frames using ffmpeg"""
 
-    frames_dir = 'output'
-    output_file = 'output/comet_3i_atlas_cinematic.mp4'
-
     if not os.path.exists(frames_dir):
         print("[ERROR] '{frames_dir}' directory not found!")
         print("   Please run the animation script first to generate frames.")
@@ -32,9 +59,6 @@ def create_mp4_from_frames():
     frame_count = len([f for f in os.listdir(frames_dir) if f.startswith('frame_') and f.endswith('.png')])
     print(f"[INFO] Found {frame_count} frames")
 
-    # Use local ffmpeg executable
-    ffmpeg_path = os.path.join('ffmpeg-master-latest-win64-gpl-shared', 'ffmpeg-master-latest-win64-gpl-shared', 'bin', 'ffmpeg.exe')
-
     if not os.path.exists(ffmpeg_path):
         print("[ERROR] ffmpeg.exe not found in expected location!")
         print(f"   Expected: {ffmpeg_path}")
@@ -46,18 +70,7 @@ def create_mp4_from_frames():
             ffmpeg_path,
             '-framerate', '30',  # Smooth 30 fps playback
             '-i', frame_pattern,
-            '-vf', 'scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2',  # Full HD resolution
-            '-c:v', 'libx264',
-            '-crf', '15',  # Higher quality (lower CRF = better quality)
-            '-preset', 'veryslow',  # Maximum quality preset (slower encoding)
-            '-profile:v', 'high',  # H.264 high profile for better quality
-            '-level', '4.0',  # H.264 level 4.0
-            '-tune', 'film',  # Optimize for film content
-            '-pix_fmt', 'yuv420p',
-            '-b:v', '0',  # Let CRF control bitrate
-            '-minrate', '1M',  # Minimum bitrate
-            '-maxrate', '20M',  # Maximum bitrate
-            '-bufsize', '25M',  # Buffer size for bitrate control
+            *mp4_encode_args(gop_frames),
             output_file,
             '-y'  # Overwrite output file
         ]
@@ -81,6 +94,89 @@ def create_mp4_from_frames():
         print(f"[ERROR] Unexpected error: {e}")
         return False
 
+def _encode_segment(ffmpeg_path, frame_pattern, start, count, segment_file, gop_frames, threads):
+    """Encode frames [start, start + count) into one MP4 segment; returns ffmpeg's error output on failure"""
+    cmd = [
+        ffmpeg_path,
+        '-framerate', '30',
+        '-start_number', str(start),
+        '-i', frame_pattern,
+        '-frames:v', str(count),
+        *mp4_encode_args(gop_frames),
+        '-threads', str(threads),
+        segment_file,
+        '-y'
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    return None if result.returncode == 0 else result.stderr
+
+def create_mp4_segmented(frames_dir='output', output_file='output/comet_3i_atlas_cinematic.mp4',
+                         ffmpeg_path=FFMPEG_PATH, workers=None, gop_frames=GOP_FRAMES):
+    """
+    Create the MP4 like create_mp4_from_frames, encoding segments of whole GOPs in parallel
+    Up to workers ffmpeg processes (default: one per CPU) each encode a segment with the
+    same settings, sharing the CPU threads; the segments are then joined without
+    re-encoding by the concat demuxer
+    """
+    frame_pattern = os.path.join(frames_dir, 'frame_%04d.png')
+    if not os.path.exists(os.path.join(frames_dir, 'frame_0000.png')):
+        print(f"[ERROR] No frame files found in '{frames_dir}'!")
+        print("   Please run the animation script first to generate frames.")
+        return False
+    if not os.path.exists(ffmpeg_path):
+        print("[ERROR] ffmpeg.exe not found in expected location!")
+        print(f"   Expected: {ffmpeg_path}")
+        return False
+
+    # Frames are numbered from 0 without gaps
+    frame_count = 0
+    while os.path.exists(os.path.join(frames_dir, f'frame_{frame_count:04d}.png')):
+        frame_count += 1
+    cpus = os.cpu_count() or 1
+    workers = workers or cpus
+
+    # About one segment per worker, each a whole number of GOPs
+    gops = -(-frame_count // gop_frames)
+    segment_frames = gop_frames * -(-gops // workers)
+    segments = [(start, min(segment_frames, frame_count - start))
+                for start in range(0, frame_count, segment_frames)]
+    workers = min(workers, len(segments))
+    threads = max(1, cpus // workers)
+    print(f"[VIDEO] Creating MP4 video from {frame_count} frames: {len(segments)} segments of up to "
+          f"{segment_frames} frames, {workers} parallel encoders")
+
+    segments_dir = tempfile.mkdtemp(prefix='segments_', dir=os.path.dirname(output_file) or '.')
+    segment_files = [os.path.join(segments_dir, f'segment_{k:03d}.mp4') for k in range(len(segments))]
+    try:
+        with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+            jobs = [pool.submit(_encode_segment, ffmpeg_path, frame_pattern, start, count, segment_file,
+                                gop_frames, threads)
+                    for (start, count), segment_file in zip(segments, segment_files)]
+            errors = [job.result() for job in jobs]
+        for (start, count), error in zip(segments, errors):
+            if error is not None:
+                print(f"[ERROR] ffmpeg failed on frames {start}-{start + count - 1}:")
+                print(f"   {error}")
+                return False
+
+        # Concat demuxer: stream copy of the segments, one after the other
+        list_file = os.path.join(segments_dir, 'segments.txt')
+        with open(list_file, 'w') as f:
+            for segment_file in segment_files:
+                f.write(f"file '{os.path.abspath(segment_file)}'\n")
+        cmd = [ffmpeg_path, '-f', 'concat', '-safe', '0', '-i', list_file, '-c', 'copy', output_file, '-y']
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            print("[ERROR] Joining the segments failed:")
+            print(f"   {result.stderr}")
+            return False
+    finally:
+        shutil.rmtree(segments_dir)
+
+    print("[SUCCESS] MP4 video created successfully!")
+    print(f"   File: {output_file}")
+    return True
+
 def create_gif_from_frames():
     """Create GIF from PNG frames as fallback"""
 
@@ -91,8 +187,7 @@ def create_gif_from_frames():
         print(f"[ERROR] '{frames_dir}' directory not found!")
         return False
 
-    # Use local ffmpeg executable
-    ffmpeg_path = os.path.join('ffmpeg-master-latest-win64-gpl-shared', 'ffmpeg-master-latest-win64-gpl-shared', 'bin', 'ffmpeg.exe')
+    ffmpeg_path = FFMPEG_PATH
 
     if not os.path.exists(ffmpeg_path):
         print("[ERROR] ffmpeg.exe not found in expected location!")
@@ -127,11 +222,23 @@ def create_gif_from_frames():
         return False
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Create the MP4 (or a GIF fallback) from output/frame_XXXX.png')
+    parser.add_argument('--segmented', action='store_true',
+                        help='encode segments of whole GOPs in parallel and join them losslessly '
+                             '(same quality settings, faster on multi-core machines)')
+    parser.add_argument('--workers', type=int,
+                        help='parallel encoders for --segmented (default: one per CPU)')
+    args = parser.parse_args()
+
     print("[VIDEO CREATOR] Comet 3I/ATLAS Video Creator")
     print("=" * 50)
 
     # Try to create MP4 first
-    if not create_mp4_from_frames():
+    if args.segmented:
+        created = create_mp4_segmented(workers=args.workers)
+    else:
+        created = create_mp4_from_frames()
+    if not created:
         print("\n[FALLBACK] Trying to create GIF instead...")
         create_gif_from_frames()
 
@@ -0,0 +1,419 @@
+"""
+Planetary ephemeris access for the Comet 3I/ATLAS animation
+Evaluates astropy ephemerides over whole epoch arrays instead of one date at a time,
+with an optional on-disk cache so reruns do not recompute the same positions.
+A local JPL SPK kernel (.bsp) can replace astropy's builtin model (see spk.py).
+get_keplerian_positions is an analytic alternative from mean orbital elements that
+needs no astropy at all.
+"""
+
+import hashlib
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+from orbit_mechanics import perifocal_basis, solve_kepler_elliptic_batch
+from spk import AU_KM, SPKKernel, utc_jd_to_et
+
+# astropy is imported inside the functions that need it: it takes seconds to
+# import, and cache hits never touch it
+
+UNIX_EPOCH_JD = 2440587.5  # Julian date of 1970-01-01 00:00 UTC
+J2000_JD = 2451545.0  # Julian date of the J2000.0 epoch
+DAYS_PER_CENTURY = 36525.0
+
+GAUSS_K_DEG = 0.9856076686  # Mean motion of a 1 AU orbit around the Sun, degrees/day
+OBLIQUITY_J2000 = 23.43928  # Obliquity of the ecliptic at J2000.0, degrees
+
+# Largest gap (AU) between an orbit polyline and the true orbit, ~1 pixel at the closest zoom
+ORBIT_TOL = 5e-5
+
+
+def julian_date(date):
+    """UTC Julian date of a datetime (naive datetimes are taken as UTC)"""
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return UNIX_EPOCH_JD + (date - datetime(1970, 1, 1)).total_seconds() / 86400
+
+
+def is_spk_kernel(ephemeris):
+    """True if an ephemeris name is the path of a local SPK kernel file"""
+    return ephemeris.lower().endswith('.bsp')
+
+
+def _spk_heliocentric(path, body_epochs):
+    """
+    Heliocentric positions (AU, ICRF) from a local SPK kernel
+    body_epochs: {body: array of UTC Julian dates}; the Sun is evaluated once for all of them
+    Returns {body: (epochs x 3) array, or None if the kernel lacks the body or epochs}
+    """
+    kernel = SPKKernel(path)
+    et = utc_jd_to_et(np.concatenate(list(body_epochs.values())))
+    try:
+        sun = kernel.barycentric('sun', et)
+    except (KeyError, ValueError) as e:
+        print(f"    Warning: Could not get Sun position: {e}")
+        return dict.fromkeys(body_epochs)
+
+    positions = {}
+    start = 0
+    for name, jd_utc in body_epochs.items():
+        body_slice = slice(start, start + len(jd_utc))
+        start += len(jd_utc)
+        try:
+            positions[name] = (kernel.barycentric(name, et[body_slice]) - sun[body_slice]) / AU_KM
+        except (KeyError, ValueError) as e:
+            print(f"    Warning: Could not get positions for {name}: {e}")
+            positions[name] = None
+    return positions
+
+
+def ecliptic_to_equatorial(xyz, obliquity=OBLIQUITY_J2000):
+    """Rotate (..., 3) ecliptic vectors about the x axis (vernal equinox) into the equatorial frame"""
+    xyz = np.asarray(xyz, dtype=float)
+    cos_eps = np.cos(np.radians(obliquity))
+    sin_eps = np.sin(np.radians(obliquity))
+    rotated = np.empty_like(xyz)
+    rotated[..., 0] = xyz[..., 0]
+    rotated[..., 1] = cos_eps * xyz[..., 1] - sin_eps * xyz[..., 2]
+    rotated[..., 2] = sin_eps * xyz[..., 1] + cos_eps * xyz[..., 2]
+    return rotated
+
+
+def equatorial_to_ecliptic(xyz, obliquity=OBLIQUITY_J2000):
+    """Inverse of ecliptic_to_equatorial"""
+    return ecliptic_to_equatorial(xyz, -obliquity)
+
+
+class EphemerisCache:
+    """
+    Persistent cache of ephemeris results stored as .npy files in a local directory
+    Entries are keyed by body, epoch grid, heliocentric correction and ephemeris source,
+    loaded memory-mapped, and evicted least-recently-used once max_bytes is exceeded
+    """
+
+    def __init__(self, cache_dir='.cache/ephemeris', max_bytes=256 * 1024**2):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(body, epochs, heliocentric=True, ephemeris='builtin'):
+        """Hash the inputs that determine an ephemeris result into a file-safe key"""
+        epochs = np.ascontiguousarray(epochs)
+        if ephemeris == 'builtin':
+            import importlib.metadata
+
+            # The builtin model ships with astropy, so its version identifies the kernel
+            ephemeris = f"builtin-astropy-{importlib.metadata.version('astropy')}"
+        elif is_spk_kernel(ephemeris):
+            stat = os.stat(ephemeris)
+            ephemeris = f'spk-{os.path.basename(ephemeris)}-{stat.st_size}-{stat.st_mtime_ns}'
+
+        digest = hashlib.sha1()
+        digest.update(f'{body}|{int(heliocentric)}|{ephemeris}|{epochs.dtype.str}|{epochs.shape}|'.encode())
+        digest.update(epochs.tobytes())
+        return f'{body}-{digest.hexdigest()[:24]}'
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.npy')
+
+    def get(self, key):
+        """Return the cached array memory-mapped read-only, or None on a miss"""
+        path = self._path(key)
+        try:
+            array = np.load(path, mmap_mode='r')
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        # Refresh the modification time so eviction is least-recently-used
+        os.utime(path)
+        self.hits += 1
+        return array
+
+    def put(self, key, array):
+        """Store an array under key, then evict old entries if over the size limit"""
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(array))
+        # Atomic rename so concurrent runs never read a half-written file
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Delete least-recently-used entries until the cache fits in max_bytes"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.npy'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def stats(self):
+        """Hit/miss counters for this session"""
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+def get_heliocentric_positions(body_names, reference_date, days_from_reference,
+                               time_offsets=None, ephemeris='builtin', cache=None):
+    """
+    Heliocentric positions of several bodies for every epoch of a time grid
+    reference_date: datetime the grid is measured from
+    days_from_reference: array of (fractional) day offsets, one per frame
+    time_offsets: optional {body: days} shift applied to that body's epochs
+    ephemeris: astropy ephemeris name ('builtin') or the path of a local SPK kernel (.bsp)
+    cache: optional EphemerisCache to read from and fill
+    Returns a (bodies x epochs x 3) float array in AU; bodies that fail are NaN
+    """
+    time_offsets = time_offsets or {}
+
+    days = np.asarray(days_from_reference, dtype=float)
+    num_bodies = len(body_names)
+    num_epochs = days.size
+
+    # (Shifted) day offsets of every body, concatenated so the Sun can be
+    # evaluated in a single call for all of them
+    shifted_days = np.concatenate([days + time_offsets.get(name, 0) for name in body_names])
+
+    positions = np.full((num_bodies, num_epochs, 3), np.nan)
+
+    # Fill what we can from the cache and collect the bodies still to compute
+    keys = {}
+    missing = []
+    reference_jd = julian_date(reference_date)
+    for k, name in enumerate(body_names):
+        body_slice = slice(k * num_epochs, (k + 1) * num_epochs)
+        if cache is not None:
+            keys[k] = cache.make_key(name, reference_jd + shifted_days[body_slice], True, ephemeris)
+            cached = cache.get(keys[k])
+            if cached is not None:
+                positions[k] = cached
+                continue
+        missing.append(k)
+
+    if not missing:
+        return positions
+
+    missing_index = np.concatenate([np.arange(k * num_epochs, (k + 1) * num_epochs) for k in missing])
+
+    if is_spk_kernel(ephemeris):
+        spk_positions = _spk_heliocentric(ephemeris, {
+            body_names[k]: reference_jd + shifted_days[k * num_epochs:(k + 1) * num_epochs] for k in missing})
+        for k in missing:
+            if spk_positions[body_names[k]] is None:
+                continue
+            positions[k] = spk_positions[body_names[k]]
+            if cache is not None:
+                cache.put(keys[k], positions[k])
+        return positions
+
+    from astropy.time import Time
+    from astropy.coordinates import get_body_barycentric, solar_system_ephemeris
+    import astropy.units as u
+
+    solar_system_ephemeris.set(ephemeris)
+    missing_epochs = Time(reference_date) + shifted_days[missing_index] * u.day
+
+    sun_failed = False
+    try:
+        sun_xyz = get_body_barycentric('sun', missing_epochs).xyz.to_value(u.AU).T
+    except Exception as e:
+        # If Sun position fails, assume it's at origin
+        print(f"    Warning: Could not get Sun position: {e}")
+        sun_xyz = np.zeros((missing_index.size, 3))
+        sun_failed = True
+
+    for j, k in enumerate(missing):
+        name = body_names[k]
+        body_slice = slice(j * num_epochs, (j + 1) * num_epochs)
+        try:
+            body_xyz = get_body_barycentric(name, missing_epochs[body_slice]).xyz.to_value(u.AU).T
+        except Exception as e:
+            print(f"    Warning: Could not get positions for {name}: {e}")
+            continue
+        # Convert to heliocentric (relative to Sun)
+        positions[k] = body_xyz - sun_xyz[body_slice]
+        # Barycentric fallback positions are not heliocentric: don't let them outlive this run
+        if cache is not None and not sun_failed:
+            cache.put(keys[k], positions[k])
+
+    return positions
+
+
+def orbit_sample_count(semi_major_axis, eccentricity, tol=ORBIT_TOL, min_points=64):
+    """
+    Number of points sampled uniformly in time over one period that keep every chord of an
+    elliptic orbit polyline within tol (AU) of the true curve
+    The worst chord is at perihelion, where the orbit is both fastest and most curved: with
+    chord length v_p * T / N and radius of curvature a(1 - e²) the sagitta bound gives
+    N = 2π / (1 - e) * sqrt(a / (8 tol))
+    """
+    count = 2 * np.pi / (1 - eccentricity) * np.sqrt(semi_major_axis / (8 * tol))
+    return max(min_points, int(np.ceil(count)))
+
+
+def get_planetary_orbits(planet_names, center_date, num_points=300, cache=None, ephemeris='builtin'):
+    """
+    Orbit polylines of several planets, each sampled uniformly in time over one orbital period
+    centred on center_date, in heliocentric coordinates
+    num_points: points per orbit, an int or {planet: int} (see orbit_sample_count)
+    Samples are taken at fractional Julian dates, so every point is a distinct epoch; the Sun
+    is evaluated in a single vectorized call for all planets still missing from the cache
+    cache: optional EphemerisCache to read from and fill
+    ephemeris: 'builtin' (astropy) or the path of a local SPK kernel (.bsp)
+    Returns {planet: (x, y, z)} arrays in AU; planets that fail are empty
+    """
+    # Exact orbital periods in days (tropical year)
+    orbital_periods = {
+        'mercury': 87.969, 'venus': 224.701, 'earth': 365.256,
+        'mars': 686.980, 'jupiter': 4332.59, 'saturn': 10759.22
+    }
+
+    center_jd = julian_date(center_date)
+    orbits = {}
+    missing = {}
+    for name in planet_names:
+        count = num_points[name] if isinstance(num_points, dict) else num_points
+        # Sample epochs from -period/2 to +period/2 around center_date, as UTC Julian dates
+        epochs_jd = center_jd + (np.linspace(0, 1, count) - 0.5) * orbital_periods.get(name, 365)
+
+        if cache is not None:
+            cached = cache.get(cache.make_key(name, epochs_jd, ephemeris=ephemeris))
+            if cached is not None:
+                orbits[name] = cached[:, 0], cached[:, 1], cached[:, 2]
+                continue
+        missing[name] = epochs_jd
+
+    if not missing:
+        return orbits
+
+    if is_spk_kernel(ephemeris):
+        spk_positions = _spk_heliocentric(ephemeris, missing)
+        for name, epochs_jd in missing.items():
+            positions = spk_positions[name]
+            if positions is None:
+                orbits[name] = np.array([]), np.array([]), np.array([])
+                continue
+            if cache is not None:
+                cache.put(cache.make_key(name, epochs_jd, ephemeris=ephemeris), positions)
+            orbits[name] = positions[:, 0], positions[:, 1], positions[:, 2]
+        return {name: orbits[name] for name in planet_names}
+
+    from astropy.time import Time
+    from astropy.coordinates import get_body_barycentric, solar_system_ephemeris
+    import astropy.units as u
+
+    solar_system_ephemeris.set('builtin')
+    epochs = Time(np.concatenate(list(missing.values())), format='jd', scale='utc')
+    try:
+        sun_xyz = get_body_barycentric('sun', epochs).xyz.to_value(u.AU).T
+    except Exception as e:
+        # Without the Sun there are no heliocentric orbits: leave them empty and uncached
+        print(f"    Warning: Could not get Sun position: {e}")
+        for name in missing:
+            orbits[name] = np.array([]), np.array([]), np.array([])
+        return {name: orbits[name] for name in planet_names}
+
+    start = 0
+    for name, epochs_jd in missing.items():
+        body_slice = slice(start, start + epochs_jd.size)
+        start += epochs_jd.size
+        try:
+            # Heliocentric: planet position relative to the Sun
+            positions = get_body_barycentric(name, epochs[body_slice]).xyz.to_value(u.AU).T - sun_xyz[body_slice]
+        except Exception as e:
+            print(f"    Warning: Failed to get positions for {name}: {e}")
+            orbits[name] = np.array([]), np.array([]), np.array([])
+            continue
+        if cache is not None:
+            cache.put(cache.make_key(name, epochs_jd, ephemeris=ephemeris), positions)
+        orbits[name] = positions[:, 0], positions[:, 1], positions[:, 2]
+
+    return {name: orbits[name] for name in planet_names}
+
+
+def get_planetary_orbit_from_ephemeris(planet_name, center_date, num_points=300, cache=None, ephemeris='builtin'):
+    """
+    Calculate planetary orbit by sampling ephemeris data over one orbital period
+    Returns x, y, z arrays for the complete orbit in heliocentric coordinates
+    The orbit is centered around center_date to capture the planet's position accurately
+    cache: optional EphemerisCache to read from and fill
+    """
+    return get_planetary_orbits([planet_name], center_date, num_points, cache, ephemeris)[planet_name]
+
+
+def get_keplerian_positions(elements, body_names, reference_date, days_from_reference,
+                            time_offsets=None, rates=None):
+    """
+    Heliocentric positions from mean Keplerian elements, without astropy
+    elements: {body: {'a', 'e', 'i', 'Omega', 'omega', 'L0'}} at J2000.0 (AU and degrees,
+    ecliptic; omega is the argument of perihelion, L0 the mean longitude)
+    rates: optional {body: {...}} secular rates per Julian century for the same keys;
+    the 'L0' rate is the mean motion. Elements without a rate stay fixed, and a missing
+    'L0' rate is the mean motion that follows from a by Kepler's third law
+    Other arguments and the result match get_heliocentric_positions: a (bodies x epochs x 3)
+    array in AU, rotated into the same equatorial (ICRS-aligned) frame
+    """
+    time_offsets = time_offsets or {}
+    rates = rates or {}
+
+    days = np.asarray(days_from_reference, dtype=float)
+    names = ('a', 'e', 'i', 'Omega', 'omega', 'L0')
+
+    # Julian centuries since J2000 for every body and epoch, shape (bodies, epochs)
+    jd = julian_date(reference_date) + days[None, :] + np.array(
+        [[time_offsets.get(name, 0)] for name in body_names])
+    T = (jd - J2000_JD) / DAYS_PER_CENTURY
+
+    # Elements at every epoch (struct of arrays), with their secular drift if given
+    el = {}
+    for key in names:
+        if key == 'L0':
+            # Mean motion from Kepler's third law, degrees per century
+            defaults = [GAUSS_K_DEG / elements[name]['a']**1.5 * DAYS_PER_CENTURY for name in body_names]
+        else:
+            defaults = [0.0] * len(body_names)
+        base = np.array([[elements[name][key]] for name in body_names])
+        rate = np.array([[rates.get(name, {}).get(key, default)] for name, default in zip(body_names, defaults)])
+        el[key] = base + rate * T
+
+    # Mean anomaly M = L - varpi, with varpi = Omega + omega the longitude of perihelion
+    M = np.radians(el['L0'] - el['Omega'] - el['omega'])
+    E = solve_kepler_elliptic_batch(M, el['e'])
+
+    # Perifocal coordinates, then orbit orientation in the ecliptic frame
+    x_p = el['a'] * (np.cos(E) - el['e'])
+    y_p = el['a'] * np.sqrt(1 - el['e']**2) * np.sin(E)
+    P, Q = perifocal_basis(el['i'], el['Omega'], el['omega'])
+    return ecliptic_to_equatorial(x_p[..., None] * P + y_p[..., None] * Q)
+
+
+def get_keplerian_orbit(elements, planet_name, center_date, num_points=300, rates=None):
+    """
+    Orbit polyline from mean Keplerian elements, sampled like get_planetary_orbit_from_ephemeris
+    over one orbital period centred on center_date
+    Returns x, y, z arrays in the same frame as get_keplerian_positions
+    """
+    period_days = 360 / (GAUSS_K_DEG / elements[planet_name]['a']**1.5)
+    days = (np.linspace(0, 1, num_points) - 0.5) * period_days
+    positions = get_keplerian_positions(elements, [planet_name], center_date, days, rates=rates)[0]
+    return positions[:, 0], positions[:, 1], positions[:, 2]
@@ -0,0 +1,88 @@
+"""
+Frame manifest for incremental, resumable rendering
+Records a content hash of each frame's inputs and of the PNG written for it,
+so reruns only render frames that are missing or stale
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+MANIFEST_VERSION = 1
+
+
+def _to_jsonable(value):
+    """Convert numpy scalars/arrays (recursively) into plain JSON types"""
+    if isinstance(value, dict):
+        return {key: _to_jsonable(val) for key, val in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(val) for val in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def hash_inputs(*parts):
+    """Stable SHA-256 of JSON-serializable frame inputs (numpy values allowed)"""
+    payload = json.dumps(_to_jsonable(parts), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def hash_file(path, block_size=1024 * 1024):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FrameManifest:
+    """
+    JSON manifest mapping frame number -> {'inputs': hash, 'output': hash}
+    A frame is current when its inputs hash matches and the file on disk
+    still has the recorded output hash
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.frames = {}
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == MANIFEST_VERSION:
+            self.frames = data.get('frames', {})
+
+    def is_current(self, frame, inputs_hash, output_path):
+        entry = self.frames.get(str(frame))
+        if entry is None or entry.get('inputs') != inputs_hash:
+            return False
+        try:
+            return hash_file(output_path) == entry.get('output')
+        except OSError:
+            return False
+
+    def record(self, frame, inputs_hash, output_path):
+        """Record a freshly written frame file"""
+        self.frames[str(frame)] = {'inputs': inputs_hash, 'output': hash_file(output_path)}
+
+    def prune(self, keep_frames):
+        """Drop entries for frames no longer in the animation, returning their numbers"""
+        keep = {str(frame) for frame in keep_frames}
+        removed = [int(frame) for frame in self.frames if frame not in keep]
+        for frame in removed:
+            del self.frames[str(frame)]
+        return sorted(removed)
+
+    def save(self):
+        """Write the manifest atomically so a crash never leaves it half-written"""
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': MANIFEST_VERSION, 'frames': self.frames}, f, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,270 @@
+"""
+Lock-file work queue for rendering one animation on several nodes
+The frames are split into fixed units of consecutive frames on a shared directory.
+A node claims a unit by creating its lock file with O_EXCL, keeps the lock fresh
+while rendering (heartbeat), and marks the unit done with the hashes of the frames
+it wrote. A lock older than the lease belongs to a dead node and is taken over by
+the next node looking for work, so its unit is rendered again. Only atomic file
+operations (exclusive create, rename, hard link) are used, which also hold on NFS.
+
+Layout of queue_dir:
+    queue.json                  frame count, unit size and scene fingerprint
+    frames/frame_XXXX.png       rendered frames
+    locks/unit_XXXXX.lock       claimed units: owner node, refreshed by its heartbeat
+    done/unit_XXXXX.json        finished units: {frame: sha256 of its PNG}
+"""
+
+import json
+import os
+import socket
+import time
+
+from frame_manifest import hash_file
+
+QUEUE_VERSION = 1
+
+# Frames per work unit
+UNIT_SIZE = 50
+
+# Seconds without a heartbeat after which a claimed unit is reassigned; must exceed the
+# time to render one frame plus any clock skew between nodes
+LEASE_SECONDS = 120
+
+# Seconds between checks for reassignable units while other nodes finish theirs
+POLL_SECONDS = 2
+
+
+class FrameQueue:
+    """
+    Create or join the queue in queue_dir. Nodes joining an existing queue must render
+    the same animation: total_frames, unit_size and fingerprint are checked against it
+    total_frames None only opens an existing queue (e.g. to stitch it)
+    """
+
+    def __init__(self, queue_dir, total_frames=None, unit_size=UNIT_SIZE, fingerprint=None,
+                 lease_seconds=LEASE_SECONDS):
+        self.queue_dir = queue_dir
+        self.frames_dir = os.path.join(queue_dir, 'frames')
+        self.locks_dir = os.path.join(queue_dir, 'locks')
+        self.done_dir = os.path.join(queue_dir, 'done')
+        self.lease_seconds = lease_seconds
+        self.node_id = f'{socket.gethostname()}:{os.getpid()}'
+
+        config_path = os.path.join(queue_dir, 'queue.json')
+        if total_frames is not None:
+            for path in (self.frames_dir, self.locks_dir, self.done_dir):
+                os.makedirs(path, exist_ok=True)
+            config = {'version': QUEUE_VERSION, 'total_frames': total_frames, 'unit_size': unit_size,
+                      'fingerprint': fingerprint}
+            # Publish the complete file under its final name only if no other node did first
+            tmp_path = f'{config_path}.{self.node_id.replace(":", "-")}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(config, f, sort_keys=True)
+            try:
+                os.link(tmp_path, config_path)
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(tmp_path)
+
+        try:
+            with open(config_path) as f:
+                config = json.load(f)
+        except OSError:
+            raise FileNotFoundError(f'No frame queue in {queue_dir}') from None
+        if config.get('version') != QUEUE_VERSION:
+            raise ValueError(f'{config_path} has an unsupported queue version')
+        if total_frames is not None:
+            differences = []
+            if config['total_frames'] != total_frames:
+                differences.append(f'{config["total_frames"]} frames, not {total_frames}')
+            if config['unit_size'] != unit_size:
+                differences.append(f'units of {config["unit_size"]}, not {unit_size}')
+            if config['fingerprint'] != fingerprint:
+                differences.append('scene fingerprint differs (different ephemeris/trajectory/renderer options)')
+            if differences:
+                raise ValueError(f'{queue_dir} holds a different render: {"; ".join(differences)}. '
+                                 f'Use the same options on every node or a new directory')
+
+        self.total_frames = config['total_frames']
+        self.unit_size = config['unit_size']
+        self.num_units = -(-self.total_frames // self.unit_size)
+
+    def unit_frames(self, unit):
+        """Frame numbers of a unit"""
+        return range(unit * self.unit_size, min((unit + 1) * self.unit_size, self.total_frames))
+
+    def units_in_range(self, start, end):
+        """Units overlapping the frames [start, end)"""
+        return [unit for unit in range(self.num_units)
+                if unit * self.unit_size < end and start < (unit + 1) * self.unit_size]
+
+    def _lock_path(self, unit):
+        return os.path.join(self.locks_dir, f'unit_{unit:05d}.lock')
+
+    def _done_path(self, unit):
+        return os.path.join(self.done_dir, f'unit_{unit:05d}.json')
+
+    def is_done(self, unit):
+        return os.path.exists(self._done_path(unit))
+
+    def _try_lock(self, unit):
+        """Create the unit's lock file if nobody holds it"""
+        try:
+            fd = os.open(self._lock_path(unit), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w') as f:
+            f.write(self.node_id)
+        # The unit may have been finished between the done check and the lock
+        if self.is_done(unit):
+            os.remove(self._lock_path(unit))
+            return False
+        return True
+
+    @staticmethod
+    def _read_lock(path):
+        """(seconds since the lock's last heartbeat, owner node) of a lock file, or None if missing"""
+        try:
+            age = time.time() - os.stat(path).st_mtime
+            with open(path) as f:
+                return age, f.read()
+        except FileNotFoundError:
+            return None
+
+    def _set_aside(self, unit, suffix):
+        """
+        Atomically move the unit's lock out of the way (only one node can win the rename)
+        Returns the new path and the (age, owner) of the lock that was moved, or None if unlocked
+        """
+        path = f'{self._lock_path(unit)}.{self.node_id.replace(":", "-")}.{suffix}'
+        try:
+            os.rename(self._lock_path(unit), path)
+        except FileNotFoundError:
+            return None
+        # Renaming keeps the modification time, so this is the age of the heartbeat that was moved
+        return path, self._read_lock(path)
+
+    def _put_back(self, unit, path):
+        """Restore a lock moved by _set_aside, unless a node locked the unit again meanwhile"""
+        try:
+            os.link(path, self._lock_path(unit))
+        except FileExistsError:
+            pass
+        os.remove(path)
+
+    def _take_over(self, unit, expired_owner):
+        """
+        Reassign a unit whose lock, held by expired_owner, has expired
+        Between the age check and the rename another node may have taken the unit over, or
+        the owner refreshed its lock: a lock that is fresh or has another owner is put back
+        """
+        moved = self._set_aside(unit, 'expired')
+        if moved is None:
+            return False
+        path, (age, owner) = moved
+        if age <= self.lease_seconds or owner != expired_owner:
+            self._put_back(unit, path)
+            return False
+        os.remove(path)
+        return self._try_lock(unit)
+
+    def claim(self, preferred=()):
+        """
+        Claim the next unit, preferred units first: free ones, then ones whose owner
+        stopped sending heartbeats. Returns the unit number, or None if every unit
+        is done or held by a live node
+        """
+        preferred = list(preferred)
+        others = [unit for unit in range(self.num_units) if unit not in set(preferred)]
+        candidates = [unit for unit in preferred + others if not self.is_done(unit)]
+        for unit in candidates:
+            if self._try_lock(unit):
+                return unit
+        for unit in candidates:
+            lock = self._read_lock(self._lock_path(unit))
+            if lock is None:
+                continue
+            age, owner = lock
+            if age > self.lease_seconds and self._take_over(unit, owner):
+                print(f"[QUEUE] Unit {unit} was abandoned ({age:.0f} s without a heartbeat), reassigned "
+                      f"to {self.node_id}")
+                return unit
+        return None
+
+    def owns(self, unit):
+        try:
+            with open(self._lock_path(unit)) as f:
+                return f.read() == self.node_id
+        except FileNotFoundError:
+            return False
+
+    def heartbeat(self, unit):
+        """Refresh the claim on a unit being rendered; False if it was reassigned to another node"""
+        if not self.owns(unit):
+            return False
+        try:
+            os.utime(self._lock_path(unit))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def complete(self, unit, frame_path):
+        """
+        Mark a rendered unit done, recording the hash of every frame file
+        frame_path: callable(frame) -> path of the frame's PNG
+        Returns False if the unit was reassigned meanwhile (its new owner completes it)
+        """
+        if not self.owns(unit):
+            return False
+        hashes = {str(frame): hash_file(frame_path(frame)) for frame in self.unit_frames(unit)}
+        tmp_path = f'{self._done_path(unit)}.{self.node_id.replace(":", "-")}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'node': self.node_id, 'frames': hashes}, f, sort_keys=True)
+
+        # Take the lock out of play before publishing, so a takeover since the ownership check
+        # can't race with it: if the lock set aside is no longer ours, leave it to its owner
+        moved = self._set_aside(unit, 'completing')
+        if moved is None or moved[1][1] != self.node_id:
+            if moved is not None:
+                self._put_back(unit, moved[0])
+            os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, self._done_path(unit))
+        os.remove(moved[0])
+        return True
+
+    def remaining(self):
+        """Number of units not done yet"""
+        return sum(not self.is_done(unit) for unit in range(self.num_units))
+
+    def verify(self, frame_path):
+        """
+        Check that the animation is complete: every unit done and every frame file
+        present with the hash recorded when it was rendered
+        frame_path: callable(frame) -> path of the frame's PNG
+        Returns (unfinished units, missing or changed frames)
+        """
+        unfinished, bad_frames = [], []
+        for unit in range(self.num_units):
+            try:
+                with open(self._done_path(unit)) as f:
+                    hashes = json.load(f)['frames']
+            except (OSError, ValueError, KeyError):
+                unfinished.append(unit)
+                continue
+            for frame in self.unit_frames(unit):
+                try:
+                    if hash_file(frame_path(frame)) != hashes.get(str(frame)):
+                        bad_frames.append(frame)
+                except OSError:
+                    bad_frames.append(frame)
+        return unfinished, bad_frames
+
+    def reopen(self, units):
+        """Forget that units are done, e.g. after their frames were found missing, so they render again"""
+        for unit in units:
+            try:
+                os.remove(self._done_path(unit))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,186 @@
+"""
+Stream rendered frames straight into ffmpeg as raw video
+Avoids writing and re-decoding intermediate PNG files; one stream can be encoded
+into several renditions (MP4 sizes, GIF) at once
+"""
+
+import os
+import shutil
+import subprocess
+
+from tracing import TRACER
+
+
+def find_ffmpeg():
+    """create_video.py's bundled ffmpeg if present, else the one on the PATH (None if neither)"""
+    import create_video
+
+    return create_video.FFMPEG_PATH if os.path.exists(create_video.FFMPEG_PATH) else shutil.which('ffmpeg')
+
+
+def ffmpeg_available(ffmpeg_path=None):
+    """True if the ffmpeg executable can be found: ffmpeg_path, or else the bundled or PATH one"""
+    if ffmpeg_path is None:
+        return find_ffmpeg() is not None
+    return os.path.exists(ffmpeg_path) or shutil.which(ffmpeg_path) is not None
+
+
+# Renditions encoded from one frame stream: description, output file name, filter chain
+# from the rendered frames, ffmpeg output options, and whether the chain ends with
+# per-frame palette generation (GIF). 'mp4' is the native-size video the pipeline has always written
+RENDITIONS = {
+    'mp4': {
+        'description': 'high-quality video',
+        'file': 'comet_3i_atlas_cinematic.mp4',
+        'filter': 'null',
+        'args': ['-c:v', 'libx264', '-crf', '18', '-preset', 'slow', '-pix_fmt', 'yuv420p'],
+    },
+    '1080p': {
+        'description': 'Full HD video',
+        'file': 'comet_3i_atlas_1080p.mp4',
+        'filter': 'scale=1920:1080:force_original_aspect_ratio=decrease:flags=lanczos,'
+                  'pad=1920:1080:(ow-iw)/2:(oh-ih)/2',
+        'args': ['-c:v', 'libx264', '-crf', '15', '-preset', 'slow', '-profile:v', 'high', '-tune', 'film',
+                 '-pix_fmt', 'yuv420p'],
+    },
+    # Scaled up from the rendered frames: render a larger figure for true 4K detail
+    '4k': {
+        'description': '4K master',
+        'file': 'comet_3i_atlas_4k.mp4',
+        'filter': 'scale=3840:2160:force_original_aspect_ratio=decrease:flags=lanczos,'
+                  'pad=3840:2160:(ow-iw)/2:(oh-ih)/2',
+        'args': ['-c:v', 'libx264', '-crf', '12', '-preset', 'slow', '-profile:v', 'high', '-tune', 'film',
+                 '-pix_fmt', 'yuv420p'],
+    },
+    # Every frame at 10 fps; a palette per frame keeps the stream from being buffered
+    # until the end, as a single palette for the whole GIF would require
+    'gif': {
+        'description': 'quick preview',
+        'file': 'comet_3i_preview.gif',
+        'filter': 'settb=1/10,setpts=N,scale=800:-2:flags=lanczos',
+        'args': ['-r', '10'],
+        'palette': True,
+    },
+}
+DEFAULT_RENDITIONS = ('mp4', 'gif')
+
+
+def rendition_output_args(outputs):
+    """
+    ffmpeg arguments encoding every (rendition name, output file) of outputs from input 0
+    in one pass: the decoded frames are split once and each branch filtered and encoded
+    """
+    branches = [f'[0:v]split={len(outputs)}' + ''.join(f'[in{k}]' for k in range(len(outputs)))]
+    args = []
+    for k, (name, output_file) in enumerate(outputs):
+        rendition = RENDITIONS[name]
+        chain = f"[in{k}]{rendition['filter']}"
+        if rendition.get('palette'):
+            chain += (f',split[pal{k}][gif{k}];[pal{k}]palettegen=stats_mode=single[p{k}];'
+                      f'[gif{k}][p{k}]paletteuse=new=1')
+        branches.append(f'{chain}[out{k}]')
+        args += ['-map', f'[out{k}]', *rendition['args'], output_file]
+    return ['-filter_complex', ';'.join(branches), *args, '-y']  # Overwrite output files
+
+
+def encode_png_sequence(pattern, outputs, fps=15, ffmpeg_path='ffmpeg'):
+    """
+    Encode numbered PNG frames (e.g. 'output/frame_%04d.png') into every
+    (rendition name, output file) of outputs in one pass; raises RuntimeError if encoding failed
+    """
+    cmd = [
+        ffmpeg_path,
+        '-loglevel', 'error',
+        '-framerate', str(fps),
+        '-i', pattern,
+        *rendition_output_args(outputs),
+    ]
+    with TRACER.span('video encode'):
+        returncode = subprocess.run(cmd).returncode
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with code {returncode} while writing "
+                           f"{', '.join(output_file for _, output_file in outputs)}")
+
+
+def _raw_input_args(ffmpeg_path, width, height, fps):
+    """ffmpeg command reading raw RGBA frames from stdin"""
+    return [
+        ffmpeg_path,
+        '-loglevel', 'error',
+        '-f', 'rawvideo',
+        '-pix_fmt', 'rgba',
+        '-s', f'{width}x{height}',
+        '-framerate', str(fps),
+        '-i', 'pipe:0',
+    ]
+
+
+class FFmpegFrameWriter:
+    """
+    Pipe raw RGBA frames into an ffmpeg subprocess encoding an H.264 MP4
+    write() accepts any buffer (e.g. canvas.buffer_rgba()) and passes it to
+    ffmpeg's stdin without copying
+    output_args: ffmpeg output options replacing the H.264 encode of output_file (crf, preset)
+    """
+
+    def __init__(self, output_file, width, height, fps=15, crf=18, preset='slow',
+                 ffmpeg_path='ffmpeg', output_args=None):
+        self.output_file = output_file
+        self.frame_bytes = width * height * 4
+        self.frames_written = 0
+
+        if output_args is None:
+            output_args = [
+                '-c:v', 'libx264',
+                '-crf', str(crf),
+                '-preset', preset,
+                '-pix_fmt', 'yuv420p',
+                output_file,
+                '-y'  # Overwrite output file
+            ]
+        cmd = [*_raw_input_args(ffmpeg_path, width, height, fps), *output_args]
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        """Send one RGBA frame of exactly width*height*4 bytes"""
+        if memoryview(frame).nbytes != self.frame_bytes:
+            raise ValueError(f'Frame has {memoryview(frame).nbytes} bytes, expected {self.frame_bytes}')
+        # Blocks while ffmpeg's pipe is full, so this also measures encoding back-pressure
+        with TRACER.span('ffmpeg write'):
+            self.process.stdin.write(frame)
+        self.frames_written += 1
+
+    def close(self):
+        """Finish the stream and wait for ffmpeg; raises RuntimeError if encoding failed"""
+        if self.process.stdin and not self.process.stdin.closed:
+            try:
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+        with TRACER.span('ffmpeg finish'):
+            returncode = self.process.wait()
+        if returncode != 0:
+            raise RuntimeError(f'ffmpeg exited with code {returncode} while writing {self.output_file}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            # Don't leave a half-written video behind a rendering error
+            self.process.kill()
+            self.process.wait()
+            return False
+        self.close()
+        return False
+
+
+class FFmpegRenditionWriter(FFmpegFrameWriter):
+    """
+    Pipe raw RGBA frames into one ffmpeg subprocess encoding several renditions at once
+    outputs: (rendition name, output file) pairs, names from RENDITIONS
+    """
+
+    def __init__(self, outputs, width, height, fps=15, ffmpeg_path='ffmpeg'):
+        super().__init__(', '.join(output_file for _, output_file in outputs), width, height, fps,
+                         ffmpeg_path=ffmpeg_path, output_args=rendition_output_args(outputs))
@@ -1,16 +1,24 @@
 #!/usr/bin/env python3
 """
 Script to generate the complete Comet 3I/ATLAS animation and video
-This creates the full 400-frame cinematic animation
+comet_3i_animation.py encodes the video itself when it finds ffmpeg; create_video.py
+is only run to encode its PNG frames when it did not
 """
 
 import os
 import subprocess
 import sys
+import time
+
+from comet_3i_animation import total_frames
+from frame_stream import RENDITIONS
+
+# Main video written by comet_3i_animation.py, or by create_video.py from the PNG frames
+VIDEO_FILE = os.path.join('output', RENDITIONS['mp4']['file'])
 
 def run_animation():
     """Run the animation script to generate frames"""
-    print("🎬 Generating Full Cinematic Animation (400 frames)...")
+    print(f"🎬 Generating Full Cinematic Animation ({total_frames} frames)...")
     print("=" * 60)
 
     try:
@@ -52,19 +60,22 @@ def main():
     print("🌟 COMET 3I/ATLAS - FINAL CINEMATIC ANIMATION GENERATOR 🌟")
     print("=" * 70)
     print("This will generate:")
-    print("  • 400 high-quality animation frames")
-    print("  • Cinematic MP4 video (26 seconds at 15fps)")
+    print(f"  • {total_frames} high-quality animation frames")
+    print(f"  • Cinematic MP4 video ({total_frames / 15:.0f} seconds at 15fps)")
     print("  • Preview GIF")
     print("Estimated time: 10-15 minutes")
     print("=" * 70)
 
     # Step 1: Generate animation
+    started = time.time()
     if not run_animation():
         print("\n❌ Animation generation failed. Cannot continue.")
         return False
 
-    # Step 2: Create video
-    if not create_video():
+    # Step 2: Create video from the PNG frames, unless the animation script already encoded it
+    if os.path.exists(VIDEO_FILE) and os.path.getmtime(VIDEO_FILE) >= started:
+        print("[SUCCESS] Video encoded by the animation script")
+    elif not create_video():
         print("\n❌ Video creation failed.")
         return False
 
@@ -73,9 +84,12 @@ def main():
     print("✨ SUCCESS! Final animation completed! ✨")
     print("=" * 70)
     print("📁 Files created in 'output/' folder:")
-    print("   • comet_3i_atlas_cinematic.mp4 (MAIN VIDEO)")
-    print("   • comet_3i_preview.gif (preview)")
-    print("   • frame_*.png (individual frames)")
+    print(f"   • {os.path.basename(VIDEO_FILE)} (MAIN VIDEO)")
+    for gif_file in (RENDITIONS['gif']['file'], 'comet_3i_atlas_animation.gif'):
+        if os.path.exists(os.path.join('output', gif_file)):
+            print(f"   • {gif_file} (preview)")
+    if os.path.exists(os.path.join('output', 'frame_0000.png')):
+        print("   • frame_*.png (individual frames)")
     print("")
     print("🎯 Ready for LinkedIn sharing!")
     print("   Use the text from linkedin_post.md")
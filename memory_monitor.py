@@ -0,0 +1,136 @@
+"""
+Memory sampling for long renders
+Records the Python heap (tracemalloc) and the resident set size of the process every
+`interval` frames, and reports their growth per 1000 frames. Growth is the slope of a
+least-squares line through the samples after warm-up, so one-off allocations (fonts,
+caches filled by the first frames and figure rebuilds) don't count as drift.
+"""
+
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+
+# Frames between samples
+SAMPLE_FRAMES = 1000
+
+MB = 1024 * 1024
+
+
+def _windows_working_set():
+    """Current working set of this process in bytes, from psapi's GetProcessMemoryInfo"""
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    get_current_process = ctypes.windll.kernel32.GetCurrentProcess
+    get_current_process.restype = wintypes.HANDLE
+    get_memory_info = ctypes.WinDLL('psapi').GetProcessMemoryInfo
+    get_memory_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+    get_memory_info.restype = wintypes.BOOL
+    if not get_memory_info(get_current_process(), ctypes.byref(counters), counters.cb):
+        return None
+    return counters.WorkingSetSize
+
+
+def rss_bytes():
+    """
+    Resident set size of this process in bytes: current on Linux and Windows (working set),
+    peak where only getrusage is available, None if none of them is
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    if sys.platform == 'win32':
+        try:
+            return _windows_working_set()
+        except (OSError, AttributeError):
+            return None
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class MemoryMonitor:
+    """
+    Sample memory while frames are rendered: call update() after every frame
+    trace_python: also track the Python heap with tracemalloc (slows allocations down)
+    label: prefix of the printed samples, e.g. the worker process
+    warmup_frames: samples up to this many frames are left out of the growth, e.g. until
+    the first figure rebuilds have filled matplotlib's caches
+    """
+
+    def __init__(self, interval=SAMPLE_FRAMES, trace_python=True, label='MEMORY', warmup_frames=0):
+        self.interval = interval
+        self.label = label
+        self.warmup_frames = warmup_frames
+        # (frames rendered, Python heap bytes or None, RSS bytes or None)
+        self.samples = []
+        self._owns_tracemalloc = trace_python and not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start()
+        self.sample(0)
+
+    def sample(self, frames):
+        """Record the memory use after `frames` frames"""
+        heap, rss = None, rss_bytes()
+        if tracemalloc.is_tracing():
+            heap = tracemalloc.get_traced_memory()[0]
+            # tracemalloc's own tables grow with every new allocation site, leave them out
+            if rss is not None:
+                rss -= tracemalloc.get_tracemalloc_memory()
+        self.samples.append((frames, heap, rss))
+
+    def update(self, frames):
+        """Sample (and print) every interval frames; frames is the number rendered so far"""
+        if frames % self.interval == 0:
+            self.sample(frames)
+            print(f"[{self.label}] {self.describe()}")
+
+    def growth(self):
+        """
+        Growth of the Python heap and of the RSS in bytes per 1000 frames, each None if
+        not measured or with fewer than two samples after warm-up
+        """
+        samples = [sample for sample in self.samples if sample[0] > self.warmup_frames]
+        frames = np.array([sample[0] for sample in samples], dtype=float)
+        rates = []
+        for column in (1, 2):
+            values = [sample[column] for sample in samples]
+            if len(samples) < 2 or None in values:
+                rates.append(None)
+            else:
+                rates.append(float(np.polyfit(frames, values, 1)[0]) * 1000)
+        return tuple(rates)
+
+    def describe(self):
+        """Latest sample and growth rates as one line"""
+        frames, heap, rss = self.samples[-1]
+        heap_growth, rss_growth = self.growth()
+        parts = [f'{frames} frames']
+        for name, value, rate in (('heap', heap, heap_growth), ('RSS', rss, rss_growth)):
+            if value is not None:
+                parts.append(f'{name} {value / MB:.1f} MB' +
+                             (f' ({rate / MB:+.2f} MB/1000 frames)' if rate is not None else ''))
+        return ', '.join(parts)
+
+    def stop(self):
+        """Stop tracemalloc if this monitor started it"""
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
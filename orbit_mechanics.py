@@ -0,0 +1,294 @@
+"""
+Orbit mechanics helpers for the Comet 3I/ATLAS animation
+Pure NumPy routines that can be imported without pulling in matplotlib/astropy
+"""
+
+import math
+
+import numpy as np
+
+GM_SUN = 4 * np.pi**2 / 365.25**2  # AU^3/day^2
+
+# Eccentricities within this distance of 1 are propagated as parabolic orbits
+PARABOLIC_TOL = 1e-9
+
+
+def _hyperbolic_starter(M, e):
+    """
+    Starting guess for M = e*sinh(H) - H with M >= 0, accurate over the whole range of M
+    Near perihelion the cubic sinh(H) ≈ H + H³/6, solved in closed form, bounds H from above;
+    far out the asymptotic asinh(M/e), refined by one fixed-point step, bounds it from below.
+    The guess with the smaller residual is kept, so Halley's method needs ≤ 4 steps for |M| ≤ 1e6
+    """
+    s = np.sqrt(2 * (e - 1) / e)
+    H_cubic = 2 * s * np.sinh(np.arcsinh(1.5 * M / ((e - 1) * s)) / 3)
+    H_asymptotic = np.arcsinh((M + np.arcsinh(M / e)) / e)
+    f_cubic = e * np.sinh(H_cubic) - H_cubic - M
+    f_asymptotic = e * np.sinh(H_asymptotic) - H_asymptotic - M
+    return np.where(np.abs(f_cubic) < np.abs(f_asymptotic), H_cubic, H_asymptotic)
+
+
+def solve_kepler_hyperbolic(M, e, tol=1e-10, max_iter=100):
+    """
+    Solve Kepler's equation for hyperbolic orbits: M = e*sinh(H) - H
+    Returns hyperbolic eccentric anomaly H; raises ValueError unless e > 1
+    """
+    if not e > 1:
+        raise ValueError(f'Hyperbolic orbits need e > 1, got e = {e}')
+    # The equation is odd in H: solve for |M| and restore the sign
+    x = abs(M)
+    # Same starting guess as _hyperbolic_starter(), without NumPy's per-call overhead
+    H = math.asinh((x + math.asinh(x / e)) / e)
+    s = math.sqrt(2 * (e - 1) / e)
+    H_cubic = 2 * s * math.sinh(math.asinh(1.5 * x / ((e - 1) * s)) / 3)
+    if abs(e * math.sinh(H_cubic) - H_cubic - x) < abs(e * math.sinh(H) - H - x):
+        H = H_cubic
+
+    for _ in range(max_iter):
+        e_sinh = e * math.sinh(H)
+        f = e_sinh - H - x
+        df = e * math.cosh(H) - 1
+
+        # Halley step: cubic convergence, using f'' = e*sinh(H)
+        step = f / (df - 0.5 * f * e_sinh / df)
+        H -= step
+        if abs(step) < tol:
+            break
+
+    return math.copysign(H, M)
+
+
+def solve_kepler_hyperbolic_batch(M, e, tol=1e-10, max_iter=100, return_iterations=False):
+    """
+    Vectorized solver for Kepler's hyperbolic equation over a whole time grid
+    M may be any array of mean anomalies; e is a scalar or broadcasts against M, all > 1
+    Halley steps are only applied to elements that have not converged yet
+    Returns (H, theta): hyperbolic eccentric anomalies and true anomalies (radians),
+    plus the number of steps taken for each element if return_iterations
+    """
+    M = np.asarray(M, dtype=float)
+    flat_M = np.abs(M.ravel())
+    flat_e = np.broadcast_to(np.asarray(e, dtype=float), M.shape).ravel()
+    if not np.all(flat_e > 1):
+        raise ValueError('Hyperbolic orbits need e > 1')
+
+    # Same initial guess as the scalar solver
+    H = _hyperbolic_starter(flat_M, flat_e)
+    iterations = np.zeros(flat_M.size, dtype=int)
+
+    # Indices of elements still iterating
+    active = np.arange(flat_M.size)
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+
+        H_act = H[active]
+        e_act = flat_e[active]
+        e_sinh = e_act * np.sinh(H_act)
+        f = e_sinh - H_act - flat_M[active]
+        df = e_act * np.cosh(H_act) - 1
+        step = f / (df - 0.5 * f * e_sinh / df)
+
+        H[active] = H_act - step
+        iterations[active] += 1
+        active = active[np.abs(step) >= tol]
+
+    H = np.copysign(H.reshape(M.shape), M)
+    e_full = flat_e.reshape(M.shape)
+
+    # True anomaly θ = 2 * arctan[sqrt((e+1)/(e-1)) * tanh(H/2)]
+    theta = 2 * np.arctan(np.sqrt((e_full + 1) / (e_full - 1)) * np.tanh(H / 2))
+
+    if return_iterations:
+        return H, theta, iterations.reshape(M.shape)
+    return H, theta
+
+
+def solve_kepler_elliptic_batch(M, e, tol=1e-10, max_iter=100):
+    """
+    Vectorized solver for Kepler's elliptic equation M = E - e*sin(E)
+    M may be any array of mean anomalies; e is a scalar or broadcasts against M
+    Returns the eccentric anomalies E (radians), in the same 2π branch as M
+    """
+    M = np.asarray(M, dtype=float)
+    flat_M = M.ravel()
+    flat_e = np.broadcast_to(np.asarray(e, dtype=float), M.shape).ravel()
+
+    # Solve on M wrapped to [-π, π) and add the whole revolutions back at the end
+    revolutions = np.round(flat_M / (2 * np.pi)) * 2 * np.pi
+    M_wrapped = flat_M - revolutions
+
+    # Starting guess from the cubic sin(E) ≈ E - E³/6, solved in closed form: accurate
+    # near perihelion of near-parabolic orbits, where Newton is slowest (≤ 5 steps for any e < 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.sqrt(2 * (1 - flat_e) / flat_e)
+        E = 2 * s * np.sinh(np.arcsinh(1.5 * M_wrapped / ((1 - flat_e) * s)) / 3)
+    # Circular orbits (s = inf) have E = M
+    E = np.clip(np.where(np.isfinite(E), E, M_wrapped), -np.pi, np.pi)
+
+    # Indices of elements still iterating
+    active = np.arange(flat_M.size)
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+
+        E_act = E[active]
+        e_act = flat_e[active]
+        f = E_act - e_act * np.sin(E_act) - M_wrapped[active]
+        df = 1 - e_act * np.cos(E_act)
+        step = f / df
+
+        E[active] = E_act - step
+        active = active[np.abs(step) >= tol]
+
+    return (E + revolutions).reshape(M.shape)
+
+
+def perifocal_basis(i, Omega, omega):
+    """
+    Unit vectors P (towards perihelion) and Q (90° ahead in the orbit plane) in
+    ecliptic coordinates, for scalar or array angles in degrees
+    Returns P, Q with shape (..., 3)
+    """
+    i_rad, Omega_rad, omega_rad = np.radians(i), np.radians(Omega), np.radians(omega)
+    cos_O, sin_O = np.cos(Omega_rad), np.sin(Omega_rad)
+    cos_w, sin_w = np.cos(omega_rad), np.sin(omega_rad)
+    cos_i, sin_i = np.cos(i_rad), np.sin(i_rad)
+
+    P = np.stack([cos_O * cos_w - sin_O * sin_w * cos_i,
+                  sin_O * cos_w + cos_O * sin_w * cos_i,
+                  sin_w * sin_i], axis=-1)
+    Q = np.stack([-cos_O * sin_w - sin_O * cos_w * cos_i,
+                  -sin_O * sin_w + cos_O * cos_w * cos_i,
+                  cos_w * sin_i], axis=-1)
+    return P, Q
+
+
+def propagate_orbits(q, e, i, Omega, omega, t_perihelion, epochs, gm=GM_SUN):
+    """
+    Heliocentric positions of many objects at many epochs in one vectorized call
+    Elements are struct-of-arrays, one entry per object (scalars broadcast):
+    q perihelion distance (AU), e eccentricity, i/Omega/omega angles (degrees),
+    t_perihelion time of perihelion in the same day units as epochs
+    Elliptic (e < 1), parabolic (e = 1) and hyperbolic (e > 1) orbits may be mixed
+    Returns an (objects x epochs x 3) array in AU
+    """
+    q, e, i, Omega, omega, t_perihelion = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(value, dtype=float)) for value in (q, e, i, Omega, omega, t_perihelion)))
+    epochs = np.atleast_1d(np.asarray(epochs, dtype=float))
+
+    # Time since perihelion of every object at every epoch
+    dt = epochs[None, :] - t_perihelion[:, None]
+
+    # Perifocal coordinates: x towards perihelion, y along the direction of motion
+    x_p = np.empty(dt.shape)
+    y_p = np.empty(dt.shape)
+
+    elliptic = e < 1 - PARABOLIC_TOL
+    hyperbolic = e > 1 + PARABOLIC_TOL
+    parabolic = ~(elliptic | hyperbolic)
+
+    if elliptic.any():
+        e_ell = e[elliptic, None]
+        a = q[elliptic, None] / (1 - e_ell)
+        E = solve_kepler_elliptic_batch(np.sqrt(gm / a**3) * dt[elliptic], e_ell)
+        x_p[elliptic] = a * (np.cos(E) - e_ell)
+        y_p[elliptic] = a * np.sqrt(1 - e_ell**2) * np.sin(E)
+
+    if hyperbolic.any():
+        e_hyp = e[hyperbolic, None]
+        a = q[hyperbolic, None] / (1 - e_hyp)  # negative
+        H, _ = solve_kepler_hyperbolic_batch(np.sqrt(gm / np.abs(a)**3) * dt[hyperbolic], e_hyp)
+        x_p[hyperbolic] = a * (np.cosh(H) - e_hyp)
+        y_p[hyperbolic] = -a * np.sqrt(e_hyp**2 - 1) * np.sinh(H)
+
+    if parabolic.any():
+        # Barker's equation D + D³/3 = sqrt(gm / 2q³) * dt, with D = tan(θ/2), solved in closed form
+        q_par = q[parabolic, None]
+        B = np.sqrt(gm / (2 * q_par**3)) * dt[parabolic]
+        D = 2 * np.sinh(np.arcsinh(1.5 * B) / 3)
+        x_p[parabolic] = q_par * (1 - D**2)
+        y_p[parabolic] = 2 * q_par * D
+
+    P, Q = perifocal_basis(i, Omega, omega)
+    return x_p[:, :, None] * P[:, None, :] + y_p[:, :, None] * Q[:, None, :]
+
+
+class OrbitalElements:
+    """
+    One elliptic or hyperbolic orbit with its perifocal-to-ecliptic rotation matrix
+    computed once. Elements as in propagate_orbits (q AU, e, i/Omega/omega degrees);
+    times are days after perihelion
+    rotation: 3x3 matrix whose columns are P, Q and the orbit normal W, so that
+    ecliptic = rotation @ perifocal
+    """
+
+    __slots__ = ('q', 'e', 'i', 'Omega', 'omega', 'gm', 'a', 'n', 'rotation', '_plane')
+
+    def __init__(self, q, e, i, Omega, omega, gm=GM_SUN):
+        if abs(e - 1) <= PARABOLIC_TOL:
+            raise ValueError('OrbitalElements needs an elliptic or hyperbolic orbit; use propagate_orbits '
+                             'for parabolic ones')
+        self.q, self.e, self.i, self.Omega, self.omega, self.gm = q, e, i, Omega, omega, gm
+        self.a = q / (1 - e)  # negative for hyperbolic orbits
+        self.n = np.sqrt(gm / abs(self.a)**3)  # mean motion, rad/day
+
+        P, Q = perifocal_basis(i, Omega, omega)
+        self.rotation = np.column_stack([P, Q, np.cross(P, Q)])
+        # Orbit-plane rows of the transposed rotation: (..., 2) perifocal @ _plane -> (..., 3) ecliptic
+        self._plane = np.ascontiguousarray(self.rotation[:, :2].T)
+
+    def __repr__(self):
+        return (f'OrbitalElements(q={self.q!r}, e={self.e!r}, i={self.i!r}, Omega={self.Omega!r}, '
+                f'omega={self.omega!r})')
+
+    def state(self, dt):
+        """
+        Position (AU) and velocity (AU/day) dt days after perihelion, for a scalar or any array
+        Both are rotated to the ecliptic by a single matmul
+        Returns (position, velocity), each of shape dt.shape + (3,)
+        """
+        dt = np.asarray(dt, dtype=float)
+        a, e = self.a, self.e
+        perifocal = np.empty(dt.shape + (2, 2))
+
+        if e > 1:
+            H, _ = solve_kepler_hyperbolic_batch(self.n * dt, e)
+            cosh_H, sinh_H = np.cosh(H), np.sinh(H)
+            # dH/dt from differentiating M = e*sinh(H) - H
+            H_dot = self.n / (e * cosh_H - 1)
+            b = -a * np.sqrt(e**2 - 1)
+            perifocal[..., 0, 0] = a * (cosh_H - e)
+            perifocal[..., 0, 1] = b * sinh_H
+            perifocal[..., 1, 0] = a * sinh_H * H_dot
+            perifocal[..., 1, 1] = b * cosh_H * H_dot
+        else:
+            E = solve_kepler_elliptic_batch(self.n * dt, e)
+            cos_E, sin_E = np.cos(E), np.sin(E)
+            # dE/dt from differentiating M = E - e*sin(E)
+            E_dot = self.n / (1 - e * cos_E)
+            b = a * np.sqrt(1 - e**2)
+            perifocal[..., 0, 0] = a * (cos_E - e)
+            perifocal[..., 0, 1] = b * sin_E
+            perifocal[..., 1, 0] = -a * sin_E * E_dot
+            perifocal[..., 1, 1] = b * cos_E * E_dot
+
+        ecliptic = perifocal @ self._plane
+        return ecliptic[..., 0, :], ecliptic[..., 1, :]
+
+    def position_at_true_anomaly(self, theta):
+        """Position (AU) at true anomalies theta (radians), shape theta.shape + (3,)"""
+        theta = np.asarray(theta, dtype=float)
+        r = self.q * (1 + self.e) / (1 + self.e * np.cos(theta))
+        perifocal = np.stack([r * np.cos(theta), r * np.sin(theta)], axis=-1)
+        return perifocal @ self._plane
+
+
+def hyperbolic_state(q, e, i, Omega, omega, dt, gm=GM_SUN):
+    """
+    Position (AU) and velocity (AU/day) on a hyperbolic orbit dt days after perihelion
+    Elements as in propagate_orbits; dt may be a scalar or an array of epochs
+    Returns (position, velocity), each of shape dt.shape + (3,)
+    Builds the rotation each call: keep an OrbitalElements for repeated use
+    """
+    return OrbitalElements(q, e, i, Omega, omega, gm).state(dt)
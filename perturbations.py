@@ -0,0 +1,119 @@
+"""
+Perturbed heliocentric trajectory of Comet 3I/ATLAS
+Integrates the comet's motion under the Sun and the planets with an adaptive
+8th-order Runge-Kutta scheme (scipy's DOP853). The solution has dense output, so
+any number of frame epochs can be evaluated without integrating again.
+"""
+
+import numpy as np
+
+from ephemeris import equatorial_to_ecliptic
+from orbit_mechanics import GM_SUN
+
+# Sun mass / planet mass (planet plus satellites), IAU 2009 / DE430
+PLANET_MASS_RATIOS = {
+    'mercury': 6023600.0,
+    'venus': 408523.71,
+    'earth': 328900.56,  # Earth-Moon system
+    'mars': 3098708.0,
+    'jupiter': 1047.3486,
+    'saturn': 3497.898,
+}
+
+
+class PlanetTrack:
+    """
+    Planet positions at any time within a span, interpolated from ephemeris samples
+    planet_positions: callable(days) -> (bodies x epochs x 3) equatorial positions in AU,
+    e.g. a partial of ephemeris.get_heliocentric_positions or get_keplerian_positions
+    Positions are sampled every step_days and rotated into the ecliptic frame
+    """
+
+    def __init__(self, planet_positions, t_start, t_end, step_days=1.0):
+        from scipy.interpolate import CubicSpline
+
+        num_samples = int(np.ceil((t_end - t_start) / step_days)) + 1
+        self.days = np.linspace(t_start, t_start + (num_samples - 1) * step_days, num_samples)
+        positions = equatorial_to_ecliptic(planet_positions(self.days))
+        # One spline over all bodies: samples along axis 1, values (bodies, 3)
+        self.spline = CubicSpline(self.days, positions, axis=1)
+
+    def __call__(self, t):
+        """(bodies x 3) ecliptic positions at time t (days), or (bodies x epochs x 3) for an array"""
+        return self.spline(t)
+
+
+def heliocentric_acceleration(r, planets, planet_gm, gm_sun=GM_SUN):
+    """
+    Acceleration (AU/day²) of a massless body at r (AU) in the heliocentric frame:
+    the Sun, the direct pull of every planet, and the indirect term from the Sun's
+    own acceleration towards the planets
+    planets: (bodies x 3) positions, planet_gm: (bodies,) gravitational parameters
+    """
+    acceleration = -gm_sun * r / np.linalg.norm(r)**3
+    if planets is not None:
+        to_planet = planets - r
+        direct = to_planet / np.linalg.norm(to_planet, axis=1, keepdims=True)**3
+        indirect = planets / np.linalg.norm(planets, axis=1, keepdims=True)**3
+        acceleration += planet_gm @ (direct - indirect)
+    return acceleration
+
+
+class PerturbedTrajectory:
+    """
+    Comet trajectory integrated from an initial state at t0 (days) over [t_start, t_end]
+    position/velocity: ecliptic state at t0 in AU and AU/day
+    planet_track: PlanetTrack covering the span (None integrates the Sun alone)
+    planet_names: bodies in planet_track order, used to look up their masses
+    The integration runs forwards and backwards from t0; calling the object
+    evaluates the dense output at any epochs inside the span
+    """
+
+    def __init__(self, position, velocity, t0, t_start, t_end, planet_track=None, planet_names=(),
+                 rtol=1e-11, atol=1e-14):
+        from scipy.integrate import solve_ivp
+
+        if not t_start <= t0 <= t_end:
+            raise ValueError(f't0={t0} is outside the integration span [{t_start}, {t_end}]')
+
+        self.t0 = t0
+        self.t_start = t_start
+        self.t_end = t_end
+        planet_gm = np.array([GM_SUN / PLANET_MASS_RATIOS[name] for name in planet_names])
+
+        def derivatives(t, state):
+            planets = planet_track(t) if planet_track is not None else None
+            return np.concatenate([state[3:], heliocentric_acceleration(state[:3], planets, planet_gm)])
+
+        initial = np.concatenate([position, velocity])
+        self.segments = []
+        self.steps = 0
+        self.evaluations = 0
+        for t_bound in (t_start, t_end):
+            if t_bound == t0:
+                continue
+            solution = solve_ivp(derivatives, (t0, t_bound), initial, method='DOP853',
+                                 dense_output=True, rtol=rtol, atol=atol)
+            if not solution.success:
+                raise RuntimeError(f'Integration to t={t_bound} failed: {solution.message}')
+            self.segments.append((min(t0, t_bound), max(t0, t_bound), solution.sol))
+            self.steps += solution.t.size - 1
+            self.evaluations += solution.nfev
+
+    def state(self, days):
+        """(epochs x 6) positions and velocities at the given days, from the dense output"""
+        days = np.atleast_1d(np.asarray(days, dtype=float))
+        if days.min() < self.t_start or days.max() > self.t_end:
+            raise ValueError(f'Epochs must lie within the integration span [{self.t_start}, {self.t_end}]')
+
+        states = np.empty((days.size, 6))
+        for lower, upper, sol in self.segments:
+            inside = (days >= lower) & (days <= upper)
+            if inside.any():
+                states[inside] = sol(days[inside]).T
+        return states
+
+    def __call__(self, days):
+        """Ecliptic x, y, z arrays (AU) at the given days, like comet_trajectory"""
+        positions = self.state(days)[:, :3]
+        return positions[:, 0], positions[:, 1], positions[:, 2]
@@ -0,0 +1,322 @@
+"""
+Lightweight projection renderer for the Comet 3I/ATLAS animation
+Draws the same scene as CometAnimation without mplot3d: all geometry is projected
+with one vectorized view-projection matrix per frame and drawn as plain 2D
+matplotlib artists (Agg lines, one marker collection and texts). The camera model
+reproduces mplot3d's default perspective, so frames look the same.
+"""
+
+import numpy as np
+
+from comet_3i_animation import (ELLIPSE_COS, ELLIPSE_LABEL_ANCHORS, ELLIPSE_PLANES, ELLIPSE_SIN,
+                                CometAnimation, planet_colors, planet_names_list, planet_sizes)
+from frame_manifest import hash_inputs
+from tracing import TRACER
+
+# mplot3d's default box aspect (4:4:3 as normalized by Axes3D.set_box_aspect), camera
+# distance and the 2D view limits its projected coordinates are drawn in
+BOX_ASPECT = np.array([4, 4, 3]) * 1.25 / 4.2
+CAMERA_DISTANCE = 10
+VIEW_LIMITS = (-0.095, 0.09)
+
+# Height (AU) of the planet and comet labels above their body, as in CometAnimation.animate()
+LABEL_HEIGHT = 0.15
+
+INNER_PLANETS = ('mercury', 'venus', 'earth', 'mars')
+
+# mplot3d's depth sort gives the Sun and planet scatters zorders from 1.5 up, so all
+# but the farthest draw over the lines and most over the text; one collection above both
+BODY_ZORDER = 3.5
+
+
+def view_projection_matrix(center, zoom, elev, azim):
+    """
+    4x4 matrix taking homogeneous heliocentric coordinates (AU) to the projected 2D
+    coordinates of an mplot3d perspective camera at (elev, azim) degrees, looking at
+    a cube of half-width zoom around center
+    """
+    # Data cube -> box of size BOX_ASPECT
+    scale = BOX_ASPECT / (2 * zoom)
+    world = np.diag(np.append(scale, 1.0))
+    world[:3, 3] = -(np.asarray(center) - zoom) * scale
+
+    # Eye on a sphere around the box center; view axes right (u), up (v), out of screen (w)
+    elev_rad, azim_rad = np.radians(elev), np.radians(azim)
+    box_center = 0.5 * BOX_ASPECT
+    eye = box_center + CAMERA_DISTANCE * np.array([np.cos(elev_rad) * np.cos(azim_rad),
+                                                   np.cos(elev_rad) * np.sin(azim_rad),
+                                                   np.sin(elev_rad)])
+    up = np.array([0.0, 0.0, -1.0 if abs((elev + 180) % 360 - 180) > 90 else 1.0])
+    w = (eye - box_center) / np.linalg.norm(eye - box_center)
+    u = np.cross(up, w)
+    u /= np.linalg.norm(u)
+    v = np.cross(w, u)
+
+    view = np.eye(4)
+    view[:3, :3] = [u, v, w]
+    view[:3, 3] = -view[:3, :3] @ eye
+
+    # Perspective with focal length 1 and near/far planes at -/+ CAMERA_DISTANCE
+    perspective = np.array([[1.0, 0, 0, 0],
+                            [0, 1.0, 0, 0],
+                            [0, 0, 0, -CAMERA_DISTANCE],
+                            [0, 0, -1.0, 0]])
+    return perspective @ view @ world
+
+
+def project(matrix, points):
+    """(n x 3) points -> (n x 2) projected coordinates and (n,) depth, in one matrix product"""
+    homogeneous = points @ matrix[:, :3].T + matrix[:, 3]
+    xy = homogeneous[:, :2] / homogeneous[:, 3:]
+    return xy, homogeneous[:, 2] / homogeneous[:, 3]
+
+
+def label_angle(xy, xy_up):
+    """Text angle (degrees) along the projected vertical, normalized like mplot3d's Text3D"""
+    angle = np.degrees(np.arctan2(xy_up[:, 1] - xy[:, 1], xy_up[:, 0] - xy[:, 0]))
+    angle = (angle + 180) % 180
+    return np.where(angle > 90, angle - 180, angle)
+
+
+class ProjectedCometAnimation(CometAnimation):
+    """
+    CometAnimation drawn with 2D artists instead of mplot3d
+    Frame states, camera path, manifest and rendering entry points are inherited
+    """
+
+    renderer = 'numpy'
+
+    def build_scene(self):
+        """Create the figure, a 2D axes laid out like the 3D one, and every artist"""
+        import matplotlib.pyplot as plt
+
+        self.fig = plt.figure(figsize=(14, 10), dpi=100, facecolor='#000000')
+        self.ax = self.fig.add_subplot(111, facecolor='#000011')
+        self.ax.set_xlim(*VIEW_LIMITS)
+        self.ax.set_ylim(*VIEW_LIMITS)
+        self.ax.set_aspect('equal', adjustable='box')
+        # Hide axes and spines but keep the background patch, which mplot3d draws even with its axes off
+        self.ax.xaxis.set_visible(False)
+        self.ax.yaxis.set_visible(False)
+        for spine in self.ax.spines.values():
+            spine.set_visible(False)
+
+        # Static geometry, projected together: comet trajectory, planet orbits, Sun label anchor
+        trajectory = np.column_stack([self.x_traj, self.y_traj, self.z_traj])
+        orbits = [np.column_stack(self.planet_orbits[name]) for name in planet_names_list]
+        self.static_points = np.concatenate([trajectory] + orbits + [[[0, 0, LABEL_HEIGHT]]])
+        bounds = np.cumsum([0, len(trajectory)] + [len(orbit) for orbit in orbits])
+        self.trajectory_slice = slice(0, bounds[1])
+        self.orbit_slices = [slice(start, end) for start, end in zip(bounds[1:-1], bounds[2:])]
+
+        self.comet_traj, = self.ax.plot([], [], '-', color='cyan', linewidth=3.0, alpha=0.95,
+                                        label='Comet Trajectory')
+
+        self.orbit_lines = {}
+        for planet_name in planet_names_list:
+            color = planet_colors[planet_name]
+            if planet_name in INNER_PLANETS:
+                style = dict(linestyle='--', alpha=0.4, linewidth=1.2)
+            else:
+                style = dict(linestyle=':', alpha=0.3, linewidth=1.0)
+            self.orbit_lines[planet_name], = self.ax.plot([], [], color=color,
+                                                          label=f'{planet_name.capitalize()} orbit', **style)
+
+        # Sun glow, Sun and planets in one collection, drawn far to near like mplot3d's depth sort
+        from matplotlib.colors import to_rgba
+
+        self.body_sizes = np.array([500, 200] + [planet_sizes[name] for name in planet_names_list])
+        self.body_faces = np.array([to_rgba('yellow', 0.4), to_rgba('#FFDD00', 1.0)]
+                                   + [to_rgba(planet_colors[name], 1.0) for name in planet_names_list])
+        self.body_edges = np.array([to_rgba('orange', 0.4), to_rgba('orange', 1.0)]
+                                   + [to_rgba('white', 1.0)] * len(planet_names_list))
+        self.body_widths = np.array([2, 3] + [2] * len(planet_names_list))
+        # Last valid heliocentric positions (planets stay put where the ephemeris failed)
+        # and which planets have had one, like the initially empty mplot3d scatters
+        self.body_positions = np.zeros((2 + len(planet_names_list), 3))
+        self.body_shown = np.array([True, True] + [False] * len(planet_names_list))
+        self.bodies = self.ax.scatter(np.zeros(len(self.body_sizes)), np.zeros(len(self.body_sizes)),
+                                      s=self.body_sizes, facecolors=self.body_faces,
+                                      edgecolors=self.body_edges, linewidths=self.body_widths,
+                                      zorder=BODY_ZORDER)
+        self.bodies.set_visible(False)
+
+        self.sun_label = self.ax.text(0, 0, 'Sun', color='white', fontsize=11,
+                                      ha='center', va='bottom', weight='bold',
+                                      bbox=dict(boxstyle='round,pad=0.4', facecolor='#FFDD00',
+                                                alpha=0.8, edgecolor='orange', linewidth=1))
+
+        self.planet_labels = {}
+        for planet_name in planet_names_list:
+            self.planet_labels[planet_name] = self.ax.text(
+                0, 0, planet_name.capitalize(), color='white', fontsize=9,
+                ha='center', va='bottom', weight='bold',
+                bbox=dict(boxstyle='round,pad=0.3', facecolor=planet_colors[planet_name],
+                          alpha=0.7, edgecolor='white', linewidth=0.5))
+
+        self.uncertainty_surf = []
+        self.dimension_lines = []
+        self.ellipse_labels = []
+
+        self.comet_point, = self.ax.plot([], [], 'o', markersize=4, markeredgecolor='white',
+                                         markeredgewidth=1, markerfacecolor='#FF6600', alpha=1.0)
+        self.comet_label = self.ax.text(0, 0, '', color='white', fontsize=10,
+                                        ha='center', va='bottom', weight='bold',
+                                        bbox=dict(boxstyle='round,pad=0.4', facecolor='#FF6600',
+                                                  alpha=0.85, edgecolor='white', linewidth=1.5))
+        self.comet_tail, = self.ax.plot([], [], '-', color='#00FFFF', linewidth=2.5, alpha=0.7)
+
+        # HUD panels, in axes coordinates exactly as in the mplot3d scene
+        self.title_text = self.ax.text(0.5, 0.98, '', transform=self.ax.transAxes, fontsize=16,
+                                       weight='bold', ha='center', va='top', color='white',
+                                       bbox=dict(boxstyle='round,pad=0.8', facecolor='#000000',
+                                                 alpha=0.85, edgecolor='#00FFFF', linewidth=2))
+        self.info_text = self.ax.text(0.02, 0.02, '', transform=self.ax.transAxes, fontsize=9,
+                                      verticalalignment='bottom', ha='left', color='white', family='monospace',
+                                      bbox=dict(boxstyle='round,pad=0.5', facecolor='#000000',
+                                                alpha=0.92, edgecolor='#00FF00', linewidth=2))
+        self.legend_text = self.ax.text(0.98, 0.85, '', transform=self.ax.transAxes, fontsize=8,
+                                        verticalalignment='top', ha='right', color='white',
+                                        bbox=dict(boxstyle='round,pad=0.5', facecolor='#000000',
+                                                  alpha=0.92, edgecolor='#FFAA00', linewidth=2))
+
+        # Initial view, as the mplot3d scene before its first frame
+        self.matrix = None
+        self.set_camera({'comet': (0.0, 0.0, 0.0), 'camera': (30, -60, 3)})
+
+    def init(self):
+        """Reset the dynamic artists; the uncertainty artists are created on first call"""
+        if not self.uncertainty_surf:
+            colors = ('#FF3333', '#33FF33', '#3333FF')
+            for color in colors:
+                ellipse, = self.ax.plot([], [], '-', color=color, linewidth=2.5, alpha=0.7)
+                self.uncertainty_surf.append(ellipse)
+
+            names = ('XY', 'XZ', 'YZ') if self.uncertainty is None else ('A12', 'A13', 'A23')
+            for name, color in zip(names, colors):
+                self.ellipse_labels.append(self.ax.text(0, 0, name, color=color, fontsize=6, weight='bold',
+                                                        ha='center', va='bottom'))
+
+            for color in colors:
+                line, = self.ax.plot([], [], '-', color=color, linewidth=1.5, alpha=0.5)
+                self.dimension_lines.append(line)
+
+        for artist in self.uncertainty_surf + self.ellipse_labels + self.dimension_lines:
+            artist.set_visible(False)
+
+        self.comet_point.set_data([], [])
+        self.comet_tail.set_data([], [])
+        self.info_text.set_text('')
+        self.title_text.set_text('')
+        self.legend_text.set_text('')
+        return (self.comet_point, self.comet_tail, self.info_text, self.title_text, self.legend_text,
+                self.uncertainty_surf, self.dimension_lines, self.ellipse_labels)
+
+    def set_camera(self, state):
+        """Build this frame's view-projection matrix and re-project the static geometry"""
+        elev, azim, zoom = state['camera']
+        self.matrix = view_projection_matrix(state['comet'], zoom, elev, azim)
+
+        xy, _ = project(self.matrix, self.static_points)
+        self.static_xy = xy
+        self.comet_traj.set_data(*xy[self.trajectory_slice].T)
+        for planet_name, orbit_slice in zip(planet_names_list, self.orbit_slices):
+            self.orbit_lines[planet_name].set_data(*xy[orbit_slice].T)
+        self.sun_label.set_position(xy[-1])
+
+    def animate(self, frame, move_camera=True):
+        """
+        Update every dynamic artist for a frame (FuncAnimation callback)
+        move_camera=False keeps the current view (interactive viewer)
+        """
+        with TRACER.span('frame state'):
+            state = self.get_frame_state(frame)
+        if move_camera:
+            with TRACER.span('camera'):
+                self.set_camera(state)
+
+        with TRACER.span('artists'):
+            center = np.array(state['comet'])
+
+            planets = np.asarray(state['planets'])
+            valid = ~np.isnan(planets[:, 0])
+            self.body_positions[2:][valid] = planets[valid]
+            self.body_shown[2:] |= valid
+
+            # Everything that moves this frame, projected with one matrix product:
+            # comet, bodies, label anchors and points just above them, ellipses, axis lines
+            semi_axes, axes, label_offset = state['uncertainty']
+            scaled_axes = semi_axes[:, None] * axes
+            ellipses = [center + np.outer(ELLIPSE_COS, scaled_axes[j]) + np.outer(ELLIPSE_SIN, scaled_axes[k])
+                        for j, k in ELLIPSE_PLANES]
+            axis_ends = np.concatenate([[center - axis, center + axis] for axis in scaled_axes])
+            ellipse_anchors = [center + scaled_axes[tip] + label_offset * axes[nudge]
+                               for tip, nudge in ELLIPSE_LABEL_ANCHORS]
+            labelled = np.vstack([self.body_positions[2:], center])
+            anchors = labelled + [0, 0, LABEL_HEIGHT]
+            points = np.concatenate([self.body_positions, anchors, anchors + [0, 0, 1]]
+                                    + ellipses + [axis_ends, ellipse_anchors])
+            xy, depth = project(self.matrix, points)
+
+            num_bodies = len(self.body_positions)
+            num_labels = len(labelled)
+            body_xy, body_depth = xy[:num_bodies], depth[:num_bodies]
+            anchor_xy = xy[num_bodies:num_bodies + num_labels]
+            up_xy = xy[num_bodies + num_labels:num_bodies + 2 * num_labels]
+            rest = xy[num_bodies + 2 * num_labels:]
+            num_ellipse = len(ELLIPSE_COS)
+            ellipse_xy = rest[:3 * num_ellipse].reshape(3, num_ellipse, 2)
+            axis_xy = rest[3 * num_ellipse:3 * num_ellipse + 6].reshape(3, 2, 2)
+            ellipse_label_xy = rest[3 * num_ellipse + 6:]
+
+            # Comet marker, label and tail from the projected trajectory
+            idx = state['idx']
+            self.comet_point.set_data(*self.static_xy[idx:idx + 1].T)
+            tail_start, tail_end = state['tail']
+            self.comet_tail.set_data(*self.static_xy[tail_start:tail_end].T)
+
+            # Planet and comet labels are aligned with the projected vertical, like mplot3d's zdir='z'
+            angles = label_angle(anchor_xy, up_xy)
+            for k, planet_name in enumerate(planet_names_list):
+                self.planet_labels[planet_name].set_position(anchor_xy[k])
+                self.planet_labels[planet_name].set_rotation(angles[k])
+            self.comet_label.set_position(anchor_xy[-1])
+            self.comet_label.set_rotation(angles[-1])
+            self.comet_label.set_text('3I/ATLAS')
+
+            # Bodies drawn far to near; the stable sort keeps the Sun's glow under the Sun
+            shown = np.flatnonzero(self.body_shown)
+            order = shown[np.argsort(-body_depth[shown], kind='stable')]
+            self.bodies.set_offsets(body_xy[order])
+            self.bodies.set_sizes(self.body_sizes[order])
+            self.bodies.set_facecolors(self.body_faces[order])
+            self.bodies.set_edgecolors(self.body_edges[order])
+            self.bodies.set_linewidths(self.body_widths[order])
+            self.bodies.set_visible(True)
+
+            for ellipse, points_xy in zip(self.uncertainty_surf, ellipse_xy):
+                ellipse.set_data(*points_xy.T)
+            for line, points_xy in zip(self.dimension_lines, axis_xy):
+                line.set_data(*points_xy.T)
+            for label, position in zip(self.ellipse_labels, ellipse_label_xy):
+                label.set_position(position)
+            for artist in self.uncertainty_surf + self.ellipse_labels + self.dimension_lines:
+                artist.set_visible(True)
+
+            self.title_text.set_text(state['title'])
+            self.info_text.set_text(state['info'])
+            self.legend_text.set_text(state['legend'])
+
+        return (self.comet_point, self.comet_tail, self.info_text, self.title_text, self.legend_text,
+                self.uncertainty_surf, self.dimension_lines, self.ellipse_labels)
+
+    def dynamic_artists(self):
+        """Every artist animate() changes; the rest of the scene is static for a fixed camera"""
+        return ([self.comet_point, self.comet_tail, self.comet_label, self.bodies]
+                + list(self.planet_labels.values())
+                + self.uncertainty_surf + self.dimension_lines + self.ellipse_labels
+                + [self.title_text, self.info_text, self.legend_text])
+
+    def scene_fingerprint(self):
+        """Hash of the static scene and the renderer, so switching renderers re-renders every frame"""
+        return hash_inputs(super().scene_fingerprint(), self.renderer)
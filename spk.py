@@ -0,0 +1,200 @@
+"""
+Memory-mapped reader for JPL SPK ephemeris kernels (.bsp, e.g. DE440/DE441)
+Reads local DAF/SPK files without downloading anything: the file is memory-mapped,
+each segment's Chebyshev coefficient records are a zero-copy NumPy view into it, and
+positions are evaluated for whole epoch arrays at once. Supports segment types 2
+(Chebyshev position) and 3 (Chebyshev position and velocity), which cover the JPL
+planetary ephemerides. Pure NumPy.
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+AU_KM = 149597870.7
+J2000_JD = 2451545.0  # TDB
+SECONDS_PER_DAY = 86400.0
+ORDINAL_TO_JD = 1721424.5  # Julian date of 00:00 UTC on day ordinal 0 (datetime.toordinal)
+
+# DAF files are made of 1024-byte records of 128 doubles
+RECORD_BYTES = 1024
+
+# NAIF ids of the bodies by name; planets without their own segment fall back to their
+# system barycenter (id // 100), as JPL kernels only carry e.g. Mars as body 4
+NAIF_IDS = {
+    'sun': 10, 'mercury': 199, 'venus': 299, 'earth': 399, 'moon': 301, 'mars': 499,
+    'jupiter': 599, 'saturn': 699, 'uranus': 799, 'neptune': 899, 'pluto': 999,
+}
+SOLAR_SYSTEM_BARYCENTER = 0
+
+# TAI - UTC (s) from the first day of (year, month); earlier dates use the 1972 value
+LEAP_SECONDS = ((1972, 1, 10), (1972, 7, 11), (1973, 1, 12), (1974, 1, 13), (1975, 1, 14), (1976, 1, 15),
+                (1977, 1, 16), (1978, 1, 17), (1979, 1, 18), (1980, 1, 19), (1981, 7, 20), (1982, 7, 21),
+                (1983, 7, 22), (1985, 7, 23), (1988, 1, 24), (1990, 1, 25), (1991, 1, 26), (1992, 7, 27),
+                (1993, 7, 28), (1994, 7, 29), (1996, 1, 30), (1997, 7, 31), (1999, 1, 32), (2006, 1, 33),
+                (2009, 1, 34), (2012, 7, 35), (2015, 7, 36), (2017, 1, 37))
+LEAP_SECONDS_JD = np.array([datetime(year, month, 1).toordinal() + ORDINAL_TO_JD
+                            for year, month, _ in LEAP_SECONDS])
+LEAP_SECONDS_TAI_UTC = np.array([seconds for _, _, seconds in LEAP_SECONDS], dtype=float)
+TT_TAI = 32.184
+
+# Epochs evaluated per block, bounding the gathered coefficient records in memory
+EVAL_BLOCK_SIZE = 16384
+
+
+def utc_jd_to_et(jd_utc):
+    """
+    Ephemeris time (TDB seconds past J2000) of UTC Julian dates
+    TDB - TT uses the two main periodic terms (error ~30 µs, a few cm of planet motion)
+    """
+    jd_utc = np.asarray(jd_utc, dtype=float)
+    index = np.clip(np.searchsorted(LEAP_SECONDS_JD, jd_utc, side='right') - 1, 0, None)
+    tt_utc = LEAP_SECONDS_TAI_UTC[index] + TT_TAI
+    days = jd_utc - J2000_JD + tt_utc / SECONDS_PER_DAY
+    # Mean anomaly of the Earth (radians)
+    g = np.radians(357.53 + 0.98560028 * days)
+    tdb_tt = 0.001657 * np.sin(g) + 0.00001385 * np.sin(2 * g)
+    return days * SECONDS_PER_DAY + tdb_tt
+
+
+class SPKSegment:
+    """
+    One Chebyshev segment of an SPK kernel: target position relative to center over
+    [start_et, end_et] (TDB seconds past J2000), in km in the segment's reference frame
+    coefficients: (records x record_size) view into the memory-mapped file; each record
+    holds its interval midpoint and half-length, then the x, y, z coefficient sets
+    """
+
+    def __init__(self, kernel, summary_doubles, summary_ints):
+        self.start_et, self.end_et = (float(value) for value in summary_doubles[:2])
+        self.target, self.center, self.frame, self.data_type, start, end = (int(value) for value in summary_ints[:6])
+        if self.data_type not in (2, 3):
+            self.coefficients = None
+            return
+
+        # Segment directory: first epoch, interval length (s), record size and count (doubles)
+        self.init, self.interval, record_size, num_records = kernel.doubles(end - 3, 4)
+        record_size, num_records = int(record_size), int(num_records)
+        self.coefficients = kernel.doubles(start, record_size * num_records).reshape(num_records, record_size)
+        # Type 3 records also carry the velocity coefficients, after the position ones
+        self.num_coefficients = (record_size - 2) // (3 if self.data_type == 2 else 6)
+
+    def __repr__(self):
+        return (f'SPKSegment(target={self.target}, center={self.center}, type={self.data_type}, '
+                f'{self.coefficients.shape[0] if self.coefficients is not None else 0} records)')
+
+    def covers(self, et):
+        """Boolean mask of the epochs inside this segment"""
+        return (et >= self.start_et) & (et <= self.end_et)
+
+    def position(self, et, block_size=EVAL_BLOCK_SIZE):
+        """(epochs x 3) positions (km) at an array of epochs inside the segment"""
+        et = np.asarray(et, dtype=float)
+        out = np.empty((et.size, 3))
+        last_record = self.coefficients.shape[0] - 1
+        degree = self.num_coefficients
+
+        for start in range(0, et.size, block_size):
+            block = et[start:start + block_size]
+            index = np.floor((block - self.init) / self.interval).astype(np.intp)
+            np.clip(index, 0, last_record, out=index)
+            # Gathers only the records in use; the rest of the file is never read
+            records = self.coefficients[index]
+            s = (block - records[:, 0]) / records[:, 1]
+
+            # Chebyshev polynomials T_k(s) by their recurrence
+            T = np.empty((degree, block.size))
+            T[0] = 1
+            if degree > 1:
+                T[1] = s
+            for k in range(2, degree):
+                T[k] = 2 * s * T[k - 1] - T[k - 2]
+
+            coefficients = records[:, 2:2 + 3 * degree].reshape(block.size, 3, degree)
+            out[start:start + block_size] = np.einsum('nck,kn->nc', coefficients, T)
+        return out
+
+
+class SPKKernel:
+    """
+    Memory-mapped SPK kernel. Only the file record and segment summaries are parsed on
+    open; coefficients are read from the mapping as positions are evaluated
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._map = np.memmap(path, dtype=np.uint8, mode='r')
+        header = self._map[:RECORD_BYTES].tobytes()
+        if not header.startswith(b'DAF/SPK'):
+            raise ValueError(f'{path} is not an SPK kernel (file id {header[:8]!r})')
+
+        byte_order = {b'LTL-IEEE': '<', b'BIG-IEEE': '>'}.get(header[88:96])
+        if byte_order is None:
+            raise ValueError(f'{path}: unsupported binary format {header[88:96]!r}')
+        self._double = np.dtype(f'{byte_order}f8')
+        self._int = np.dtype(f'{byte_order}i4')
+        num_doubles, num_ints = np.frombuffer(header, self._int, 2, offset=8)
+        forward = int(np.frombuffer(header, self._int, 1, offset=76)[0])
+
+        # Linked list of summary records: next record, previous record, summary count
+        summary_size = num_doubles + (num_ints + 1) // 2
+        self.segments = []
+        record = forward
+        while record:
+            offset = (record - 1) * RECORD_BYTES
+            next_record, _, count = self._map[offset:offset + 24].view(self._double)
+            for k in range(int(count)):
+                start = offset + 24 + 8 * k * summary_size
+                summary_doubles = self._map[start:start + 8 * num_doubles].view(self._double)
+                summary_ints = self._map[start + 8 * num_doubles:start + 8 * num_doubles + 4 * num_ints].view(self._int)
+                self.segments.append(SPKSegment(self, summary_doubles, summary_ints))
+            record = int(next_record)
+
+        # Center of every target, to chain positions down to the solar system barycenter
+        self.centers = {segment.target: segment.center for segment in self.segments
+                        if segment.coefficients is not None}
+
+    def __repr__(self):
+        return f'SPKKernel({self.path!r}, {len(self.segments)} segments)'
+
+    def doubles(self, address, count):
+        """Zero-copy view of count doubles starting at a 1-based DAF word address"""
+        return np.frombuffer(self._map, self._double, count, offset=8 * (address - 1))
+
+    def body_id(self, body):
+        """NAIF id of a body name or id present in the kernel, falling back to its barycenter"""
+        naif_id = NAIF_IDS[body.lower()] if isinstance(body, str) else int(body)
+        if naif_id not in self.centers and naif_id > 10 and naif_id // 100 in self.centers:
+            naif_id //= 100
+        if naif_id not in self.centers:
+            raise KeyError(f'{body} is not in {self.path}')
+        return naif_id
+
+    def _relative_position(self, target, et):
+        """Position (km) of target relative to its center, from the segments covering each epoch"""
+        out = np.full((et.size, 3), np.nan)
+        for segment in self.segments:
+            if segment.target == target and segment.coefficients is not None:
+                inside = segment.covers(et) & np.isnan(out[:, 0])
+                if inside.all():
+                    out = segment.position(et)
+                elif inside.any():
+                    out[inside] = segment.position(et[inside])
+        if np.isnan(out[:, 0]).any():
+            raise ValueError(f'{self.path} does not cover every epoch for body {target}')
+        return out
+
+    def barycentric(self, body, et):
+        """(epochs x 3) position (km) relative to the solar system barycenter, in the kernel frame"""
+        et = np.atleast_1d(np.asarray(et, dtype=float))
+        naif_id = self.body_id(body)
+        position = self._relative_position(naif_id, et)
+        # e.g. Earth relative to the Earth-Moon barycenter, which is relative to the barycenter
+        while self.centers[naif_id] != SOLAR_SYSTEM_BARYCENTER:
+            naif_id = self.centers[naif_id]
+            position += self._relative_position(naif_id, et)
+        return position
+
+    def heliocentric(self, body, et):
+        """(epochs x 3) position (AU) relative to the Sun, in the kernel frame (ICRF for JPL kernels)"""
+        return (self.barycentric(body, et) - self.barycentric('sun', et)) / AU_KM
@@ -0,0 +1,162 @@
+"""Lock-file frame queue: claims, lease takeover, completion and verification"""
+
+import json
+import os
+import time
+
+import pytest
+
+from frame_queue import FrameQueue
+
+LEASE = 5
+
+
+def make_node(queue_dir, name, total_frames=10, unit_size=4, fingerprint='scene'):
+    """A queue node with its own node id (nodes in one test share a process)"""
+    queue = FrameQueue(str(queue_dir), total_frames, unit_size, fingerprint, lease_seconds=LEASE)
+    queue.node_id = name
+    return queue
+
+
+def expire(queue, unit):
+    """Age a unit's lock past the lease, as if its owner had stopped sending heartbeats"""
+    stale = time.time() - 2 * LEASE
+    os.utime(queue._lock_path(unit), (stale, stale))
+
+
+def write_frames(queue, unit, content=b'png'):
+    for frame in queue.unit_frames(unit):
+        with open(frame_path(queue, frame), 'wb') as f:
+            f.write(content + str(frame).encode())
+
+
+def frame_path(queue, frame):
+    return os.path.join(queue.frames_dir, f'frame_{frame:04d}.png')
+
+
+def lock_files(queue):
+    return sorted(os.listdir(queue.locks_dir))
+
+
+def test_claims_preferred_then_free_units(tmp_path):
+    a, b = make_node(tmp_path, 'a'), make_node(tmp_path, 'b')
+    assert a.num_units == 3
+    assert list(a.unit_frames(2)) == [8, 9]
+    assert a.claim(preferred=[2]) == 2
+    assert b.claim() == 0
+    assert a.claim() == 1
+    # Every unit is held by a live node
+    assert b.claim() is None
+    assert a.owns(2) and b.owns(0) and not b.owns(2)
+
+
+def test_expired_unit_is_taken_over(tmp_path):
+    a, b = make_node(tmp_path, 'a'), make_node(tmp_path, 'b')
+    for unit in range(3):
+        assert a.claim() == unit
+    expire(a, 0)
+    assert b.claim() == 0
+    assert b.owns(0)
+    # The previous owner notices at its next heartbeat and can't complete the unit
+    assert not a.heartbeat(0)
+    write_frames(a, 0)
+    assert not a.complete(0, lambda frame: frame_path(a, frame))
+    assert b.owns(0) and not a.is_done(0)
+    assert lock_files(a) == ['unit_00000.lock', 'unit_00001.lock', 'unit_00002.lock']
+
+
+def test_live_unit_is_not_taken_over(tmp_path):
+    a, b = make_node(tmp_path, 'a'), make_node(tmp_path, 'b')
+    for unit in range(3):
+        assert a.claim() == unit
+    assert a.heartbeat(0)
+    assert b.claim() is None
+    assert all(a.owns(unit) for unit in range(3))
+
+
+def test_takeover_puts_back_a_lock_retaken_meanwhile(tmp_path):
+    a, b, c = (make_node(tmp_path, name, total_frames=4) for name in 'abc')
+    assert a.claim() == 0
+    expire(a, 0)
+    # b saw a's expired lock, but c took the unit over before b's rename
+    assert c.claim() == 0
+    assert not b._take_over(0, 'a')
+    assert c.owns(0) and c.heartbeat(0)
+    assert lock_files(a) == ['unit_00000.lock']
+
+
+def test_takeover_puts_back_a_refreshed_lock(tmp_path):
+    a, b = make_node(tmp_path, 'a', total_frames=4), make_node(tmp_path, 'b', total_frames=4)
+    assert a.claim() == 0
+    expire(a, 0)
+    # a's heartbeat arrived between b's age check and its rename
+    assert a.heartbeat(0)
+    assert not b._take_over(0, 'a')
+    assert a.owns(0)
+    assert lock_files(a) == ['unit_00000.lock']
+
+
+def test_complete_records_frame_hashes(tmp_path):
+    a = make_node(tmp_path, 'a')
+    assert a.claim() == 0
+    write_frames(a, 0)
+    assert a.complete(0, lambda frame: frame_path(a, frame))
+    assert a.is_done(0) and not a.owns(0)
+    assert lock_files(a) == []
+    with open(a._done_path(0)) as f:
+        done = json.load(f)
+    assert done['node'] == 'a'
+    assert sorted(done['frames'], key=int) == ['0', '1', '2', '3']
+    # Done units are never claimed again
+    assert a.claim(preferred=[0]) == 1
+    assert a.remaining() == 2
+
+
+def test_complete_leaves_a_reassigned_unit_to_its_owner(tmp_path):
+    a, b = make_node(tmp_path, 'a', total_frames=4), make_node(tmp_path, 'b', total_frames=4)
+    assert a.claim() == 0
+    expire(a, 0)
+    assert b.claim() == 0
+    write_frames(a, 0)
+    assert not a.complete(0, lambda frame: frame_path(a, frame))
+    assert b.owns(0) and not b.is_done(0)
+    assert os.listdir(a.done_dir) == []
+
+
+def test_verify_reports_unfinished_units_and_changed_frames(tmp_path):
+    a = make_node(tmp_path, 'a')
+    path = lambda frame: frame_path(a, frame)
+    while (unit := a.claim()) is not None:
+        write_frames(a, unit)
+        assert a.complete(unit, path)
+    assert a.verify(path) == ([], [])
+
+    with open(path(5), 'wb') as f:
+        f.write(b'edited')
+    os.remove(path(9))
+    a.reopen([0])
+    assert a.verify(path) == ([0], [5, 9])
+
+
+def test_joining_with_other_options_is_refused(tmp_path):
+    make_node(tmp_path, 'a')
+    with pytest.raises(ValueError, match='scene fingerprint differs'):
+        make_node(tmp_path, 'b', fingerprint='other scene')
+    with pytest.raises(ValueError, match='10 frames, not 12'):
+        make_node(tmp_path, 'b', total_frames=12)
+    # Opening without options (to stitch) accepts the queue as it is
+    assert FrameQueue(str(tmp_path)).total_frames == 10
+
+
+def test_complete_rechecks_ownership_after_setting_the_lock_aside(tmp_path, monkeypatch):
+    a, b = make_node(tmp_path, 'a', total_frames=4), make_node(tmp_path, 'b', total_frames=4)
+    assert a.claim() == 0
+    write_frames(a, 0)
+    expire(a, 0)
+    # a's ownership check passed, then b took the unit over before a published it
+    monkeypatch.setattr(a, 'owns', lambda unit: True)
+    assert b.claim() == 0
+    assert not a.complete(0, lambda frame: frame_path(a, frame))
+    assert b.owns(0) and not b.is_done(0)
+    assert lock_files(b) == ['unit_00000.lock']
+    assert os.listdir(b.done_dir) == []
@@ -0,0 +1,61 @@
+"""Hyperbolic Kepler solvers: residual, symmetry and domain over the multi-year range"""
+
+import numpy as np
+import pytest
+
+from orbit_mechanics import solve_kepler_hyperbolic, solve_kepler_hyperbolic_batch
+
+ECCENTRICITIES = [1 + 1e-6, 1.0001, 1.20113, 3.35648, 6.1386, 50.0, 1e4]
+# |M| from 1e-8 to 1e6 (radians), plus zero
+MEAN_ANOMALIES = np.concatenate([[0.0], np.logspace(-8, 6, 2001)])
+
+
+@pytest.mark.parametrize('e', ECCENTRICITIES)
+def test_batch_residual(e):
+    M = np.concatenate([-MEAN_ANOMALIES[::-1], MEAN_ANOMALIES])
+    H, _, iterations = solve_kepler_hyperbolic_batch(M, e, return_iterations=True)
+    residual = np.abs(e * np.sinh(H) - H - M) / np.maximum(np.abs(M), 1)
+    assert residual.max() < 1e-14
+    assert iterations.max() <= 4
+
+
+@pytest.mark.parametrize('e', ECCENTRICITIES)
+def test_batch_is_odd(e):
+    H_plus, theta_plus = solve_kepler_hyperbolic_batch(MEAN_ANOMALIES, e)
+    H_minus, theta_minus = solve_kepler_hyperbolic_batch(-MEAN_ANOMALIES, e)
+    np.testing.assert_array_equal(H_minus, -H_plus)
+    np.testing.assert_array_equal(theta_minus, -theta_plus)
+
+
+@pytest.mark.parametrize('e', ECCENTRICITIES)
+def test_scalar_matches_batch(e):
+    M = MEAN_ANOMALIES[::50]
+    H_batch, _ = solve_kepler_hyperbolic_batch(M, e)
+    H_scalar = np.array([solve_kepler_hyperbolic(m, e) for m in M])
+    # Both stop once a step is below the default tol (1e-10); near e = 1 and M = 0, H is
+    # ill-conditioned and the two may stop at slightly different points within it
+    np.testing.assert_allclose(H_scalar, H_batch, rtol=1e-12, atol=1e-10)
+    assert solve_kepler_hyperbolic(-M[-1], e) == -solve_kepler_hyperbolic(M[-1], e)
+
+
+def test_zero_mean_anomaly():
+    assert solve_kepler_hyperbolic(0.0, 6.1386) == 0.0
+    H, theta = solve_kepler_hyperbolic_batch(np.zeros(3), 6.1386)
+    np.testing.assert_array_equal(H, 0.0)
+    np.testing.assert_array_equal(theta, 0.0)
+
+
+def test_batch_keeps_shape_and_broadcasts_e():
+    M = np.linspace(-100, 100, 12).reshape(3, 4)
+    e = np.array([1.2, 3.4, 6.1, 50.0])
+    H, theta, iterations = solve_kepler_hyperbolic_batch(M, e, return_iterations=True)
+    assert H.shape == theta.shape == iterations.shape == (3, 4)
+    np.testing.assert_allclose(e * np.sinh(H) - H, M, rtol=1e-14, atol=1e-14)
+
+
+@pytest.mark.parametrize('e', [1.0, 0.5, 0.0, float('nan')])
+def test_rejects_non_hyperbolic(e):
+    with pytest.raises(ValueError):
+        solve_kepler_hyperbolic(0.0, e)
+    with pytest.raises(ValueError):
+        solve_kepler_hyperbolic_batch([0.0, 1.0], e)
@@ -0,0 +1,52 @@
+"""Hermite trajectory interpolant against the exact two-body orbit"""
+
+import numpy as np
+import pytest
+
+from orbit_mechanics import OrbitalElements
+from trajectory import HermiteTrajectory
+
+# 3I/ATLAS, as in comet_3i_animation.py
+ORBIT = OrbitalElements(1.3563, 6.1386, 175.1130, 322.1559, 128.0111)
+TOL = 1e-12
+
+
+@pytest.fixture(scope='module')
+def trajectory():
+    return HermiteTrajectory(ORBIT.state, -60, 60, tol=TOL)
+
+
+def test_positions_within_tol_between_check_points(trajectory):
+    days = np.random.default_rng(0).uniform(-60, 60, 200_000)
+    exact, _ = ORBIT.state(days)
+    error = np.linalg.norm(np.column_stack(trajectory(days)) - exact, axis=1)
+    assert trajectory.max_error <= TOL / 2
+    assert error.max() <= TOL
+
+
+def test_state_matches_call_and_orbit(trajectory):
+    days = np.linspace(-60, 60, 1001)
+    positions, velocities = trajectory.state(days)
+    np.testing.assert_array_equal(positions, np.column_stack(trajectory(days)))
+    _, exact_velocities = ORBIT.state(days)
+    np.testing.assert_allclose(velocities, exact_velocities, rtol=1e-8)
+
+
+def test_state_accepts_any_shape(trajectory):
+    positions, velocities = trajectory.state(0.0)
+    assert positions.shape == velocities.shape == (3,)
+    exact_positions, exact_velocities = ORBIT.state(np.array([0.0]))
+    np.testing.assert_allclose(positions, exact_positions[0], atol=TOL)
+    np.testing.assert_allclose(velocities, exact_velocities[0], rtol=1e-8)
+
+    days = np.linspace(-10, 10, 12).reshape(3, 4)
+    positions, velocities = trajectory.state(days)
+    assert positions.shape == velocities.shape == (3, 4, 3)
+    np.testing.assert_array_equal(positions[..., 0], trajectory(days)[0])
+
+
+def test_rejects_epochs_outside_the_window(trajectory):
+    with pytest.raises(ValueError):
+        trajectory(np.array([-61.0]))
+    with pytest.raises(ValueError):
+        trajectory.state(60.5)
@@ -0,0 +1,108 @@
+"""
+Lightweight timing spans for the Comet 3I/ATLAS rendering pipeline
+Wrap a stage in `with TRACER.span('name'):` to time it. Spans are only recorded
+while the tracer is enabled (--trace); when disabled span() returns a shared
+no-op context, so instrumented hot paths cost well under a microsecond extra.
+Recorded spans export to the Chrome trace format (chrome://tracing, Perfetto)
+and reduce to a per-stage p50/p95/max table.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+# Shared no-op context returned by span() while tracing is off
+_NO_SPAN = contextlib.nullcontext()
+
+# Stage that marks one whole frame, used for the frames/sec figure
+FRAME_SPAN = 'frame'
+
+
+class Tracer:
+    """
+    Collects (name, start_ns, end_ns, pid, tid) spans from time.perf_counter_ns(),
+    a monotonic clock shared by every process on the machine
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.events = []
+
+    def enable(self):
+        self.enabled = True
+
+    @contextlib.contextmanager
+    def _span(self, name):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter_ns())
+
+    def span(self, name):
+        """Context manager timing the enclosed block as stage `name`"""
+        return self._span(name) if self.enabled else _NO_SPAN
+
+    def record(self, name, start_ns, end_ns):
+        """Add a span measured elsewhere (perf_counter_ns timestamps)"""
+        if self.enabled:
+            self.events.append((name, start_ns, end_ns, os.getpid(), threading.get_ident()))
+
+    def drain(self):
+        """Return and forget the recorded spans, e.g. to send them from a worker to the main process"""
+        events, self.events = self.events, []
+        return events
+
+    def extend(self, events):
+        """Add spans recorded by another process"""
+        self.events.extend(events)
+
+    def export_chrome_trace(self, path):
+        """Write the spans as Chrome trace 'complete' events, one track per process and thread"""
+        origin = min((event[1] for event in self.events), default=0)
+        main_pid = os.getpid()
+        trace_events = [{'name': name, 'ph': 'X', 'ts': (start - origin) / 1e3, 'dur': (end - start) / 1e3,
+                         'pid': pid, 'tid': tid}
+                        for name, start, end, pid, tid in self.events]
+        for pid in sorted({event[3] for event in self.events}):
+            trace_events.append({'name': 'process_name', 'ph': 'M', 'pid': pid,
+                                 'args': {'name': 'main' if pid == main_pid else f'render worker {pid}'}})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f)
+
+    def summary(self):
+        """
+        Per-stage statistics in order of first appearance
+        Returns ({name: {'count', 'p50', 'p95', 'max', 'total'}} in ms, frames per second)
+        """
+        durations = {}
+        for name, start, end, _, _ in self.events:
+            durations.setdefault(name, []).append((end - start) / 1e6)
+        stats = {name: {'count': len(values), 'p50': float(np.percentile(values, 50)),
+                        'p95': float(np.percentile(values, 95)), 'max': max(values), 'total': sum(values)}
+                 for name, values in durations.items()}
+
+        # Throughput over the wall-clock span of all frames, so parallel workers count once
+        frames = [(start, end) for name, start, end, _, _ in self.events if name == FRAME_SPAN]
+        fps = 0.0
+        if frames:
+            wall_ns = max(end for _, end in frames) - min(start for start, _ in frames)
+            fps = len(frames) / (wall_ns / 1e9) if wall_ns else 0.0
+        return stats, fps
+
+    def print_summary(self):
+        stats, fps = self.summary()
+        print(f"[TRACE] {'stage':<16} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'total s':>9}")
+        for name, s in stats.items():
+            print(f"[TRACE] {name:<16} {s['count']:>7} {s['p50']:>9.2f} {s['p95']:>9.2f} "
+                  f"{s['max']:>9.2f} {s['total'] / 1e3:>9.2f}")
+        if fps:
+            print(f"[TRACE] {fps:.2f} frames/sec")
+
+
+# Process-wide tracer used by the animation pipeline
+TRACER = Tracer()
@@ -0,0 +1,132 @@
+"""
+Continuous trajectory interpolant for the Comet 3I/ATLAS animation
+Solves the orbit once on an adaptive set of nodes and evaluates any epoch array
+from piecewise cubic Hermite polynomials, so frame count and frame rate can change
+without solving Kepler's equation again. Pure NumPy.
+"""
+
+import numpy as np
+
+# Fractions of each interval where the interpolant is checked against the exact state
+CHECK_POINTS = (0.25, 0.5, 0.75)
+
+# Epochs evaluated per block, small enough for the temporaries to stay in CPU cache
+EVAL_BLOCK_SIZE = 16384
+
+
+class HermiteTrajectory:
+    """
+    Piecewise cubic Hermite interpolant of a trajectory built from positions and velocities
+    state: callable(days) -> (positions, velocities), each (epochs x 3), e.g. the state
+    method of an orbit_mechanics.OrbitalElements
+    Intervals are bisected until the interpolant matches the exact positions at CHECK_POINTS
+    within tol / 2 (AU). The other half of tol is a margin for the error between check points,
+    not a bound: the error of a cubic Hermite interpolant varies roughly as (s(1 - s))² across
+    an interval and peaks near the checked middle, but nothing else is verified
+    ('benchmarks.py trajectory' measures the error at random epochs). Nodes therefore
+    concentrate where the orbit curves fastest, around perihelion
+    max_error records the largest error found at the check points only
+    """
+
+    def __init__(self, state, t_start, t_end, tol=1e-9, initial_nodes=9, max_nodes=1_000_000):
+        self.tol = tol
+        nodes = np.linspace(t_start, t_end, initial_nodes)
+        positions, velocities = state(nodes)
+
+        while True:
+            self._fit(nodes, positions, velocities)
+
+            # Check every interval at its interior points against the exact solution
+            h = np.diff(nodes)
+            fractions = np.array(CHECK_POINTS)
+            check_days = nodes[:-1, None] + h[:, None] * fractions
+            exact, _ = state(check_days.ravel())
+            error = np.linalg.norm(self._evaluate(check_days.ravel()).T - exact, axis=1)
+            interval_error = error.reshape(h.size, fractions.size).max(axis=1)
+
+            bad = interval_error > tol / 2
+            if not bad.any():
+                break
+            if nodes.size + bad.sum() > max_nodes:
+                raise RuntimeError(f'Trajectory needs more than {max_nodes} nodes for tol={tol}')
+
+            # Bisect the failing intervals, reusing the exact midpoint states already computed
+            middle = CHECK_POINTS.index(0.5)
+            mid_days = check_days[bad, middle]
+            mid_positions = exact.reshape(h.size, fractions.size, 3)[bad, middle]
+            _, mid_velocities = state(mid_days)
+            insert_at = np.flatnonzero(bad) + 1
+            nodes = np.insert(nodes, insert_at, mid_days)
+            positions = np.insert(positions, insert_at, mid_positions, axis=0)
+            velocities = np.insert(velocities, insert_at, mid_velocities, axis=0)
+
+        self.max_error = float(interval_error.max())
+
+    def _fit(self, nodes, positions, velocities):
+        """Power-basis coefficients p0 + v0*s + c2*s² + c3*s³ of every interval (s = t - node)"""
+        h = np.diff(nodes)[:, None]
+        p0, p1 = positions[:-1], positions[1:]
+        v0, v1 = velocities[:-1], velocities[1:]
+        slope = (p1 - p0) / h
+
+        self.nodes = nodes
+        # (3 axes x 4 orders x intervals), lowest order first: each row is a contiguous lookup table
+        self.coefficients = np.ascontiguousarray(np.stack([p0, v0,
+                                                           (3 * slope - 2 * v0 - v1) / h,
+                                                           (v0 + v1 - 2 * slope) / h**2]).transpose(2, 0, 1))
+
+    def _evaluate(self, days, block_size=EVAL_BLOCK_SIZE, derivative=False):
+        """(3 x epochs) positions, or velocities (AU/day) if derivative, at a flat array of days"""
+        out = np.empty((3, days.size))
+        last_interval = self.nodes.size - 2
+
+        # Cache-sized blocks keep the interval indices and offsets hot across the three axes
+        for start in range(0, days.size, block_size):
+            block = days[start:start + block_size]
+            index = np.searchsorted(self.nodes, block, side='right') - 1
+            np.clip(index, 0, last_interval, out=index)
+            s = block - self.nodes[index]
+
+            for axis in range(3):
+                c = self.coefficients[axis]
+                result = out[axis, start:start + block_size]
+                if derivative:
+                    # v0 + 2*c2*s + 3*c3*s²
+                    np.take(c[3], index, out=result)
+                    result *= 3 * s
+                    result += 2 * c[2].take(index)
+                    result *= s
+                    result += c[1].take(index)
+                    continue
+                # Horner's scheme, in place
+                np.take(c[3], index, out=result)
+                result *= s
+                result += c[2].take(index)
+                result *= s
+                result += c[1].take(index)
+                result *= s
+                result += c[0].take(index)
+        return out
+
+    def _check_range(self, days):
+        if days.size and (days.min() < self.nodes[0] or days.max() > self.nodes[-1]):
+            raise ValueError(f'Epochs must lie within [{self.nodes[0]}, {self.nodes[-1]}]')
+
+    def __call__(self, days):
+        """x, y, z arrays (AU) at any array of days inside [t_start, t_end]"""
+        days = np.asarray(days, dtype=float)
+        self._check_range(days)
+        positions = self._evaluate(days.ravel())
+        return tuple(positions[axis].reshape(days.shape) for axis in range(3))
+
+    def state(self, days):
+        """
+        Interpolated positions (AU) and their derivative, the velocities (AU/day), at any array
+        of days, each of shape days.shape + (3,): (epochs x 3) for a 1-D array, like the state
+        callable the interpolant was built from
+        """
+        days = np.asarray(days, dtype=float)
+        self._check_range(days)
+        flat = days.ravel()
+        return (self._evaluate(flat).T.reshape(days.shape + (3,)),
+                self._evaluate(flat, derivative=True).T.reshape(days.shape + (3,)))
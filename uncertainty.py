@@ -0,0 +1,163 @@
+"""
+Monte Carlo propagation of orbital-element uncertainty for Comet 3I/ATLAS
+Samples (e, q, i, Omega, omega, T_p) from their 1-sigma values, propagates every
+sample to every frame epoch in small vectorized blocks, and reduces the cloud to a
+per-frame position covariance and principal-axis ellipsoid. Pure NumPy.
+"""
+
+import numpy as np
+
+from orbit_mechanics import GM_SUN, perifocal_basis, solve_kepler_hyperbolic_batch
+
+ELEMENT_NAMES = ('e', 'q', 'i', 'Omega', 'omega', 'T_p')
+
+# 1-sigma uncertainties from the MPC solution (Cloete et al. 2025), see comet_3i_animation.py
+# Angles in degrees, q in AU, T_p in days
+ELEMENT_SIGMA = {'e': 0.0006, 'q': 0.0001, 'i': 0.0001, 'Omega': 0.0012, 'omega': 0.0008, 'T_p': 0.0004}
+
+
+def sample_elements(nominal, num_samples, sigma=None, covariance=None, rng=None):
+    """
+    Draw orbital-element samples around the nominal elements
+    nominal: dict with e, q, i, Omega, omega and optionally T_p (offset in days, default 0)
+    sigma: dict of 1-sigma values (default ELEMENT_SIGMA), used when no covariance is given
+    covariance: optional full 6x6 covariance in ELEMENT_NAMES order
+    Returns a dict of (num_samples,) arrays
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    mean = np.array([nominal.get(name, 0.0) for name in ELEMENT_NAMES])
+
+    if covariance is None:
+        sigma = ELEMENT_SIGMA if sigma is None else sigma
+        std = np.array([sigma.get(name, 0.0) for name in ELEMENT_NAMES])
+        draws = mean + rng.standard_normal((num_samples, len(ELEMENT_NAMES))) * std
+    else:
+        draws = rng.multivariate_normal(mean, covariance, size=num_samples)
+
+    return {name: draws[:, k] for k, name in enumerate(ELEMENT_NAMES)}
+
+
+def propagate_covariance(nominal, days_from_perihelion, num_samples=100_000, sigma=None,
+                         covariance=None, block_elements=20_000, seed=None, tol=1e-12, max_iter=20):
+    """
+    Monte Carlo position covariance of the comet at every epoch
+    nominal: dict of nominal elements (see sample_elements)
+    days_from_perihelion: (epochs,) days from the nominal perihelion
+    Samples are drawn and propagated in blocks of about block_elements sample-epochs,
+    small enough to stay in CPU cache; memory use does not grow with num_samples
+    seed: seed for the random generator, so results are reproducible
+    Returns (mean_offset, covariance): (epochs, 3) mean offset from the nominal
+    position and (epochs, 3, 3) position covariance, both in AU
+    """
+    days = np.asarray(days_from_perihelion, dtype=float)
+    num_epochs = days.size
+    rng = np.random.default_rng(seed)
+
+    # Nominal orbit: the samples are offsets from it, and its hyperbolic anomaly is
+    # the starting guess for every sample (they differ by ~1e-4, so Newton needs two steps)
+    e0 = nominal['e']
+    a0 = nominal['q'] / (1 - e0)
+    H0, _ = solve_kepler_hyperbolic_batch(np.sqrt(GM_SUN / abs(a0)**3) * days, e0)
+    sinh_H0 = np.sinh(H0)
+    cosh_H0 = np.cosh(H0)
+    P0, Q0 = perifocal_basis(nominal['i'], nominal['Omega'], nominal['omega'])
+    nominal_xyz = (np.outer(a0 * (cosh_H0 - e0), P0)
+                   + np.outer(-a0 * np.sqrt(e0**2 - 1) * sinh_H0, Q0))
+
+    block_samples = max(1, block_elements // max(num_epochs, 1))
+    shape = (block_samples, num_epochs)
+    M, H, sinh_H, cosh_H, step, work = (np.empty(shape) for _ in range(6))
+
+    sum_d = np.zeros((num_epochs, 3))
+    sum_dd = np.zeros((num_epochs, 3, 3))
+
+    done = 0
+    while done < num_samples:
+        size = min(block_samples, num_samples - done)
+        if size < block_samples:
+            M, H, sinh_H, cosh_H, step, work = (buf[:size] for buf in (M, H, sinh_H, cosh_H, step, work))
+
+        samples = sample_elements(nominal, size, sigma, covariance, rng)
+        e = samples['e'][:, None]
+        a = samples['q'][:, None] / (1 - e)
+        P, Q = perifocal_basis(samples['i'], samples['Omega'], samples['omega'])
+
+        # Mean anomaly of every sample at every epoch, relative to its own perihelion time
+        np.subtract(days, samples['T_p'][:, None], out=M)
+        M *= np.sqrt(GM_SUN / np.abs(a)**3)
+
+        # First Newton step from the nominal anomaly reuses the nominal sinh/cosh
+        np.multiply(e, sinh_H0, out=step)
+        step -= H0
+        step -= M
+        np.multiply(e, cosh_H0, out=work)
+        work -= 1
+        step /= work
+        np.subtract(H0, step, out=H)
+
+        for _ in range(max_iter):
+            # sinh/cosh from a single exp
+            np.exp(H, out=sinh_H)
+            np.reciprocal(sinh_H, out=work)
+            np.add(sinh_H, work, out=cosh_H)
+            sinh_H -= work
+            sinh_H *= 0.5
+            cosh_H *= 0.5
+
+            # Newton converges quadratically: the error left after a step is ~step²
+            last_step = np.max(np.abs(step))
+            if last_step * last_step < tol:
+                break
+
+            np.multiply(e, sinh_H, out=step)
+            step -= H
+            step -= M
+            np.multiply(e, cosh_H, out=work)
+            work -= 1
+            step /= work
+            H -= step
+
+        # Perifocal coordinates (x towards perihelion), reusing the cosh/sinh buffers
+        x_p = cosh_H
+        x_p -= e
+        x_p *= a
+        y_p = sinh_H
+        y_p *= -a * np.sqrt(e**2 - 1)
+
+        # Offsets from the nominal position keep the sums well conditioned
+        offsets = (M, H, step)
+        for k, d in enumerate(offsets):
+            np.multiply(x_p, P[:, k, None], out=d)
+            np.multiply(y_p, Q[:, k, None], out=work)
+            d += work
+            d -= nominal_xyz[:, k]
+
+        for r in range(3):
+            sum_d[:, r] += offsets[r].sum(axis=0)
+            for c in range(r, 3):
+                sum_dd[:, r, c] += np.einsum('ij,ij->j', offsets[r], offsets[c])
+        done += size
+
+    # Mirror the upper triangle
+    for r in range(3):
+        for c in range(r):
+            sum_dd[:, r, c] = sum_dd[:, c, r]
+
+    mean_offset = sum_d / num_samples
+    cov = sum_dd / num_samples - mean_offset[:, :, None] * mean_offset[:, None, :]
+    return mean_offset, cov
+
+
+def principal_axes(covariance, n_sigma=3):
+    """
+    Principal-axis ellipsoid of each covariance matrix
+    Returns (semi_axes, axes): (..., 3) n_sigma semi-axis lengths, largest first,
+    and (..., 3, 3) unit axis directions as rows matching semi_axes
+    """
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    # eigh sorts ascending; flip to largest first
+    eigenvalues = np.clip(eigenvalues[..., ::-1], 0, None)
+    eigenvectors = eigenvectors[..., ::-1]
+    semi_axes = n_sigma * np.sqrt(eigenvalues)
+    axes = np.swapaxes(eigenvectors, -1, -2)
+    return semi_axes, axes
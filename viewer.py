@@ -0,0 +1,291 @@
+"""
+Real-time interactive viewer for the Comet 3I/ATLAS animation
+Plays a CometAnimation scene in a matplotlib window with blitting: the static
+scene (trajectory, planet orbits, Sun) is drawn once into a cached background
+and every frame only redraws the comet, tail, ellipses, planets and HUD text.
+Text and marker rasterization dominates that redraw, so labels, planet markers
+and HUD panels are rendered once per distinct text into RGBA sprites and then
+alpha-composited at their projected pixel position.
+
+Keys: space pause/resume, left/right step one frame, up/down seek one second,
+home/end jump to the first/last frame, c toggle the cinematic camera.
+The mouse rotates and zooms the view as usual; the background is cached again
+after every full redraw.
+"""
+
+import collections
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backends.backend_agg import RendererAgg
+from matplotlib.text import Text
+from mpl_toolkits.mplot3d import proj3d
+from mpl_toolkits.mplot3d.art3d import Path3DCollection, Text3D
+
+# Keys handled by the viewer, removed from matplotlib's default keymaps while it runs
+VIEWER_KEYS = (' ', 'left', 'right', 'up', 'down', 'home', 'end', 'c')
+
+# Frames averaged by the frame-rate counter, and seconds between counter updates
+FPS_WINDOW = 30
+FPS_UPDATE_SECONDS = 0.5
+
+# Sprites kept by SpriteCache
+MAX_SPRITES = 128
+
+
+class SpriteCache:
+    """
+    Pre-rendered RGBA sprites of text and marker artists, composited straight into
+    an Agg canvas buffer. A sprite is keyed by the artist and its text and drawn
+    relative to the artist's anchor pixel, so moving labels and markers are reused
+    """
+
+    def __init__(self, canvas, max_sprites=MAX_SPRITES):
+        self.canvas = canvas
+        self.max_sprites = max_sprites
+        self.sprites = collections.OrderedDict()
+        # Keys drawn once without a sprite: text that changes every frame is never reused
+        self.seen = collections.OrderedDict()
+        self.size = canvas.get_width_height(physical=True)
+        self.offscreen = RendererAgg(*self.size, canvas.figure.dpi)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def supports(artist):
+        """Texts and single-point 3D scatter markers look the same wherever they are drawn"""
+        return isinstance(artist, (Text, Path3DCollection))
+
+    @staticmethod
+    def placement(artist):
+        """
+        Pixel position (x, y from the bottom left) the artist is drawn relative to, and
+        its on-screen angle in whole degrees (3D labels turn with the view)
+        """
+        if isinstance(artist, Text3D):
+            xyz = np.array(artist.get_position_3d(), dtype=float)
+            # Text3D aligns the text with its zdir as projected on screen
+            ends = np.stack([xyz, xyz + artist._dir_vec])
+        elif isinstance(artist, Path3DCollection):
+            ends = np.array([[coords[0] for coords in artist._offsets3d]] * 2, dtype=float)
+        else:
+            x, y = artist.get_transform().transform(artist.get_position())
+            return x, y, round(artist.get_rotation()) % 180
+
+        x, y, _ = proj3d.proj_transform(ends[:, 0], ends[:, 1], ends[:, 2], artist.axes.M)
+        (x0, y0), (x1, y1) = artist.axes.transData.transform(np.column_stack([x, y]))
+        angle = round(np.degrees(np.arctan2(y1 - y0, x1 - x0))) % 180 if (x1, y1) != (x0, y0) else 0
+        return x0, y0, angle
+
+    def _render(self, artist, x, y):
+        """
+        Draw the artist alone, unclipped, on a transparent canvas and crop it to its
+        visible pixels; None if it is empty or not entirely on the canvas
+        """
+        self.offscreen.clear()
+        clip_on = artist.get_clip_on()
+        artist.set_clip_on(False)
+        if isinstance(artist, Path3DCollection):
+            artist.do_3d_projection()
+        artist.draw(self.offscreen)
+        artist.set_clip_on(clip_on)
+
+        rgba = np.asarray(self.offscreen.buffer_rgba())
+        height, width = rgba.shape[:2]
+        alpha = rgba[..., 3]
+        rows = np.flatnonzero(alpha.any(axis=1))
+        cols = np.flatnonzero(alpha.any(axis=0))
+        if rows.size == 0 or rows[0] == 0 or cols[0] == 0 or rows[-1] == height - 1 or cols[-1] == width - 1:
+            return None
+
+        top, left = rows[0], cols[0]
+        sprite = rgba[top:rows[-1] + 1, left:cols[-1] + 1].astype(np.float32) / 255
+        opacity = sprite[..., 3:]
+        # Premultiplied colour and the remaining background weight: out = bg * keep + color
+        color = sprite[..., :3] * opacity * 255
+        keep = 1 - opacity
+        # Offset of the top-left pixel from the anchor, in buffer rows/columns
+        return color, keep, top - (height - y), left - x
+
+    def draw(self, artist):
+        """
+        Composite the artist's sprite into the canvas buffer, rendering it on first use
+        Returns False if the artist cannot be drawn as a sprite (then draw it normally)
+        """
+        if not artist.get_visible():
+            return True
+        x, y, angle = self.placement(artist)
+        width, height = self.size
+        if not (-width < x < 2 * width and -height < y < 2 * height):
+            # Labels and markers are far smaller than the canvas: nothing of it can show
+            return True
+
+        key = (id(artist), artist.get_text() if isinstance(artist, Text) else None, angle)
+        if key in self.sprites:
+            self.sprites.move_to_end(key)
+            self.hits += 1
+        elif not (0 <= x < width and 0 <= y < height):
+            # Only render sprites on the canvas, where they are not cut off
+            return False
+        elif key not in self.seen:
+            # First sighting: drawing it directly is cheaper than rendering a sprite
+            self.seen[key] = None
+            if len(self.seen) > 4 * self.max_sprites:
+                self.seen.popitem(last=False)
+            return False
+        else:
+            sprite = self._render(artist, x, y)
+            if sprite is None:
+                return False
+            self.sprites[key] = sprite
+            if len(self.sprites) > self.max_sprites:
+                self.sprites.popitem(last=False)
+            self.misses += 1
+        color, keep, row_offset, col_offset = self.sprites[key]
+
+        buffer = np.asarray(self.canvas.buffer_rgba())
+        height, width = buffer.shape[:2]
+        top = int(round(height - y + row_offset))
+        left = int(round(x + col_offset))
+
+        # Visible window: the canvas, or the artist's clip box (e.g. markers inside the axes)
+        row_min, col_min, row_max, col_max = 0, 0, height, width
+        clip_box = artist.get_clip_box()
+        if artist.get_clip_on() and clip_box is not None:
+            row_min, row_max = max(0, int(height - clip_box.y1)), min(height, int(np.ceil(height - clip_box.y0)))
+            col_min, col_max = max(0, int(clip_box.x0)), min(width, int(np.ceil(clip_box.x1)))
+
+        rows, cols = color.shape[:2]
+        r0, c0 = max(0, row_min - top), max(0, col_min - left)
+        r1, c1 = min(rows, row_max - top), min(cols, col_max - left)
+        if r0 < r1 and c0 < c1:
+            target = buffer[top + r0:top + r1, left + c0:left + c1, :3]
+            target[...] = target * keep[r0:r1, c0:c1] + color[r0:r1, c0:c1]
+        return True
+
+
+class InteractiveViewer:
+    """
+    Blitted playback of a built CometAnimation scene
+    fps: target playback rate (timer interval), seek_seconds: step of up/down
+    follow_camera: start with the cinematic camera, which moves every frame and
+    therefore needs a full redraw per frame instead of blitting
+    """
+
+    def __init__(self, scene, fps=30, seek_seconds=1.0, follow_camera=False):
+        self.scene = scene
+        self.fig = scene.fig
+        self.canvas = scene.fig.canvas
+        self.frame = 0
+        self.playing = True
+        self.follow_camera = follow_camera
+        self.seek_frames = max(1, round(seek_seconds * fps))
+        self.frame_times = collections.deque(maxlen=FPS_WINDOW)
+        self.fps_updated = 0.0
+        self.background = None
+        # Sprites need direct access to the canvas pixels (every Agg-based backend)
+        self.sprites = SpriteCache(self.canvas) if hasattr(self.canvas, 'buffer_rgba') else None
+
+        scene.init()
+        self.fps_text = self.fig.text(0.01, 0.99, '', color='#00FF00', fontsize=9, family='monospace',
+                                      ha='left', va='top')
+        self.artists = scene.dynamic_artists() + [self.fps_text]
+        # Animated artists are skipped by full draws and only drawn by _draw_artists()
+        for artist in self.artists:
+            artist.set_animated(True)
+
+        # Start from the cinematic view of the first frame
+        scene.animate(self.frame)
+
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.canvas.mpl_connect('key_press_event', self._on_key)
+        self.timer = self.canvas.new_timer(interval=1000 / fps)
+        self.timer.add_callback(self._tick)
+
+    def _on_draw(self, event):
+        """Cache the freshly drawn static scene and put the dynamic artists back on top"""
+        if self.sprites is not None and self.canvas.get_width_height(physical=True) != self.sprites.size:
+            # Resized window: every sprite and the offscreen canvas are the wrong size
+            self.sprites = SpriteCache(self.canvas)
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self.artists:
+            if self.sprites is not None and SpriteCache.supports(artist) and self.sprites.draw(artist):
+                continue
+            if hasattr(artist, 'do_3d_projection'):
+                # Scatter markers are projected by Axes3D.draw, which blitting bypasses
+                artist.do_3d_projection()
+            self.fig.draw_artist(artist)
+
+    def update(self):
+        """Draw the current frame: blit over the cached background, or redraw all if the camera moves"""
+        self.scene.animate(self.frame, move_camera=self.follow_camera)
+
+        now = time.perf_counter()
+        self.frame_times.append(now)
+        # Refreshing the counter every frame would render a new text sprite every frame
+        if now - self.fps_updated > FPS_UPDATE_SECONDS or not self.playing:
+            self.fps_updated = now
+            camera = 'cinematic camera' if self.follow_camera else 'fixed camera'
+            state = f'{self.fps():5.1f} fps' if self.playing else 'paused'
+            self.fps_text.set_text(f'{state} | {camera} | frame {self.frame + 1}/{self.scene.total_frames}')
+
+        if self.follow_camera or self.background is None:
+            # The projection changed, so the cached background is stale
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self.background)
+            self._draw_artists()
+            self.canvas.blit(self.fig.bbox)
+        self.canvas.flush_events()
+
+    def fps(self):
+        """Frames per second over the last FPS_WINDOW frames drawn"""
+        if len(self.frame_times) < 2:
+            return 0.0
+        return (len(self.frame_times) - 1) / (self.frame_times[-1] - self.frame_times[0])
+
+    def seek(self, frame):
+        """Jump to a frame, wrapping around the ends"""
+        self.frame = frame % self.scene.total_frames
+        self.frame_times.clear()
+        self.update()
+
+    def _tick(self):
+        if self.playing:
+            self.frame = (self.frame + 1) % self.scene.total_frames
+            self.update()
+
+    def _on_key(self, event):
+        last = self.scene.total_frames - 1
+        if event.key == ' ':
+            self.playing = not self.playing
+            self.frame_times.clear()
+            self.update()
+        elif event.key == 'c':
+            self.follow_camera = not self.follow_camera
+            self.frame_times.clear()
+            self.update()
+        elif event.key in ('left', 'right'):
+            self.seek(self.frame + (1 if event.key == 'right' else -1))
+        elif event.key in ('up', 'down'):
+            self.seek(self.frame + (self.seek_frames if event.key == 'up' else -self.seek_frames))
+        elif event.key == 'home':
+            self.seek(0)
+        elif event.key == 'end':
+            self.seek(last)
+
+    def show(self):
+        """Open the window and play until it is closed"""
+        keymaps = {name: keys for name, keys in plt.rcParams.items() if name.startswith('keymap.')}
+        for name, keys in keymaps.items():
+            plt.rcParams[name] = [key for key in keys if key not in VIEWER_KEYS]
+        try:
+            self.timer.start()
+            plt.show()
+        finally:
+            self.timer.stop()
+            plt.rcParams.update(keymaps)